@@ -39,6 +39,8 @@ class Settings:
     GEMINI_MAX_TOKENS: int = int(os.getenv("GEMINI_MAX_TOKENS", "100000"))  # Increased for comprehensive analysis
     GEMINI_RETRY_ATTEMPTS: int = int(os.getenv("GEMINI_RETRY_ATTEMPTS", "3"))
     GEMINI_RETRY_DELAY: float = float(os.getenv("GEMINI_RETRY_DELAY", "1.0"))
+    GEMINI_REQUESTS_PER_MINUTE: int = int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+    GEMINI_TOKENS_PER_MINUTE: int = int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000"))
 
     # Groq API Configuration
     GROQ_MODEL: str = os.getenv("GROQ_MODEL", "llama3-8b-8192")
@@ -46,12 +48,123 @@ class Settings:
     GROQ_MAX_TOKENS: int = int(os.getenv("GROQ_MAX_TOKENS", "100000"))  # Increased for comprehensive analysis
     GROQ_RETRY_ATTEMPTS: int = int(os.getenv("GROQ_RETRY_ATTEMPTS", "3"))
     GROQ_RETRY_DELAY: float = float(os.getenv("GROQ_RETRY_DELAY", "1.0"))
+    GROQ_REQUESTS_PER_MINUTE: int = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", "30"))
+    GROQ_TOKENS_PER_MINUTE: int = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "30000"))
+
+    # Model Routing Configuration
+    LLM_FAST_MODEL: str = os.getenv("LLM_FAST_MODEL", GEMINI_MODEL)
+    LLM_STRONG_MODEL: str = os.getenv("LLM_STRONG_MODEL", "gemini-2.5-pro")
+    LLM_MODEL_ROUTES: str = os.getenv("LLM_MODEL_ROUTES", "")  # e.g. "final_memo=strong,topic_extraction=fast>strong"
+    LLM_CASCADE_ENABLED: bool = bool(os.getenv("LLM_CASCADE_ENABLED", "true").lower() == "true")
+
+    # Provider Failover Configuration
+    LLM_FALLBACK_PROVIDER: str = os.getenv("LLM_FALLBACK_PROVIDER", "groq" if LLM_PROVIDER == "google" else "google")  # empty disables failover
+    LLM_FALLBACK_MODEL: str = os.getenv("LLM_FALLBACK_MODEL", "")  # defaults to the fallback provider's configured model
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "3"))
+    CIRCUIT_BREAKER_WINDOW_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_WINDOW_SECONDS", "60"))
+    CIRCUIT_BREAKER_RECOVERY_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_RECOVERY_SECONDS", "30"))
+    LLM_HEALTH_CHECK_TTL_SECONDS: float = float(os.getenv("LLM_HEALTH_CHECK_TTL_SECONDS", "300"))
+
+    # Retry Configuration (attempts and base delay per provider are the *_RETRY_* settings above)
+    LLM_RETRY_MAX_DELAY: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+    LLM_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("LLM_REQUEST_DEADLINE_SECONDS", "600"))  # all attempts of one request
+    LLM_ATTEMPT_TIMEOUT_SECONDS: float = float(os.getenv("LLM_ATTEMPT_TIMEOUT_SECONDS", "300"))
+    LLM_RETRY_BUDGET_RATIO: float = float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2"))  # retries per request, process-wide
+    LLM_RETRY_BUDGET_MIN_PER_MINUTE: int = int(os.getenv("LLM_RETRY_BUDGET_MIN_PER_MINUTE", "10"))
     
     # Public Data Extraction Configuration
     PUBLIC_DATA_ENABLED: bool = bool(os.getenv("PUBLIC_DATA_ENABLED", "true").lower() == "true")
     PUBLIC_DATA_EXTRACTORS: List[str] = os.getenv("PUBLIC_DATA_EXTRACTORS", "products_services").split(",")
     PUBLIC_DATA_TIMEOUT: int = int(os.getenv("PUBLIC_DATA_TIMEOUT", "60"))
     PUBLIC_DATA_RETRY_ATTEMPTS: int = int(os.getenv("PUBLIC_DATA_RETRY_ATTEMPTS", "2"))
+
+    # Async LLM Configuration
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+    # Token Budget Configuration (prompt input caps, in tokens)
+    TOKEN_BUDGET_RESERVED_OUTPUT: int = int(os.getenv("TOKEN_BUDGET_RESERVED_OUTPUT", "8192"))
+    TOKEN_BUDGET_DOCUMENT_STRUCTURING: int = int(os.getenv("TOKEN_BUDGET_DOCUMENT_STRUCTURING", "8000"))
+    TOKEN_BUDGET_FINAL_MEMO: int = int(os.getenv("TOKEN_BUDGET_FINAL_MEMO", "32000"))
+    TOKEN_BUDGET_FOUNDER_SIMULATION: int = int(os.getenv("TOKEN_BUDGET_FOUNDER_SIMULATION", "16000"))
+    TOKEN_BUDGET_FOUNDER_ANALYSIS: int = int(os.getenv("TOKEN_BUDGET_FOUNDER_ANALYSIS", "8000"))
+
+    # PDF Rendering Configuration
+    PDF_RASTER_WORKERS: int = int(os.getenv("PDF_RASTER_WORKERS", "0"))  # 0 uses one process per CPU
+    PDF_RASTER_PARALLEL_MIN_PAGES: int = int(os.getenv("PDF_RASTER_PARALLEL_MIN_PAGES", "8"))  # smaller PDFs render serially
+
+    # Page Image Configuration (per-stage resolution; max side caps pixels sent to the model)
+    PAGE_IMAGE_FORMAT: str = os.getenv("PAGE_IMAGE_FORMAT", "jpeg")  # jpeg, webp or png
+    PAGE_IMAGE_QUALITY: int = int(os.getenv("PAGE_IMAGE_QUALITY", "85"))
+    PAGE_IMAGE_TRIM_MARGINS: bool = bool(os.getenv("PAGE_IMAGE_TRIM_MARGINS", "true").lower() == "true")
+    PAGE_IMAGE_METADATA_DPI: int = int(os.getenv("PAGE_IMAGE_METADATA_DPI", "72"))
+    PAGE_IMAGE_METADATA_MAX_SIDE: int = int(os.getenv("PAGE_IMAGE_METADATA_MAX_SIDE", "1024"))
+    PAGE_IMAGE_TOPIC_DPI: int = int(os.getenv("PAGE_IMAGE_TOPIC_DPI", "150"))
+    PAGE_IMAGE_TOPIC_MAX_SIDE: int = int(os.getenv("PAGE_IMAGE_TOPIC_MAX_SIDE", "1536"))
+
+    # Processed Deck Index Configuration (re-uploads of a known deck restore its outputs)
+    DECK_INDEX_ENABLED: bool = bool(os.getenv("DECK_INDEX_ENABLED", "true").lower() == "true")
+    DECK_INDEX_DIR: Path = Path(os.getenv("DECK_INDEX_DIR", ".cache/decks"))
+
+    # Incremental Deck Version Configuration (only topics with changed slides are re-extracted)
+    DECK_INCREMENTAL_ENABLED: bool = bool(os.getenv("DECK_INCREMENTAL_ENABLED", "true").lower() == "true")
+    DECK_VERSION_MIN_OVERLAP: float = float(os.getenv("DECK_VERSION_MIN_OVERLAP", "0.5"))  # share of identical slides
+    DECK_DIFF_MIN_SIMILARITY: float = float(os.getenv("DECK_DIFF_MIN_SIMILARITY", "0.6"))  # edited slide vs its previous version
+
+    # Page Render Cache Configuration (pages render lazily; encoded renders are shared on disk)
+    PAGE_CACHE_MEMORY_PAGES: int = int(os.getenv("PAGE_CACHE_MEMORY_PAGES", "16"))  # encoded pages kept in memory per deck
+    PAGE_RENDER_CACHE_ENABLED: bool = bool(os.getenv("PAGE_RENDER_CACHE_ENABLED", "true").lower() == "true")
+    PAGE_RENDER_CACHE_DIR: Path = Path(os.getenv("PAGE_RENDER_CACHE_DIR", ".cache/pages"))
+    PAGE_RENDER_CACHE_MAX_SIZE_MB: int = int(os.getenv("PAGE_RENDER_CACHE_MAX_SIZE_MB", "1000"))
+
+    # Page Text Fast Path Configuration (text-dominant pages are sent as their text layer instead of images)
+    PAGE_TEXT_FAST_PATH_ENABLED: bool = bool(os.getenv("PAGE_TEXT_FAST_PATH_ENABLED", "true").lower() == "true")
+    PAGE_TEXT_MIN_CHARS: int = int(os.getenv("PAGE_TEXT_MIN_CHARS", "120"))
+    PAGE_TEXT_MAX_VISUAL_COVERAGE: float = float(os.getenv("PAGE_TEXT_MAX_VISUAL_COVERAGE", "0.2"))  # image/graphics share of the page
+
+    # Page Dedup Configuration (perceptual hashes; duplicates, blank and divider slides are not sent to the LLM)
+    PAGE_DEDUP_ENABLED: bool = bool(os.getenv("PAGE_DEDUP_ENABLED", "true").lower() == "true")
+    PAGE_DEDUP_MAX_DISTANCE: int = int(os.getenv("PAGE_DEDUP_MAX_DISTANCE", "4"))  # differing bits of 64 (aHash and dHash)
+    PAGE_BLANK_MAX_CONTRAST: float = float(os.getenv("PAGE_BLANK_MAX_CONTRAST", "3.0"))  # grayscale standard deviation
+    PAGE_DIVIDER_MAX_CHARS: int = int(os.getenv("PAGE_DIVIDER_MAX_CHARS", "40"))
+
+    # Local Table of Contents Configuration (Stage 1 from the text layer; the LLM is asked when confidence is low)
+    TOC_LOCAL_ENABLED: bool = bool(os.getenv("TOC_LOCAL_ENABLED", "true").lower() == "true")
+    TOC_LOCAL_MIN_CONFIDENCE: float = float(os.getenv("TOC_LOCAL_MIN_CONFIDENCE", "0.6"))  # share of pages assigned to a topic
+    TOC_LOCAL_MIN_TOPICS: int = int(os.getenv("TOC_LOCAL_MIN_TOPICS", "3"))
+
+    # Deck Session Configuration (how rendered pitch deck pages are shared across vision calls)
+    DECK_SESSION_MODE: str = os.getenv("DECK_SESSION_MODE", "files")  # inline, files or context_cache
+    DECK_CONTEXT_CACHE_TTL_SECONDS: float = float(os.getenv("DECK_CONTEXT_CACHE_TTL_SECONDS", "3600"))
+    DECK_UPLOAD_WORKERS: int = int(os.getenv("DECK_UPLOAD_WORKERS", "8"))
+
+    # Topic Extraction Configuration (batched sends several TOC topics per vision call)
+    TOPIC_EXTRACTION_MODE: str = os.getenv("TOPIC_EXTRACTION_MODE", "per_topic")  # per_topic or batched
+    TOPIC_BATCH_MAX_TOPICS: int = int(os.getenv("TOPIC_BATCH_MAX_TOPICS", "8"))
+    TOPIC_BATCH_MAX_PAGES: int = int(os.getenv("TOPIC_BATCH_MAX_PAGES", "30"))
+    TOPIC_BATCH_MAX_INPUT_TOKENS: int = int(os.getenv("TOPIC_BATCH_MAX_INPUT_TOKENS", "32000"))
+    TOPIC_EXTRACTION_WORKERS: int = int(os.getenv("TOPIC_EXTRACTION_WORKERS", "4"))  # concurrent per-topic calls
+
+    # Embedding Configuration
+    EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))  # texts per embedding request (max 100)
+
+    # LLM Response Cache Configuration
+    LLM_CACHE_ENABLED: bool = bool(os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true")
+    LLM_CACHE_DIR: Path = Path(os.getenv("LLM_CACHE_DIR", ".cache/llm"))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_CACHE_MAX_SIZE_MB: int = int(os.getenv("LLM_CACHE_MAX_SIZE_MB", "500"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "0"))  # 0 disables expiry
+
+    # LLM Cassette Configuration (record/replay of provider responses for offline runs)
+    LLM_CASSETTE_MODE: str = os.getenv("LLM_CASSETTE_MODE", "off")  # off, record, replay or auto
+    LLM_CASSETTE_DIR: Path = Path(os.getenv("LLM_CASSETTE_DIR", ".cache/cassettes"))
+    LLM_CASSETTE_LATENCY_SCALE: float = float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1.0"))  # x recorded latency
+    LLM_CASSETTE_LATENCY_SECONDS: float = float(os.getenv("LLM_CASSETTE_LATENCY_SECONDS", "0"))
+    LLM_CASSETTE_ERROR_RATE: float = float(os.getenv("LLM_CASSETTE_ERROR_RATE", "0"))  # injected 503s on replay
+    LLM_CASSETTE_SEED: int = int(os.getenv("LLM_CASSETTE_SEED", "0"))
+
+    # LLM Telemetry Configuration
+    LLM_TELEMETRY_ENABLED: bool = bool(os.getenv("LLM_TELEMETRY_ENABLED", "true").lower() == "true")
+    LLM_TELEMETRY_MAX_RECORDS: int = int(os.getenv("LLM_TELEMETRY_MAX_RECORDS", "2000"))  # recent calls kept for export
     
     def __post_init__(self):
         """Create necessary directories."""
@@ -2,22 +2,26 @@ import os
 import requests
 from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-import google.generativeai as genai
+
+from src.utils.llm_telemetry import get_llm_telemetry
+from src.utils.client_registry import get_client_registry
+from src.utils.llm_cache import get_llm_cache
+from src.utils.llm_cassette import get_llm_cassette
 
 # Load environment variables from .env file
 load_dotenv()
 GEMINI_MODEL = os.getenv("GEMINI_MODEL")
 
-# Configure the Gemini API key from environment variables
-try:
-    api_key = os.environ["GOOGLE_API_KEY"]
+
+def configure_gemini():
+    """
+    Configure the Gemini API key from environment variables.
+    Called when the agent is created, so importing this module has no side effects.
+    """
+    api_key = os.environ.get("GOOGLE_API_KEY")
     if not api_key:
         raise ValueError("GEMINI_API_KEY is not set in the environment.")
-    genai.configure(api_key=api_key)
-except (KeyError, ValueError) as e:
-    print(f"Error: {e}")
-    print("Please make sure you have a .env file with your GEMINI_API_KEY or set it as an environment variable.")
-    exit(1)
+    get_client_registry().configure_genai(api_key)
 
 
 class Inc42ScraperAgent:
@@ -29,7 +33,9 @@ class Inc42ScraperAgent:
         """
         Initializes the agent and the Gemini model.
         """
-        self.model = genai.GenerativeModel(GEMINI_MODEL)
+        if not get_llm_cassette().offline:
+            configure_gemini()
+        self.model = get_client_registry().generative_model(GEMINI_MODEL)
 
     def scrape_and_summarize(self, url: str) -> str:
         """
@@ -44,6 +50,9 @@ class Inc42ScraperAgent:
             or an error message if the process fails.
         """
         print(f"Scraping and summarizing URL: {url}")
+        # Scraped pages are not recorded, so there is nothing to summarize in offline replay
+        if get_llm_cassette().offline:
+            return "Error: Scraping is skipped in cassette replay mode"
         try:
             resp = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
             resp.raise_for_status()
@@ -78,9 +87,16 @@ class Inc42ScraperAgent:
         """
 
         print("Extracting information with the Gemini API...")
-        try:
-            response = self.model.generate_content(prompt)
+        def request() -> str:
+            with get_llm_telemetry().track("news_scrapper", "google", GEMINI_MODEL, prompt,
+                                           task="news_summary") as call:
+                response = self.model.generate_content(prompt)
+                call.set_response(response)
             return response.text
+
+        try:
+            request_key = get_llm_cache().make_key(GEMINI_MODEL, prompt, params={"source": "news_scrapper"})
+            return get_llm_cassette().play(request_key, GEMINI_MODEL, prompt, request)
         except Exception as e:
             return f"Error: Failed to generate content using the Gemini API: {e}"
 
@@ -104,7 +120,12 @@ if __name__ == "__main__":
     # We are using "Paytm" as an example of a company with a page on Inc42's startup directory.
     # You can replace "paytm" with another company name.
     company_to_search = "ziniosa"
-    agent = Inc42ScraperAgent()
+    try:
+        agent = Inc42ScraperAgent()
+    except ValueError as e:
+        print(f"Error: {e}")
+        print("Please make sure you have a .env file with your GEMINI_API_KEY or set it as an environment variable.")
+        exit(1)
     markdown_output = agent.run(company_to_search)
     print("\n--- Generated Report ---")
     print(markdown_output)
\ No newline at end of file
@@ -6,9 +6,10 @@ Abstract base class for all analysis agents with common functionality.
 """
 
 import logging
+import os
 import time
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Type, Union
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Type, Union
 import json
 
 from langchain_core.language_models import BaseLanguageModel
@@ -16,7 +17,9 @@ from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
 from pydantic import BaseModel, ValidationError
 
-from src.utils.llm_setup import get_llm, llm_setup
+from src.utils.llm_setup import get_llm_for_task, llm_setup
+from src.utils.model_router import TASK_AGENT_ANALYSIS
+from src.utils.llm_telemetry import get_llm_telemetry
 from src.models.document_models import StartupDocument
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
@@ -46,6 +49,9 @@ class BaseAnalysisAgent(ABC):
     output parsing, and error handling.
     """
 
+    # Task type used to route this agent's calls to a model
+    task_type: str = TASK_AGENT_ANALYSIS
+
     def __init__(self,
                  agent_name: str,
                  llm: Optional[BaseLanguageModel] = None,
@@ -57,13 +63,13 @@ class BaseAnalysisAgent(ABC):
 
         Args:
             agent_name: Name of the agent for logging
-            llm: Language model instance (uses default if None)
+            llm: Language model instance (uses the model routed for task_type if None)
             output_model: Pydantic model for structured output
             temperature: Override default temperature
             max_retries: Maximum retry attempts for failed requests
         """
         self.agent_name = agent_name
-        self.llm = llm or get_llm()
+        self.llm = llm or get_llm_for_task(self.task_type)
         self.output_model = output_model
         self.max_retries = max_retries
         self.temperature = temperature
@@ -220,12 +226,13 @@ class BaseAnalysisAgent(ABC):
 
         return input_vars
 
-    def _execute_llm_call(self, prompt: str, **kwargs) -> str:
+    def _execute_llm_call(self, prompt: str, validate: Optional[Callable[[str], bool]] = None, **kwargs) -> str:
         """
         Execute LLM call with error handling and retries
 
         Args:
             prompt: Formatted prompt string
+            validate: Optional response check; failing responses escalate to a stronger routed model
             **kwargs: Additional LLM parameters
 
         Returns:
@@ -243,7 +250,9 @@ class BaseAnalysisAgent(ABC):
                 response = response_obj.content
             else:
                 # Use the real LLM setup
-                response = llm_setup.invoke_with_retry(self.llm, prompt, **invoke_kwargs)
+                response = llm_setup.invoke_with_cascade(
+                    self.task_type, prompt, llm=self.llm, validate=validate, **invoke_kwargs
+                )
 
             if not response or not response.strip():
                 raise AnalysisError("LLM returned empty response")
@@ -256,6 +265,96 @@ class BaseAnalysisAgent(ABC):
             logger.error(f"LLM call failed for {self.agent_name}: {e}")
             raise AnalysisError(f"LLM execution failed: {e}")
 
+    def _stream_llm_call(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Stream an LLM response chunk by chunk
+
+        Args:
+            prompt: Formatted prompt string
+            **kwargs: Additional LLM parameters
+
+        Yields:
+            Response text chunks as they arrive
+        """
+        invoke_kwargs = {k: v for k, v in kwargs.items() if k != 'temperature'}
+        logger.debug(f"Streaming LLM call for {self.agent_name}")
+        yield from llm_setup.stream_with_retry(self.llm, prompt, **invoke_kwargs)
+
+    def _consume_stream(self,
+                        chunks: Iterable[str],
+                        on_chunk: Optional[Callable[[str], None]] = None,
+                        output_file: Optional[str] = None) -> str:
+        """
+        Consume a response stream, forwarding each chunk as it arrives
+
+        Args:
+            chunks: Iterable of response text chunks
+            on_chunk: Optional callback invoked with each chunk (e.g. for UI rendering)
+            output_file: Optional file the chunks are appended to and flushed
+
+        Returns:
+            Complete response text
+        """
+        parts = []
+        report = open(output_file, 'a', encoding='utf-8') if output_file else None
+        try:
+            for chunk in chunks:
+                parts.append(chunk)
+                if report:
+                    report.write(chunk)
+                    report.flush()
+                if on_chunk:
+                    on_chunk(chunk)
+        except Exception as e:
+            self.error_count += 1
+            logger.error(f"LLM stream failed for {self.agent_name}: {e}")
+            raise
+        finally:
+            if report:
+                report.close()
+
+        return "".join(parts)
+
+    def _consume_validated_stream(self,
+                                  chunks: Iterable[str],
+                                  prompt: str,
+                                  validate: Optional[Callable[[str], bool]] = None,
+                                  on_chunk: Optional[Callable[[str], None]] = None,
+                                  output_file: Optional[str] = None) -> str:
+        """
+        Consume a response stream, then check the finished response
+
+        A streamed response failing validation is regenerated through the validated
+        model cascade (as _execute_llm_call does for non-streamed calls). The
+        streamed text in output_file is replaced by the new response, and on_chunk
+        receives the new response after a notice.
+
+        Args:
+            chunks: Iterable of response text chunks
+            prompt: Prompt the stream was generated from, for the regeneration
+            validate: Optional response check; failing responses escalate to a stronger routed model
+            on_chunk: Optional callback invoked with each chunk
+            output_file: Optional file the chunks are appended to and flushed
+
+        Returns:
+            Complete (validated) response text
+        """
+        start = os.path.getsize(output_file) if output_file and os.path.exists(output_file) else 0
+        result = self._consume_stream(chunks, on_chunk=on_chunk, output_file=output_file)
+        if validate is None or not self.llm or validate(result):
+            return result
+
+        logger.warning(f"Streamed response of {self.agent_name} failed validation, regenerating with the model cascade")
+        result = self._execute_llm_call(prompt, validate=validate)
+        if output_file:
+            with open(output_file, 'r+b') as report:
+                report.truncate(start)
+                report.seek(start)
+                report.write(result.encode('utf-8'))
+        if on_chunk:
+            on_chunk(f"\n\n---\n\n*Regenerated with a stronger model:*\n\n{result}")
+        return result
+
     def _parse_output(self, raw_output: str) -> Union[BaseModel, Dict[str, Any]]:
         """
         Parse LLM output using configured parser
@@ -360,6 +459,9 @@ class BaseAnalysisAgent(ABC):
         """
         Get performance statistics for this agent
 
+        LLM call metrics are those recorded for the agent's task type, which
+        agents sharing a task type have in common.
+
         Returns:
             Performance statistics dictionary
         """
@@ -371,7 +473,8 @@ class BaseAnalysisAgent(ABC):
             "total_processing_time": self.total_processing_time,
             "average_processing_time": avg_time,
             "error_count": self.error_count,
-            "success_rate": (self.analysis_count - self.error_count) / max(self.analysis_count, 1)
+            "success_rate": (self.analysis_count - self.error_count) / max(self.analysis_count, 1),
+            "llm_calls": get_llm_telemetry().summary(task=self.task_type)
         }
 
     def _track_performance(self, processing_time: float):
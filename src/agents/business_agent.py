@@ -6,7 +6,7 @@ Specialized agent for comprehensive business model evaluation and analysis.
 """
 
 import logging
-from typing import Dict, Any, List, Optional, Union
+from typing import Callable, Dict, Any, Iterator, List, Optional, Union
 import json
 
 from langchain_core.prompts import PromptTemplate
@@ -16,6 +16,7 @@ from src.agents.base_agent import BaseStructuredAgent, AnalysisError
 from src.models.document_models import StartupDocument
 from src.models.analysis_models import BusinessAnalysis
 from src.utils.prompt_manager import PromptManager
+from src.utils.model_router import has_sections
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -557,20 +558,17 @@ Instructions: Use all available information, note gaps explicitly, provide secto
 
         return risks
 
-    def analyze_combined_documents(self, pitch_deck_content: str, public_data_content: str) -> str:
+    def _format_combined_prompt(self, pitch_deck_content: str, public_data_content: str) -> str:
         """
-        Analyze startup using both pitch deck and public data together
+        Build the combined business analysis prompt
 
         Args:
             pitch_deck_content: Content from pitch deck analysis
             public_data_content: Content from public data scraping
 
         Returns:
-            Markdown formatted business analysis
+            Formatted prompt string
         """
-        logger.info("Starting combined document analysis")
-
-        # Create the combined prompt
         template = self._get_combined_markdown_template()
 
         prompt = PromptTemplate(
@@ -579,21 +577,79 @@ Instructions: Use all available information, note gaps explicitly, provide secto
         )
 
         # Format the prompt with both documents
-        formatted_prompt = prompt.format(
+        return prompt.format(
             pitch_deck_content=pitch_deck_content,
             public_data_content=public_data_content
         )
 
+    def stream_combined_documents(self, pitch_deck_content: str, public_data_content: str) -> Iterator[str]:
+        """
+        Stream the combined business analysis as it is generated
+
+        Args:
+            pitch_deck_content: Content from pitch deck analysis
+            public_data_content: Content from public data scraping
+
+        Yields:
+            Markdown chunks of the business analysis
+        """
+        formatted_prompt = self._format_combined_prompt(pitch_deck_content, public_data_content)
+
+        if self.llm:
+            logger.info(f"Streaming prompt to LLM (length: {len(formatted_prompt)} characters)")
+            yield from self._stream_llm_call(formatted_prompt)
+        else:
+            # Mock response for testing
+            yield self._get_mock_combined_analysis()
+
+    def analyze_combined_documents(self,
+                                   pitch_deck_content: str,
+                                   public_data_content: str,
+                                   on_chunk: Optional[Callable[[str], None]] = None,
+                                   output_file: Optional[str] = None) -> str:
+        """
+        Analyze startup using both pitch deck and public data together
+
+        When on_chunk or output_file is given the analysis is streamed: each chunk
+        is passed to on_chunk and appended to output_file as soon as it arrives.
+        A streamed report missing required sections is regenerated and replaces
+        the streamed text in output_file.
+
+        Args:
+            pitch_deck_content: Content from pitch deck analysis
+            public_data_content: Content from public data scraping
+            on_chunk: Optional callback receiving each markdown chunk
+            output_file: Optional markdown file the analysis is appended to
+
+        Returns:
+            Markdown formatted business analysis
+        """
+        logger.info("Starting combined document analysis")
+
         try:
-            # Get response from LLM
-            if self.llm:
+            if on_chunk is not None or output_file is not None:
+                # The finished stream is validated too; an incomplete report is regenerated
+                result = self._consume_validated_stream(
+                    self.stream_combined_documents(pitch_deck_content, public_data_content),
+                    self._format_combined_prompt(pitch_deck_content, public_data_content),
+                    validate=has_sections("Executive Summary", "Information Gaps"),
+                    on_chunk=on_chunk,
+                    output_file=output_file
+                )
+            elif self.llm:
+                # Get response from LLM
+                formatted_prompt = self._format_combined_prompt(pitch_deck_content, public_data_content)
                 logger.info(f"Sending prompt to LLM (length: {len(formatted_prompt)} characters)")
-                response = self.llm.invoke(formatted_prompt)
-                if hasattr(response, 'content'):
-                    result = response.content
-                else:
-                    result = str(response)
+                # A report missing its first or last section escalates to a stronger model
+                result = self._execute_llm_call(
+                    formatted_prompt,
+                    validate=has_sections("Executive Summary", "Information Gaps")
+                )
+            else:
+                # Mock response for testing
+                result = self._get_mock_combined_analysis()
 
+            if self.llm:
                 # Check if the response seems truncated
                 if len(result) < 1000:
                     logger.warning(f"Analysis response is unusually short ({len(result)} characters). May be truncated due to token limits.")
@@ -601,9 +657,6 @@ Instructions: Use all available information, note gaps explicitly, provide secto
                     logger.warning("Analysis response appears to be truncated (doesn't end with proper punctuation)")
 
                 logger.info(f"Generated analysis: {len(result)} characters")
-            else:
-                # Mock response for testing
-                result = self._get_mock_combined_analysis()
 
             logger.info("Combined document analysis completed successfully")
             return result.strip()
@@ -17,6 +17,9 @@ from langchain_core.language_models import BaseLanguageModel
 from src.agents.base_agent import BaseAnalysisAgent, AnalysisError
 from src.models.final_memo_models import FinalMemoRequest, FinalMemoResult, FinalMemoConfig
 from src.utils.llm_manager import LLMManager
+from src.utils.token_budget import TokenBudgetPlanner
+from src.utils.model_router import TASK_FINAL_MEMO
+from config.settings import settings
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -30,6 +33,8 @@ class FinalMemoAgent(BaseAnalysisAgent):
     questionnaire responses to generate a comprehensive investment memo.
     """
     
+    task_type = TASK_FINAL_MEMO
+    
     def __init__(self, 
                  llm: Optional[BaseLanguageModel] = None,
                  config: Optional[FinalMemoConfig] = None,
@@ -130,27 +135,44 @@ class FinalMemoAgent(BaseAnalysisAgent):
         Returns:
             Formatted prompt string
         """
+        # Create the prompt using the template
+        prompt_template = self.get_analysis_prompt_template()
+        template_values = dict(
+            company_name=request.company_name,
+            include_executive_summary=self.config.include_executive_summary,
+            include_risk_assessment=self.config.include_risk_assessment,
+            include_recommendation=self.config.include_recommendation,
+            include_agent_breakdown=self.config.include_agent_breakdown,
+            max_words=self.config.max_memo_length
+        )
+        
+        # Fit agent analyses and founder responses into the token budget;
+        # higher-weighted agents keep more of their sections
+        planner = TokenBudgetPlanner(
+            model=getattr(self.llm, "model", None) or getattr(self.llm, "model_name", None)
+        )
+        overhead = prompt_template.format(agents_data="", founders_checklist="", **template_values)
+        budget = planner.budget_for(settings.TOKEN_BUDGET_FINAL_MEMO, overhead)
+        budget_inputs = {
+            f"agent:{agent.agent_name}": (agent.analysis, float(agent.weight))
+            for agent in request.agents
+        }
+        budget_inputs["founders_checklist"] = (request.founders_checklist_content, 50.0)
+        fitted = planner.allocate(budget_inputs, budget)
+        
         # Prepare agent analysis data
         agents_data = []
         for agent in request.agents:
             agents_data.append({
                 "agent_name": agent.agent_name,
                 "weight": agent.weight,
-                "analysis": agent.analysis[:3000]  # Limit to avoid token limits
+                "analysis": fitted[f"agent:{agent.agent_name}"]
             })
         
-        # Create the prompt using the template
-        prompt_template = self.get_analysis_prompt_template()
-        
         formatted_prompt = prompt_template.format(
-            company_name=request.company_name,
             agents_data=json.dumps(agents_data, indent=2),
-            founders_checklist=request.founders_checklist_content[:2000],  # Limit for tokens
-            include_executive_summary=self.config.include_executive_summary,
-            include_risk_assessment=self.config.include_risk_assessment,
-            include_recommendation=self.config.include_recommendation,
-            include_agent_breakdown=self.config.include_agent_breakdown,
-            max_words=self.config.max_memo_length
+            founders_checklist=fitted["founders_checklist"],
+            **template_values
         )
         
         return formatted_prompt
@@ -302,13 +324,13 @@ def create_final_memo_agent(config: Optional[FinalMemoConfig] = None) -> FinalMe
         Configured FinalMemoAgent instance
     """
     try:
-        from src.utils.llm_setup import create_custom_llm
+        from src.utils.llm_setup import create_llm_for_task
         
         # Get temperature from config
         temperature = config.temperature if config else 0.3
         
-        # Create LLM with the specified temperature
-        llm = create_custom_llm(temperature=temperature)
+        # Create LLM on the memo's routed model with the specified temperature
+        llm = create_llm_for_task(TASK_FINAL_MEMO, temperature=temperature)
         return FinalMemoAgent(llm=llm, config=config)
     except Exception as e:
         logger.warning(f"Failed to create LLM instance, using default: {e}")
@@ -24,6 +24,8 @@ from ..utils.founder_simulation_utils import (
 )
 from ..utils.llm_manager import LLMManager
 from ..utils.output_manager import OutputManager
+from ..utils.token_budget import TokenBudgetPlanner, BudgetInput
+from config.settings import settings
 
 
 class FounderSimulationAgent:
@@ -238,13 +240,15 @@ class FounderSimulationAgent:
         """
         content_parts = []
         
-        for doc in reference_docs:
-            # Limit content length to avoid context window issues
-            content = doc.content
-            if len(content) > 2000:  # Truncate very long documents
-                content = content[:2000] + "...[truncated]"
-            
-            content_parts.append(f"=== {doc.filename} ===\n{content}\n")
+        # Share the token budget across documents, trimming by markdown section
+        planner = TokenBudgetPlanner(model=self.llm_manager.gemini_model)
+        fitted = planner.allocate(
+            [BudgetInput(name=str(index), text=doc.content) for index, doc in enumerate(reference_docs)],
+            settings.TOKEN_BUDGET_FOUNDER_SIMULATION
+        )
+        
+        for index, doc in enumerate(reference_docs):
+            content_parts.append(f"=== {doc.filename} ===\n{fitted[str(index)]}\n")
         
         return "\n".join(content_parts)
     
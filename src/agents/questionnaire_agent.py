@@ -5,14 +5,14 @@ This agent processes all analysis reports from various agents and generates
 comprehensive questionnaire documents for founders to clarify investment gaps.
 """
 
-import time
-import random
 from datetime import datetime
 from pathlib import Path
 from typing import Optional
 
 from ..utils.llm_manager import LLMManager
 from ..utils.prompt_manager import PromptManager
+from ..utils.model_router import TASK_QUESTIONNAIRE, min_length
+from ..utils.retry_policy import RetryPolicy
 from ..utils.analysis_loader import load_analysis_reports, extract_company_name
 from ..models.questionnaire_models import (
     QuestionnaireConfig, 
@@ -171,36 +171,38 @@ class QuestionnaireAgent:
         """
         Generate questionnaire content with retry logic
         
+        Only transient provider errors (429, 5xx, timeouts) are retried, with
+        jittered backoff inside the request deadline. This policy owns the
+        retries for the whole call, so the LLM layer underneath does not add
+        its own.
+        
         Args:
             prompt: The formatted prompt for LLM
-            max_retries: Maximum number of retry attempts
+            max_retries: Maximum number of attempts
             
         Returns:
-            Generated questionnaire content or None if all retries fail
+            Generated questionnaire content or None if generation failed
         """
-        for attempt in range(max_retries):
-            try:
-                print(f"🔄 Generation attempt {attempt + 1}/{max_retries}")
-                
-                response = self.llm_manager.invoke_with_retry(prompt)
-                
-                if response and response.strip():
-                    print(f"✅ Generation successful on attempt {attempt + 1}")
-                    return response
-                else:
-                    print(f"⚠️ Empty response on attempt {attempt + 1}")
-                    
-            except Exception as e:
-                print(f"❌ Attempt {attempt + 1} failed: {e}")
-                
-                if attempt < max_retries - 1:
-                    # Exponential backoff with jitter
-                    sleep_time = (2 ** attempt) + random.uniform(0, 1)
-                    print(f"⏱️ Retrying in {sleep_time:.2f} seconds...")
-                    time.sleep(sleep_time)
-                else:
-                    print("❌ All retry attempts exhausted")
-                    
+        policy = RetryPolicy(
+            "questionnaire",
+            max_attempts=max_retries,
+            base_delay=self.llm_manager.retry_policy.base_delay
+        )
+        
+        try:
+            response = policy.call(
+                self.llm_manager.invoke_with_retry,
+                prompt, task=TASK_QUESTIONNAIRE, validate=min_length(500)
+            )
+        except Exception as e:
+            print(f"❌ Generation failed: {e}")
+            return None
+        
+        if response and response.strip():
+            print("✅ Generation successful")
+            return response
+        
+        print("⚠️ Empty response from model")
         return None
     
     def save_questionnaire(self, result: QuestionnaireResult, 
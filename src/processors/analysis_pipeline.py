@@ -44,15 +44,23 @@ class AnalysisPipeline:
     AI-Shark analysis pipeline for processing startup documents with multiple agents
     """
 
-    def __init__(self, company_dir: str, use_real_llm: bool = True):
+    def __init__(self,
+                 company_dir: str,
+                 use_real_llm: bool = True,
+                 stream_reports: bool = True,
+                 on_chunk: Optional[Callable[[str, str], None]] = None):
         """
         Initialize the analysis pipeline
 
         Args:
             company_dir: Path to the company's output directory (e.g., "outputs/company-name")
             use_real_llm: Whether to use real LLM API (defaults to True for production)
+            stream_reports: Whether to append agent reports to their files while they are generated
+            on_chunk: Optional callback receiving (agent_name, markdown_chunk) while streaming
         """
         self.use_real_llm = use_real_llm
+        self.stream_reports = stream_reports
+        self.on_chunk = on_chunk
         self.company_dir = Path(company_dir)
         self.analysis_dir = self.company_dir / "analysis"
         self.analysis_dir.mkdir(exist_ok=True)
@@ -350,14 +358,27 @@ class AnalysisPipeline:
                 if additional_content:
                     combined_public_content += "\n\n" + additional_content
                 
-                # Run combined analysis
-                markdown_analysis = agent.analyze_combined_documents(
-                    pitch_deck_content=pitch_deck_content,
-                    public_data_content=combined_public_content
-                )
+                # Run combined analysis, streaming the report to disk when supported
+                report_file = None
+                if self.stream_reports and self._supports_streaming(agent):
+                    report_file = self.analysis_dir / f"{agent_name}_analysis.md"
+                    markdown_analysis = self._run_streaming_analysis(
+                        agent_name, agent, report_file,
+                        pitch_deck_content=pitch_deck_content,
+                        public_data_content=combined_public_content
+                    )
+                else:
+                    markdown_analysis = agent.analyze_combined_documents(
+                        pitch_deck_content=pitch_deck_content,
+                        public_data_content=combined_public_content
+                    )
                 
                 processing_time = datetime.now() - start_time
                 
+                if report_file:
+                    with open(report_file, 'a', encoding='utf-8') as f:
+                        f.write(f"\n\n---\n\n**Processing Time:** {processing_time.total_seconds():.2f} seconds\n")
+                
                 # Store results
                 all_results[agent_name] = {
                     "agent_name": agent.agent_name,
@@ -365,6 +386,8 @@ class AnalysisPipeline:
                     "processing_time": processing_time.total_seconds(),
                     "analysis_type": f"{agent_name}_analysis"
                 }
+                if report_file:
+                    all_results[agent_name]["report_file"] = str(report_file)
                 
                 print(f"   ✅ {agent_name} analysis completed in {processing_time.total_seconds():.2f}s")
                 print(f"   📝 Generated report: {len(markdown_analysis)} characters")
@@ -388,6 +411,72 @@ class AnalysisPipeline:
         
         return all_results
 
+    @staticmethod
+    def _supports_streaming(agent: BaseAnalysisAgent) -> bool:
+        """Check whether an agent's combined analysis accepts streaming parameters"""
+        parameters = inspect.signature(agent.analyze_combined_documents).parameters
+        return "on_chunk" in parameters and "output_file" in parameters
+
+    def _build_report_header(self, agent_name: str, agent_display_name: str,
+                             analysis_type: str, processing_time: Optional[float] = None) -> str:
+        """
+        Build the markdown header of an agent report
+
+        Args:
+            agent_name: Pipeline key of the agent
+            agent_display_name: Agent's own name
+            analysis_type: Analysis type label
+            processing_time: Processing time in seconds, if already known
+
+        Returns:
+            Markdown header string
+        """
+        processing_line = f"**Processing Time:** {processing_time:.2f} seconds\n" if processing_time is not None else ""
+        return f"""# {agent_name.title()} Analysis Report
+
+**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**Analysis Engine:** AI-Shark Multi-Agent System
+**Agent:** {agent_display_name}
+{processing_line}**Analysis Type:** {analysis_type}
+
+## Company Analysis
+
+"""
+
+    def _run_streaming_analysis(self, agent_name: str, agent: BaseAnalysisAgent,
+                                report_file: Path, **document_contents) -> str:
+        """
+        Run an agent's combined analysis, appending the report to disk as it streams
+
+        Args:
+            agent_name: Pipeline key of the agent
+            agent: Agent instance
+            report_file: Report file, written with its header before generation starts
+            **document_contents: pitch_deck_content and public_data_content
+
+        Returns:
+            Complete markdown analysis
+        """
+        with open(report_file, 'w', encoding='utf-8') as f:
+            f.write(self._build_report_header(agent_name, agent.agent_name, f"{agent_name}_analysis"))
+
+        on_chunk = None
+        if self.on_chunk:
+            on_chunk = lambda chunk: self.on_chunk(agent_name, chunk)
+
+        print(f"   📡 Streaming report to: {report_file}")
+        try:
+            return agent.analyze_combined_documents(
+                on_chunk=on_chunk,
+                output_file=str(report_file),
+                **document_contents
+            )
+        except Exception as e:
+            # Leave the partial report in place, clearly marked as incomplete
+            with open(report_file, 'a', encoding='utf-8') as f:
+                f.write(f"\n\n---\n\n**Analysis failed before completion:** {e}\n")
+            raise
+
     def generate_agent_specific_reports(self, all_results: Dict[str, Any]) -> None:
         """
         Generate separate markdown reports for each agent
@@ -405,19 +494,16 @@ class AnalysisPipeline:
                 print(f"❌ Skipping {agent_name} - analysis failed")
                 continue
             
+            if result.get("report_file"):
+                print(f"📄 {agent_name} report already streamed to: {result['report_file']}")
+                successful_reports += 1
+                continue
+            
             try:
                 # Create report header
-                report_header = f"""# {agent_name.title()} Analysis Report
-
-**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-**Analysis Engine:** AI-Shark Multi-Agent System
-**Agent:** {result['agent_name']}
-**Processing Time:** {result['processing_time']:.2f} seconds
-**Analysis Type:** {result['analysis_type']}
-
-## Company Analysis
-
-"""
+                report_header = self._build_report_header(
+                    agent_name, result['agent_name'], result['analysis_type'], result['processing_time']
+                )
                 
                 # Combine header with LLM-generated analysis
                 full_report = report_header + result['markdown_analysis']
@@ -1,11 +1,11 @@
 import os
-import io
 import tempfile
 from pathlib import Path
 from typing import List
 from PIL import Image
 from pptx import Presentation
-import fitz  # PyMuPDF
+
+from src.utils.pdf_rasterizer import rasterize_pdf
 
 class FileConverter:
     """Handles file format conversions"""
@@ -128,18 +128,7 @@ class FileConverter:
             List of PIL Images representing pages
         """
         try:
-            doc = fitz.open(pdf_path)
-            images = []
-            
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap(dpi=150)
-                img_data = pix.tobytes("png")
-                image = Image.open(io.BytesIO(img_data))
-                images.append(image)
-            
-            doc.close()
-            return images
+            return rasterize_pdf(pdf_path)
             
         except Exception as e:
             print(f"Error converting PDF to images: {e}")
@@ -1,54 +1,113 @@
+import json
 import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Any, Optional
-from PIL import Image
+from typing import Callable, Dict, List, Any, Optional
 
 from src.processors.base_processor import BaseProcessor
 from src.processors.file_converter import FileConverter
+from config.settings import settings
 from src.utils.output_manager import OutputManager
 from src.utils.llm_manager import llm_manager
+from src.utils.deck_diff import diff_decks, page_states
+from src.utils.deck_index import get_deck_index
+from src.utils.deck_session import DeckSession, MODE_INLINE, open_deck_session
+from src.utils.page_classifier import PageText
+from src.utils.page_dedup import DedupResult, find_duplicates
+from src.utils.page_provider import PageProvider, file_hash, prune_render_cache
+from src.utils.pdf_rasterizer import stage_policy, STAGE_METADATA, STAGE_TOPIC
+from src.utils.toc_builder import local_metadata_or_none
+
+DECK_STATE_FILENAME = 'deck_state.json'
+TOPIC_ERROR_PREFIX = 'Error extracting data: '
+
 
 class PitchDeckProcessor(BaseProcessor):
     """Processes pitch deck files (PDF and PPT)"""
     
-    def __init__(self):
+    def __init__(self, on_topic_progress: Optional[Callable[[int, int, str], None]] = None):
+        """
+        Initialize the processor
+
+        Args:
+            on_topic_progress: Optional callback receiving (completed, total, topic) as topics
+                finish; it is called from the processing thread
+        """
         self.supported_extensions = ['.pdf', '.ppt', '.pptx']
+        self.on_topic_progress = on_topic_progress
     
     def get_supported_extensions(self) -> List[str]:
         """Return list of supported file extensions"""
         return self.supported_extensions
     
-    def process(self, file_path: str, output_dir: str = "outputs") -> Dict[str, Any]:
+    def process(self, file_path: str, output_dir: str = "outputs", force_refresh: bool = False) -> Dict[str, Any]:
         """
         Main processing logic for pitch decks
         
         Args:
             file_path: Path to the pitch deck file
             output_dir: Base output directory
+            force_refresh: Process the deck even if it was processed before
             
         Returns:
             Dictionary containing processing results and metadata
         """
+        session = None
+        provider = None
         try:
             print(f"Processing pitch deck: {file_path}")
             file_extension = Path(file_path).suffix.lower()
             
-            # Convert to images based on file type
+            # A deck processed before (same file bytes) is restored instead of processed again
+            fingerprint = file_hash(file_path) if settings.DECK_INDEX_ENABLED else None
+            if fingerprint and not force_refresh:
+                restored = self._restore_known_deck(fingerprint, output_dir)
+                if restored is not None:
+                    return restored
+            
+            # Open the document for lazy rendering; pages render at each stage's resolution when used
             if file_extension == '.pdf':
-                images = self._process_pdf(file_path)
+                provider = self._process_pdf(file_path)
             elif file_extension in ['.ppt', '.pptx']:
-                images = self._process_ppt(file_path)
+                provider = self._process_ppt(file_path)
             else:
                 raise ValueError(f"Unsupported file type: {file_extension}")
             
-            if not images:
+            if provider is None or not provider.page_count:
                 raise ValueError("Could not extract images from the file")
             
-            print(f"Successfully extracted {len(images)} pages/slides")
+            print(f"Successfully opened {provider.page_count} pages/slides")
+            
+            # Collapse repeated slides and drop blank slides before any LLM call (dividers only leave topic lists)
+            dedup = self._find_duplicates(provider)
+            kept_pages = dedup.kept_pages(provider.page_count)
+            
+            # A new version of a known deck is diffed slide by slide against the previous version
+            states = self._page_states(provider)
+            previous = None if force_refresh else self._previous_version(states)
+            deck_diff = diff_decks(states, previous['pages']) if previous else None
+            if deck_diff is not None:
+                print(f"New version of a processed deck: {deck_diff.summary()}")
             
             # Stage 1: Extract metadata including startup info and table of contents
             print("Stage 1: Extracting startup metadata and table of contents...")
-            metadata = self._extract_metadata(images)
+            metadata = None
+            if (deck_diff is not None and not deck_diff.added and 1 not in deck_diff.changed
+                    and previous.get('metadata')):
+                # No new slides and the same cover: keep the previous metadata with its TOC moved onto the new page numbers
+                metadata = {key: value for key, value in previous['metadata'].items() if key != 'page_dedup'}
+                metadata['table_of_contents'] = deck_diff.remap_toc(previous['metadata'].get('table_of_contents') or {})
+            if metadata is None and settings.TOC_LOCAL_ENABLED:
+                # Text-bearing decks get their metadata and TOC from the text layer, without a vision call
+                metadata = local_metadata_or_none(provider.page_texts())
+            if metadata is None:
+                metadata_pages = provider.pages(stage_policy(STAGE_METADATA))
+                metadata_pages.prefetch(kept_pages)
+                # One request at a lower resolution than the topic stage: uploading its pages would save nothing
+                with open_deck_session(metadata_pages, mode=MODE_INLINE) as metadata_session:
+                    metadata = self._extract_metadata(metadata_session, kept_pages)
             
             if not metadata:
                 raise ValueError("Could not extract metadata from the document")
@@ -64,15 +123,36 @@ class PitchDeckProcessor(BaseProcessor):
             # Get output file paths
             output_paths = OutputManager.get_output_paths(company_dir, 'pitch_deck')
             
-            # Save metadata
+            # Save metadata (with the dedup map, so page numbers can be traced back)
+            if settings.PAGE_DEDUP_ENABLED:
+                metadata['page_dedup'] = dedup.to_dict()
             OutputManager.save_json(metadata, output_paths['metadata'])
             
             # Stage 2: Topic-based extraction (if table of contents exists)
             extracted_data = {}
             if metadata.get('table_of_contents'):
                 print("Stage 2: Performing topic-based extraction...")
-                extracted_data = self._extract_topics(images, metadata['table_of_contents'])
+                toc = metadata['table_of_contents']
+                if isinstance(toc, dict):
+                    toc = dedup.remap_toc(toc)
+                # Topics whose slides are unchanged since the previous version keep their extraction
+                reused = {}
+                if deck_diff is not None and isinstance(toc, dict):
+                    reused = deck_diff.reusable_topics(toc, previous.get('toc') or {}, previous.get('topics') or {})
+                    print(f"Reusing {len(reused)} of {len(toc)} topics from the previous version")
+                pending_toc = {topic: pages for topic, pages in toc.items() if topic not in reused} if isinstance(toc, dict) else toc
+                page_texts = provider.page_texts() if settings.PAGE_TEXT_FAST_PATH_ENABLED else []
+                text_pages = {page.page_number for page in page_texts if page.text_dominant}
+                vision_pages = [n for n in self._toc_pages(pending_toc) if n not in text_pages]
+                print(f"Topic pages: {len(vision_pages)} sent as images, "
+                      f"{len(self._toc_pages(pending_toc)) - len(vision_pages)} as extracted text")
+                topic_pages = provider.pages(stage_policy(STAGE_TOPIC))
+                topic_pages.prefetch(vision_pages)
+                # Image pages are uploaded once and referenced by every topic call
+                session = open_deck_session(topic_pages, page_numbers=vision_pages)
+                extracted_data = self._extract_topics(session, toc, page_texts, reused)
             else:
+                toc = {}
                 print("No table of contents found, skipping topic-based extraction")
             
             # Convert to markdown and save
@@ -87,6 +167,15 @@ class PitchDeckProcessor(BaseProcessor):
             if metadata.get('table_of_contents'):
                 created_files.append(output_paths['toc'])
             
+            # Slide states and topic extractions let the next version of this deck be processed incrementally
+            state_path = os.path.join(company_dir, DECK_STATE_FILENAME)
+            OutputManager.save_json({
+                'pages': states,
+                'metadata': metadata,
+                'toc': toc,
+                'topics': extracted_data
+            }, state_path)
+            
             result = {
                 'status': 'success',
                 'company_name': company_name,
@@ -131,6 +220,17 @@ class PitchDeckProcessor(BaseProcessor):
                         'total_extractors': 0
                     }
             
+            # Only complete results are indexed, so a re-upload never restores a degraded snapshot
+            failed_topics = self._failed_topics(toc, extracted_data)
+            public_data_status = result.get('public_data_extraction', {}).get('status')
+            if fingerprint and not failed_topics and public_data_status == 'success':
+                get_deck_index().record(fingerprint, company_name, result['files_created'] + [state_path],
+                                        Path(file_path).name, [state['hash'] for state in states],
+                                        public_data_extraction=result['public_data_extraction'])
+            elif fingerprint:
+                print(f"Not indexing deck for restore: {len(failed_topics)} topics failed, "
+                      f"public data extraction status {public_data_status}")
+            
             return result
             
         except Exception as e:
@@ -142,70 +242,210 @@ class PitchDeckProcessor(BaseProcessor):
                 'output_dir': None,
                 'files_created': []
             }
+        finally:
+            if session is not None:
+                session.close()
+            if provider is not None:
+                provider.close()
+    
+    def _page_states(self, provider: PageProvider) -> List[Dict[str, Any]]:
+        """Per-page content hashes and text for version diffing (empty when unavailable)"""
+        if not settings.DECK_INCREMENTAL_ENABLED:
+            return []
+        try:
+            return page_states(provider.page_fingerprints(), provider.page_texts())
+        except Exception as e:
+            print(f"Could not compute page states, processing the full deck: {e}")
+            return []
+    
+    def _previous_version(self, states: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Load the saved state of the previous version of this deck, or None"""
+        if not states or not settings.DECK_INDEX_ENABLED:
+            return None
+        try:
+            deck_index = get_deck_index()
+            match = deck_index.find_previous_version([state['hash'] for state in states])
+            if match is None:
+                return None
+            with open(deck_index.snapshot_file(match[0], DECK_STATE_FILENAME), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Could not load the previous deck version, processing the full deck: {e}")
+            return None
+    
+    def _restore_known_deck(self, fingerprint: str, output_dir: str) -> Optional[Dict[str, Any]]:
+        """Restore the outputs of a previously processed deck, or None if the deck is unknown"""
+        try:
+            restored = get_deck_index().restore(fingerprint, output_dir)
+            if restored is None:
+                return None
+            metadata_path = OutputManager.get_output_paths(restored['output_dir'], 'pitch_deck')['metadata']
+            with open(metadata_path, 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        except Exception as e:
+            print(f"Could not restore previously processed deck, processing it again: {e}")
+            return None
+        
+        print(f"Deck already processed, restored outputs for {restored['company_name']}")
+        return {
+            'status': 'success',
+            'company_name': restored['company_name'],
+            'output_dir': restored['output_dir'],
+            'files_created': restored['files_created'],
+            'metadata': metadata,
+            'public_data_extraction': restored['public_data_extraction'],
+            'cached': True,
+            'deck_fingerprint': fingerprint
+        }
     
-    def _process_pdf(self, pdf_path: str) -> List[Image.Image]:
-        """Process PDF pitch deck using LLM manager"""
-        return llm_manager.pdf_to_images(pdf_path)
+    def _failed_topics(self, toc: Any, extracted_data: Dict[str, Any]) -> List[str]:
+        """Topics of the table of contents that have no extraction or whose extraction failed"""
+        if not isinstance(toc, dict):
+            return []
+        return [topic for topic in toc
+                if topic not in extracted_data or str(extracted_data[topic]).startswith(TOPIC_ERROR_PREFIX)]
     
-    def _process_ppt(self, ppt_path: str) -> List[Image.Image]:
-        """Process PPT by converting to images"""
+    def _process_pdf(self, pdf_path: str, temporary: bool = False) -> Optional[PageProvider]:
+        """Open a PDF for lazy page rendering (temporary PDFs are deleted when the provider closes)"""
+        try:
+            prune_render_cache()
+            return PageProvider(pdf_path, delete_on_close=temporary)
+        except Exception as e:
+            print(f"Error opening PDF: {e}")
+            if temporary and os.path.exists(pdf_path):
+                os.unlink(pdf_path)
+            return None
+    
+    def _process_ppt(self, ppt_path: str) -> Optional[PageProvider]:
+        """Process PPT by converting to a PDF that is kept until processing ends"""
         # Try PDF conversion first
         pdf_path = FileConverter.ppt_to_pdf(ppt_path)
         if pdf_path and os.path.exists(pdf_path):
-            try:
-                images = llm_manager.pdf_to_images(pdf_path)
-                os.unlink(pdf_path)  # Clean up temporary PDF
-                return images
-            except Exception as e:
-                print(f"Error processing converted PDF: {e}")
-                if os.path.exists(pdf_path):
-                    os.unlink(pdf_path)
+            provider = self._process_pdf(pdf_path, temporary=True)
+            if provider is not None:
+                return provider
         
-        # Fallback: direct PPT to images
-        return FileConverter.ppt_to_images(ppt_path)
+        # Fallback: direct PPT to images, collected into a PDF so pages are served the same way
+        images = FileConverter.ppt_to_images(ppt_path)
+        if not images:
+            return None
+        fd, pdf_path = tempfile.mkstemp(suffix=".pdf")
+        os.close(fd)
+        images = [image.convert("RGB") for image in images]
+        images[0].save(pdf_path, format="PDF", save_all=True, append_images=images[1:])
+        return self._process_pdf(pdf_path, temporary=True)
+    
+    def _toc_pages(self, toc: Dict[str, Any]) -> List[int]:
+        """Page numbers referenced by a table of contents"""
+        if not isinstance(toc, dict):
+            return []
+        return sorted({page for pages in toc.values() if isinstance(pages, list)
+                       for page in pages if isinstance(page, int)})
     
-    def _extract_metadata(self, images: List[Image.Image]) -> Optional[Dict[str, Any]]:
+    def _extract_metadata(self, session: DeckSession, page_numbers: Optional[List[int]] = None) -> Optional[Dict[str, Any]]:
         """
         Stage 1: Extract startup_name, sector, sub-sector, website, and table of contents
         """
-        return llm_manager.extract_metadata(images)
+        return llm_manager.extract_metadata(session.pages(page_numbers))
     
-    def _extract_topics(self, images: List[Image.Image], toc: Dict[str, List[int]]) -> Dict[str, Any]:
-        """Stage 2: Topic-based content extraction"""
+    def _find_duplicates(self, provider: PageProvider) -> DedupResult:
+        """Find duplicate, blank and divider pages (an empty result when dedup is disabled or fails)"""
+        if not settings.PAGE_DEDUP_ENABLED:
+            return DedupResult()
+        try:
+            return find_duplicates(provider.page_fingerprints(), provider.page_texts())
+        except Exception as e:
+            print(f"Page deduplication failed, keeping every page: {e}")
+            return DedupResult()
+    
+    def _extract_topics(self,
+                        session: DeckSession,
+                        toc: Dict[str, List[int]],
+                        page_texts: Optional[List[PageText]] = None,
+                        reused: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Stage 2: Topic-based content extraction (text-dominant pages are sent as their text layer;
+        topics in `reused` keep their previous extraction)
+        """
         if not toc or not isinstance(toc, dict):
             print("Invalid table of contents format")
             return {}
         
-        extracted_data = {}
+        text_parts = {page.page_number: page.to_part() for page in page_texts or [] if page.text_dominant}
+        results = {}
+        completed = 0
+        for topic in toc:
+            if topic in (reused or {}):
+                results[topic] = reused[topic]
+                completed += 1
+                self._report_topic_progress(completed, len(toc), topic)
         
+        # Batched mode extracts several topics per request; the rest fall back to one call each
+        pending_toc = {topic: pages for topic, pages in toc.items() if topic not in results}
+        if settings.TOPIC_EXTRACTION_MODE == "batched" and pending_toc:
+            deck_parts = [text_parts.get(page.page_number, page) for page in session.pages()]
+            batched = llm_manager.extract_topics_batch(deck_parts, pending_toc)
+            print(f"Batched extraction returned {len(batched)} of {len(pending_toc)} topics")
+            for topic in pending_toc:
+                if topic in batched:
+                    results[topic] = batched[topic]
+                    completed += 1
+                    self._report_topic_progress(completed, len(toc), topic)
+        
+        jobs = {}
         for topic, page_nums in toc.items():
+            if topic in results:
+                continue
+            
             if not isinstance(page_nums, list) or not page_nums:
                 print(f"Skipping topic '{topic}' - invalid page numbers: {page_nums}")
                 continue
-                
-            print(f"Extracting topic: '{topic}' from pages {page_nums}")
             
-            # Get images for specific pages (adjusting for 0-based index)
-            topic_images = []
+            # Reference the session's pages for this topic (page numbers are 1-based)
             for page_num in page_nums:
-                if isinstance(page_num, int) and 0 < page_num <= len(images):
-                    topic_images.append(images[page_num - 1])
-                else:
+                if not (isinstance(page_num, int) and 0 < page_num <= len(session)):
                     print(f"Warning: Page number {page_num} out of range for topic '{topic}'")
+            topic_images = [text_parts.get(page.page_number, page) for page in session.pages(page_nums)]
             
             if topic_images:
-                try:
-                    topic_data = llm_manager.extract_topic_data(topic, topic_images)
-                    extracted_data[topic] = topic_data
-                    print(f"Successfully extracted data for topic '{topic}'")
-                except Exception as e:
-                    print(f"Error extracting data for topic '{topic}': {e}")
-                    extracted_data[topic] = f"Error extracting data: {e}"
+                jobs[topic] = topic_images
             else:
                 print(f"No valid images found for topic '{topic}'")
         
+        # Topics are independent: extract them concurrently (requests share the rate limiter)
+        if jobs:
+            started = time.monotonic()
+            workers = max(1, min(settings.TOPIC_EXTRACTION_WORKERS, len(jobs)))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {}
+                for topic, topic_images in jobs.items():
+                    print(f"Extracting topic: '{topic}' from pages {toc[topic]}")
+                    futures[executor.submit(llm_manager.extract_topic_data, topic, topic_images)] = topic
+                for future in as_completed(futures):
+                    topic = futures[future]
+                    try:
+                        results[topic] = future.result()
+                        print(f"Successfully extracted data for topic '{topic}'")
+                    except Exception as e:
+                        print(f"Error extracting data for topic '{topic}': {e}")
+                        results[topic] = f"{TOPIC_ERROR_PREFIX}{e}"
+                    completed += 1
+                    self._report_topic_progress(completed, len(toc), topic)
+            print(f"Extracted {len(jobs)} topics on {workers} workers in {time.monotonic() - started:.1f}s")
+        
+        # Keep the table of contents order
+        extracted_data = {topic: results[topic] for topic in toc if topic in results}
         return extracted_data
     
+    def _report_topic_progress(self, completed: int, total: int, topic: str) -> None:
+        """Notify the progress callback; callback errors never fail the extraction"""
+        if self.on_topic_progress is None:
+            return
+        try:
+            self.on_topic_progress(completed, total, topic)
+        except Exception as e:
+            print(f"Topic progress callback failed: {e}")
+    
     def _convert_to_markdown(self, extracted_data: Dict[str, Any], metadata: Dict[str, Any]) -> str:
         """Convert extracted data to markdown format"""
         markdown_content = []
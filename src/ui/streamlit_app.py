@@ -1,6 +1,7 @@
 import streamlit as st
 import os
 import tempfile
+import time
 from pathlib import Path
 from typing import Dict, Any
 
@@ -15,6 +16,9 @@ from src.utils.output_manager import OutputManager
 from src.utils.docx_converter import convert_founders_checklist_to_docx, is_docx_conversion_available
 from src.utils.pdf_generator import convert_markdown_to_pdf, is_pdf_generation_available
 
+# Live reports are re-rendered at most this often (each render re-parses the whole report)
+LIVE_REPORT_REFRESH_SECONDS = 1.0
+
 def main():
     """Main Streamlit application"""
     st.set_page_config(
@@ -77,9 +81,10 @@ def pitch_deck_section():
         for key, value in file_details.items():
             st.write(f"- **{key}:** {value}")
         
-        # Process button
+        # Process button (decks processed before are restored unless a refresh is forced)
+        force_refresh = st.checkbox("Reprocess even if this deck was processed before", key="force_refresh_pitch_deck")
         if st.button("🚀 Process Pitch Deck", type="primary", key="process_pitch_deck"):
-            process_pitch_deck(uploaded_file)
+            process_pitch_deck(uploaded_file, force_refresh=force_refresh)
 
 def additional_docs_section():
     """Additional documents upload section"""
@@ -172,8 +177,21 @@ def run_analysis(company_name: str, company_dir: str):
             status_text.text("Initializing analysis pipeline...")
             progress_bar.progress(10)
             
+            # Render agent reports live while they are streamed
+            live_output = st.empty()
+            streamed_text = {}
+            last_render = {'agent': None, 'time': 0.0}
+            
+            def show_chunk(agent_name: str, chunk: str):
+                streamed_text.setdefault(agent_name, []).append(chunk)
+                now = time.monotonic()
+                if last_render['agent'] == agent_name and now - last_render['time'] < LIVE_REPORT_REFRESH_SECONDS:
+                    return
+                last_render.update(agent=agent_name, time=now)
+                live_output.markdown(f"**{agent_name.title()} analysis (live):**\n\n{''.join(streamed_text[agent_name])}")
+            
             # Initialize the analysis pipeline
-            pipeline = AnalysisPipeline(company_dir=company_dir, use_real_llm=True)
+            pipeline = AnalysisPipeline(company_dir=company_dir, use_real_llm=True, on_chunk=show_chunk)
             
             status_text.text("Discovering and initializing AI agents...")
             progress_bar.progress(25)
@@ -190,6 +208,7 @@ def run_analysis(company_name: str, company_dir: str):
             
             progress_bar.progress(100)
             status_text.text("Analysis complete!")
+            live_output.empty()
             
             # Update session state
             if results:
@@ -230,7 +249,7 @@ def run_analysis(company_name: str, company_dir: str):
                 'error': str(e)
             }
 
-def process_pitch_deck(uploaded_file):
+def process_pitch_deck(uploaded_file, force_refresh: bool = False):
     """Process uploaded pitch deck"""
     with st.spinner("🔄 Processing pitch deck... This may take a few minutes."):
         try:
@@ -245,12 +264,16 @@ def process_pitch_deck(uploaded_file):
             progress_bar.progress(25)
             
             # Process using PitchDeckProcessor
-            processor = PitchDeckProcessor()
+            def on_topic_progress(completed: int, total: int, topic: str):
+                status_text.text(f"Extracted topic {completed}/{total}: {topic}")
+                progress_bar.progress(50 + int(25 * completed / max(total, 1)))
+            
+            processor = PitchDeckProcessor(on_topic_progress=on_topic_progress)
             
             status_text.text("Extracting metadata and table of contents...")
             progress_bar.progress(50)
             
-            result = processor.process(temp_path, "outputs")
+            result = processor.process(temp_path, "outputs", force_refresh=force_refresh)
             
             status_text.text("Performing topic-based extraction...")
             progress_bar.progress(75)
@@ -267,6 +290,8 @@ def process_pitch_deck(uploaded_file):
                 st.session_state.company_name = result.get('company_name')
                 
                 st.success(f"✅ Pitch deck processed successfully!")
+                if result.get('cached'):
+                    st.info("♻️ This deck was processed before; its outputs were restored")
                 st.info(f"**Company:** {result['company_name']}")
                 st.info(f"**Output Directory:** {result['output_dir']}")
                 
@@ -0,0 +1,223 @@
+"""
+Per-Provider Circuit Breakers for AI Shark LLM Calls
+
+A breaker opens after a number of consecutive provider failures (429, 5xx,
+timeouts, connection errors) within a time window. While it is open, calls to
+that provider fail fast so callers can fail over instead of sitting through
+backoff rounds. After a recovery timeout the breaker lets a probe request
+through (half-open); a successful probe closes it again.
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Exception class names raised by the Google and Groq SDKs for provider-side trouble
+_PROVIDER_FAILURE_TYPES = {
+    "ResourceExhausted", "TooManyRequests", "ServiceUnavailable", "InternalServerError",
+    "DeadlineExceeded", "GatewayTimeout", "BadGateway", "ServerError", "Aborted",
+    "RateLimitError", "APIConnectionError", "APITimeoutError",
+    "Timeout", "TimeoutError", "ConnectionError", "ReadTimeout", "ConnectTimeout",
+}
+# Status codes only count as a status: leading the message ("503 The model is overloaded")
+# or after status/code/HTTP/error ("HTTP 502"), never as any number such as "max_tokens 500"
+_PROVIDER_FAILURE_STATUS = re.compile(r"(?:^|\b(?:status|code|http|error)\b[\s:=]*)(?:429|5\d\d)\b", re.IGNORECASE)
+_PROVIDER_FAILURE_MARKERS = (
+    "rate limit", "quota", "resource exhausted", "service unavailable", "overloaded",
+    "timed out", "read timeout", "connect timeout", "deadline exceeded",
+    "connection error", "connection reset", "connection refused", "connection aborted", "failed to connect",
+)
+
+
+class CircuitBreakerOpenError(Exception):
+    """Raised when a call is rejected because the provider's circuit is open"""
+    pass
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    Decide whether an exception indicates the provider is unhealthy
+
+    Client errors such as invalid arguments or safety blocks are not counted.
+
+    Args:
+        error: Exception raised by an LLM call
+
+    Returns:
+        True for rate limiting, server errors, timeouts and connection failures
+    """
+    if isinstance(error, CircuitBreakerOpenError):
+        return False
+
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+
+    for cls in type(error).__mro__:
+        if cls.__name__ in _PROVIDER_FAILURE_TYPES:
+            return True
+
+    message = str(error).strip().lower()
+    return bool(_PROVIDER_FAILURE_STATUS.search(message)) or any(marker in message for marker in _PROVIDER_FAILURE_MARKERS)
+
+
+class CircuitBreaker:
+    """
+    Thread-safe closed/open/half-open circuit breaker
+    """
+
+    def __init__(self,
+                 name: str,
+                 failure_threshold: Optional[int] = None,
+                 window_seconds: Optional[float] = None,
+                 recovery_timeout: Optional[float] = None,
+                 half_open_max_calls: int = 1):
+        """
+        Initialize the breaker
+
+        Args:
+            name: Name used in logs and statistics (usually the provider)
+            failure_threshold: Consecutive failures within the window that open the circuit
+            window_seconds: Window in which the consecutive failures must occur
+            recovery_timeout: Seconds the circuit stays open before a probe is allowed
+            half_open_max_calls: Concurrent probe requests allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD
+        self.window_seconds = window_seconds or settings.CIRCUIT_BREAKER_WINDOW_SECONDS
+        self.recovery_timeout = recovery_timeout or settings.CIRCUIT_BREAKER_RECOVERY_SECONDS
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failure_times = []
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._probe_started_at = 0.0
+
+        # Statistics
+        self.rejected_calls = 0
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        """Current state, moving open -> half-open once the recovery timeout has passed"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def _maybe_half_open(self, now: float) -> None:
+        if self._state == OPEN and now - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            logger.info(f"Circuit '{self.name}' half-open, probing provider")
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go to the provider now
+
+        While half-open, only a limited number of probe calls are admitted.
+
+        Returns:
+            True if the call may proceed
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN:
+                # A probe that never reported back (e.g. an abandoned stream) must not block recovery
+                if self._probes_in_flight and now - self._probe_started_at >= self.recovery_timeout:
+                    self._probes_in_flight = 0
+                if self._probes_in_flight < self.half_open_max_calls:
+                    self._probes_in_flight += 1
+                    self._probe_started_at = now
+                    return True
+            self.rejected_calls += 1
+            return False
+
+    def record_success(self) -> None:
+        """Record a call the provider answered; closes a half-open circuit"""
+        with self._lock:
+            if self._state != CLOSED:
+                logger.info(f"Circuit '{self.name}' closed, provider recovered")
+            self._state = CLOSED
+            self._failure_times.clear()
+            self._probes_in_flight = 0
+
+    def record_failure(self) -> None:
+        """Record a provider failure; may open the circuit"""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._open(now)
+                return
+
+            self._failure_times = [t for t in self._failure_times if now - t <= self.window_seconds]
+            self._failure_times.append(now)
+            if self._state == CLOSED and len(self._failure_times) >= self.failure_threshold:
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        self._state = OPEN
+        self._opened_at = now
+        self._failure_times.clear()
+        self._probes_in_flight = 0
+        self.times_opened += 1
+        logger.warning(f"Circuit '{self.name}' opened; failing fast for {self.recovery_timeout:.0f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and counters"""
+        state = self.state
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": state,
+                "recent_failures": len(self._failure_times),
+                "failure_threshold": self.failure_threshold,
+                "times_opened": self.times_opened,
+                "rejected_calls": self.rejected_calls
+            }
+
+
+# Process-wide breaker registry keyed by provider
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(provider: str) -> CircuitBreaker:
+    """
+    Get the process-wide circuit breaker for a provider
+
+    Args:
+        provider: LLM provider ("google" or "groq")
+
+    Returns:
+        Shared CircuitBreaker instance
+    """
+    key = provider.lower()
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(key)
+            if breaker is None:
+                breaker = CircuitBreaker(key)
+                _breakers[key] = breaker
+    return breaker
+
+
+def get_all_circuit_breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """Get statistics for every breaker created in this process"""
+    return {name: breaker.get_stats() for name, breaker in list(_breakers.items())}
@@ -0,0 +1,140 @@
+"""
+Shared Model Client Registry for AI Shark
+
+Long-lived genai GenerativeModel and LangChain chat model instances, keyed by
+(kind, provider, model, params) and shared by every component. Clients keep
+their transport (gRPC channel / HTTP connection pool) between calls, so the
+high-volume paths stop paying per-call client setup and TLS handshakes.
+
+The registry also owns genai configuration: configuring with the same key
+again is a no-op, because genai.configure drops every cached transport.
+"""
+
+import logging
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import google.generativeai as genai
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+KIND_GENAI = "genai"
+KIND_LANGCHAIN = "langchain"
+
+
+def _params_key(params: Dict[str, Any]) -> str:
+    """Stable key for client parameters (values may be unhashable)"""
+    return repr(sorted(params.items()))
+
+
+class ClientRegistry:
+    """
+    Thread-safe registry of reusable model clients
+    """
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, str, str, str], Any] = {}
+        self._genai_api_key: Optional[str] = None
+
+        # Statistics
+        self.created = 0
+        self.reused = 0
+
+    def configure_genai(self, api_key: str) -> None:
+        """
+        Configure the genai SDK, skipping the call if the key is unchanged
+
+        Args:
+            api_key: Google API key
+        """
+        with self._lock:
+            if api_key == self._genai_api_key:
+                return
+            genai.configure(api_key=api_key)
+            # Models created under the old configuration hold stale clients
+            self._clients = {key: client for key, client in self._clients.items() if key[0] != KIND_GENAI}
+            self._genai_api_key = api_key
+        logger.info("Gemini API configured successfully")
+
+    @property
+    def genai_configured(self) -> bool:
+        """Whether configure_genai has been called"""
+        return self._genai_api_key is not None
+
+    def get_or_create(self,
+                      kind: str,
+                      provider: str,
+                      model_name: str,
+                      factory: Callable[[], Any],
+                      **params: Any) -> Any:
+        """
+        Get the shared client for a key, creating it on first use
+
+        Args:
+            kind: Client kind (KIND_GENAI or KIND_LANGCHAIN)
+            provider: LLM provider
+            model_name: Model name
+            factory: Callable building the client
+            **params: Construction parameters that distinguish clients
+
+        Returns:
+            Shared client instance
+        """
+        key = (kind, provider, model_name, _params_key(params))
+        client = self._clients.get(key)
+        if client is not None:
+            self.reused += 1
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = factory()
+                self._clients[key] = client
+                self.created += 1
+                logger.debug(f"Created {kind} client for {provider}/{model_name}")
+            else:
+                self.reused += 1
+        return client
+
+    def generative_model(self, model_name: str, **params: Any) -> genai.GenerativeModel:
+        """
+        Get the shared genai GenerativeModel for a model and parameters
+
+        Args:
+            model_name: Gemini model name
+            **params: GenerativeModel keyword arguments (generation_config, system_instruction, ...)
+
+        Returns:
+            Shared GenerativeModel instance
+        """
+        return self.get_or_create(
+            KIND_GENAI, "google", model_name,
+            lambda: genai.GenerativeModel(model_name, **params),
+            **params
+        )
+
+    def clear(self) -> None:
+        """Drop every cached client"""
+        with self._lock:
+            self._clients.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cached client count and creation/reuse counters"""
+        return {
+            "clients": len(self._clients),
+            "created": self.created,
+            "reused": self.reused
+        }
+
+
+# Global instance
+client_registry = ClientRegistry()
+
+
+def get_client_registry() -> ClientRegistry:
+    """Get the process-wide client registry"""
+    return client_registry
@@ -0,0 +1,120 @@
+"""
+Shared LLM Connection Health Cache for AI Shark
+
+Connection tests are real generation requests, so their results are cached
+per provider for a TTL and shared by every component. Concurrent callers of
+the same provider wait for a single probe instead of issuing their own.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import settings
+from src.utils.circuit_breaker import get_circuit_breaker, OPEN
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Failed checks are re-probed sooner so recovery is noticed quickly
+FAILURE_TTL_SECONDS = 30
+
+
+class ConnectionHealthCache:
+    """
+    TTL cache of connection test results keyed by provider
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the health cache
+
+        Args:
+            ttl_seconds: How long a successful check stays valid (defaults to settings)
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_HEALTH_CHECK_TTL_SECONDS
+        self._lock = threading.Lock()
+        self._probe_locks: Dict[str, threading.Lock] = {}
+        self._results: Dict[str, tuple] = {}  # provider -> (healthy, checked_at)
+
+        # Statistics
+        self.probes = 0
+        self.cached_answers = 0
+
+    def _fresh_result(self, provider: str) -> Optional[bool]:
+        entry = self._results.get(provider)
+        if entry is None:
+            return None
+        healthy, checked_at = entry
+        ttl = self.ttl_seconds if healthy else min(self.ttl_seconds, FAILURE_TTL_SECONDS)
+        if time.monotonic() - checked_at > ttl:
+            return None
+        return healthy
+
+    def check(self, provider: str, probe: Callable[[], bool], force: bool = False) -> bool:
+        """
+        Get the provider's health, running the probe only if no fresh result exists
+
+        An open circuit breaker answers "unhealthy" without probing.
+
+        Args:
+            provider: LLM provider ("google" or "groq")
+            probe: Callable performing the real connection test
+            force: Ignore any cached result
+
+        Returns:
+            True if the provider is reachable
+        """
+        if get_circuit_breaker(provider).state == OPEN:
+            return False
+
+        if not force:
+            cached = self._fresh_result(provider)
+            if cached is not None:
+                self.cached_answers += 1
+                return cached
+
+        with self._lock:
+            probe_lock = self._probe_locks.setdefault(provider, threading.Lock())
+
+        with probe_lock:
+            # Another caller may have finished the probe while we waited
+            if not force:
+                cached = self._fresh_result(provider)
+                if cached is not None:
+                    self.cached_answers += 1
+                    return cached
+
+            self.probes += 1
+            try:
+                healthy = bool(probe())
+            except Exception as e:
+                logger.error(f"Connection probe for '{provider}' failed: {e}")
+                healthy = False
+            self._results[provider] = (healthy, time.monotonic())
+            return healthy
+
+    def invalidate(self, provider: Optional[str] = None) -> None:
+        """Forget cached results for one provider, or for all of them"""
+        with self._lock:
+            if provider is None:
+                self._results.clear()
+            else:
+                self._results.pop(provider, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cached health results and probe counters"""
+        now = time.monotonic()
+        return {
+            "results": {
+                provider: {"healthy": healthy, "age_seconds": round(now - checked_at, 1)}
+                for provider, (healthy, checked_at) in list(self._results.items())
+            },
+            "probes": self.probes,
+            "cached_answers": self.cached_answers
+        }
+
+
+# Process-wide instance shared by every LLM client
+connection_health = ConnectionHealthCache()
@@ -0,0 +1,194 @@
+"""
+Slide-Level Deck Diffing for AI Shark
+
+Founders send new versions of a deck with a handful of slides changed. Each
+page is summarized as a state: a content hash (perceptual hashes plus the
+normalized text layer), the perceptual hashes themselves and the text. A new
+version is diffed against the previous version of the same deck:
+
+    unchanged - same content hash as a page of the previous version
+    changed   - no identical page, but similar enough to one (text-layer
+                similarity, or perceptual similarity for pages without text)
+    added     - no similar page in the previous version
+
+The page map lets the previous table of contents be remapped onto the new
+page numbers and decides which topics can keep their previous extraction:
+only topics whose pages are all unchanged and cover the same slides as
+before are reused.
+"""
+
+import difflib
+import hashlib
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from config.settings import settings
+from src.utils.page_classifier import PageText
+from src.utils.page_dedup import PageFingerprint, hamming
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+HASH_BITS = 64
+
+
+def page_states(fingerprints: Sequence[PageFingerprint], page_texts: Optional[Sequence[PageText]] = None) -> List[Dict[str, Any]]:
+    """
+    Summarize every page for diffing
+
+    Args:
+        fingerprints: PageFingerprint per page
+        page_texts: PageText per page (optional)
+
+    Returns:
+        JSON-serializable state per page, in page order
+    """
+    texts = {page.page_number: page.text for page in page_texts or []}
+    states = []
+    for fingerprint in fingerprints:
+        text = " ".join(texts.get(fingerprint.page_number, "").split())
+        content = f"{fingerprint.ahash:016x}{fingerprint.dhash:016x}|{text}"
+        states.append({
+            "page_number": fingerprint.page_number,
+            "hash": hashlib.sha256(content.encode("utf-8")).hexdigest(),
+            "ahash": fingerprint.ahash,
+            "dhash": fingerprint.dhash,
+            "text": text
+        })
+    return states
+
+
+def _similarity(new: Dict[str, Any], old: Dict[str, Any]) -> float:
+    """Text-layer similarity of two pages, or perceptual similarity when either has no text"""
+    if new["text"] and old["text"]:
+        return difflib.SequenceMatcher(None, new["text"], old["text"]).ratio()
+    distance = hamming(new["ahash"], old["ahash"]) + hamming(new["dhash"], old["dhash"])
+    return 1.0 - distance / (2 * HASH_BITS)
+
+
+@dataclass
+class DeckDiff:
+    """
+    Page correspondence between a new deck version and the previous one
+    """
+    page_map: Dict[int, int] = field(default_factory=dict)  # new page -> previous page (unchanged or changed)
+    changed: List[int] = field(default_factory=list)  # new pages whose content differs from their previous page
+    added: List[int] = field(default_factory=list)  # new pages without a previous counterpart
+    removed: List[int] = field(default_factory=list)  # previous pages without a new counterpart
+
+    @property
+    def unchanged(self) -> List[int]:
+        changed = set(self.changed)
+        return sorted(n for n in self.page_map if n not in changed)
+
+    def summary(self) -> str:
+        return (f"{len(self.unchanged)} unchanged, {len(self.changed)} changed, "
+                f"{len(self.added)} added, {len(self.removed)} removed slides")
+
+    def remap_toc(self, previous_toc: Dict[str, Any]) -> Dict[str, List[int]]:
+        """
+        Move a previous table of contents onto the new page numbers
+
+        Pages that were removed are dropped, and so are topics left without pages.
+
+        Args:
+            previous_toc: Topic -> previous page numbers
+
+        Returns:
+            Topic -> new page numbers
+        """
+        new_pages = {old: new for new, old in self.page_map.items()}
+        toc = {}
+        for topic, pages in previous_toc.items():
+            if not isinstance(pages, list):
+                continue
+            mapped = sorted({new_pages[n] for n in pages if n in new_pages})
+            if mapped:
+                toc[topic] = mapped
+        return toc
+
+    def reusable_topics(self,
+                        toc: Dict[str, Any],
+                        previous_toc: Dict[str, Any],
+                        previous_topics: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the previous extractions of topics whose slides did not change
+
+        Args:
+            toc: Topic -> new page numbers
+            previous_toc: Topic -> previous page numbers the previous extraction used
+            previous_topics: Topic -> previous extracted content
+
+        Returns:
+            Topic -> previous content, for topics that can be reused as is
+        """
+        changed = set(self.changed)
+        reused = {}
+        for topic, pages in toc.items():
+            content, previous_pages = previous_topics.get(topic), previous_toc.get(topic)
+            if not (isinstance(pages, list) and pages and isinstance(previous_pages, list)):
+                continue
+            if not isinstance(content, str) or content.startswith("Error extracting data"):
+                continue
+            if any(n not in self.page_map or n in changed for n in pages):
+                continue
+            if {self.page_map[n] for n in pages} == set(previous_pages):
+                reused[topic] = content
+        return reused
+
+
+def diff_decks(new_states: Sequence[Dict[str, Any]],
+               previous_states: Sequence[Dict[str, Any]],
+               min_similarity: Optional[float] = None) -> DeckDiff:
+    """
+    Pair the pages of a new deck version with those of the previous version
+
+    Identical pages are paired first (in page order), then the remaining
+    pages greedily by decreasing similarity.
+
+    Args:
+        new_states: Page states of the new version (see page_states)
+        previous_states: Page states of the previous version
+        min_similarity: Lowest similarity of a changed page and its previous page
+            (defaults to DECK_DIFF_MIN_SIMILARITY)
+
+    Returns:
+        DeckDiff
+    """
+    min_similarity = settings.DECK_DIFF_MIN_SIMILARITY if min_similarity is None else min_similarity
+    diff = DeckDiff()
+
+    by_hash: Dict[str, List[int]] = {}
+    for state in previous_states:
+        by_hash.setdefault(state["hash"], []).append(state["page_number"])
+    unmatched_new = []
+    for state in new_states:
+        candidates = by_hash.get(state["hash"])
+        if candidates:
+            diff.page_map[state["page_number"]] = candidates.pop(0)
+        else:
+            unmatched_new.append(state)
+
+    matched_old = set(diff.page_map.values())
+    unmatched_old = [state for state in previous_states if state["page_number"] not in matched_old]
+    pairs = sorted(
+        ((_similarity(new, old), new["page_number"], old["page_number"])
+         for new in unmatched_new for old in unmatched_old),
+        reverse=True
+    )
+    paired_new, paired_old = set(), set()
+    for score, new_page, old_page in pairs:
+        if score < min_similarity:
+            break
+        if new_page in paired_new or old_page in paired_old:
+            continue
+        diff.page_map[new_page] = old_page
+        diff.changed.append(new_page)
+        paired_new.add(new_page)
+        paired_old.add(old_page)
+
+    diff.changed.sort()
+    diff.added = sorted(state["page_number"] for state in unmatched_new if state["page_number"] not in paired_new)
+    diff.removed = sorted(state["page_number"] for state in unmatched_old if state["page_number"] not in paired_old)
+    return diff
@@ -0,0 +1,249 @@
+"""
+Processed Deck Index for AI Shark
+
+Remembers pitch decks that were already processed, keyed by the SHA-256 of
+the uploaded file. Each entry keeps a snapshot of the deck's outputs
+(metadata.json, pitch_deck.md, table_of_contents.json, public_data.md):
+
+    <DECK_INDEX_DIR>/index.json              fingerprint -> company and file names
+    <DECK_INDEX_DIR>/<fingerprint>/<file>    snapshot of each output
+
+Re-uploading a known deck restores the snapshot into the company directory
+instead of rendering the deck and calling the LLM again. Snapshots are
+copies, so a later deck of the same company overwriting its outputs does not
+change what a known deck restores.
+
+Entries also keep per-page content hashes, so a new version of a known deck
+can be matched to its previous version (find_previous_version) even though
+its file fingerprint differs.
+"""
+
+import filecmp
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from src.utils.output_manager import OutputManager
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "index.json"
+PUBLIC_DATA_FILENAME = "public_data.md"
+
+
+class DeckIndex:
+    """
+    Fingerprint index of processed decks with snapshots of their outputs
+    """
+
+    def __init__(self, index_dir: Path):
+        """
+        Open (or prepare) the index
+
+        Args:
+            index_dir: Directory holding index.json and the output snapshots
+        """
+        self.index_dir = Path(index_dir)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+        # Statistics
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def index_path(self) -> Path:
+        return self.index_dir / INDEX_FILENAME
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read deck index {self.index_path}: {e}")
+            return {}
+
+    def _save(self) -> None:
+        """Write index.json atomically (caller holds the lock)"""
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.index_dir), suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._entries, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def lookup(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the entry of a processed deck whose snapshot is complete
+
+        Args:
+            fingerprint: SHA-256 of the deck file
+
+        Returns:
+            Entry dictionary ({"company_name", "files", "processed_at", ...}), or None
+        """
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+        snapshot_dir = self.index_dir / fingerprint
+        if entry is None or not all((snapshot_dir / name).is_file() for name in entry.get("files", [])):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def find_previous_version(self,
+                              page_hashes: Sequence[str],
+                              min_overlap: Optional[float] = None) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Find the indexed deck sharing the most identical pages with a new deck
+
+        Args:
+            page_hashes: Content hash per page of the new deck
+            min_overlap: Smallest share of the new deck's pages that must be identical
+                (defaults to DECK_VERSION_MIN_OVERLAP)
+
+        Returns:
+            (fingerprint, entry) of the previous version, or None
+        """
+        min_overlap = settings.DECK_VERSION_MIN_OVERLAP if min_overlap is None else min_overlap
+        new_hashes = set(page_hashes)
+        if not new_hashes:
+            return None
+        with self._lock:
+            entries = list(self._entries.items())
+        best, best_overlap = None, 0.0
+        for fingerprint, entry in entries:
+            known = set(entry.get("page_hashes", []))
+            overlap = sum(1 for h in page_hashes if h in known) / len(page_hashes)
+            if overlap > best_overlap:
+                best, best_overlap = (fingerprint, entry), overlap
+        if best is None or best_overlap < min_overlap or self.lookup(best[0]) is None:
+            return None
+        logger.info(f"Deck shares {best_overlap:.0%} of its pages with {best[1]['company_name']} "
+                    f"({best[1].get('source_name')})")
+        return best
+
+    def snapshot_file(self, fingerprint: str, name: str) -> Path:
+        """Path of one snapshotted output of an indexed deck"""
+        return self.index_dir / fingerprint / name
+
+    def record(self,
+               fingerprint: str,
+               company_name: str,
+               files: List[str],
+               source_name: Optional[str] = None,
+               page_hashes: Optional[Sequence[str]] = None,
+               public_data_extraction: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Snapshot a processed deck's outputs and add it to the index
+
+        Callers record only complete results; a snapshot is restored as-is.
+
+        Args:
+            fingerprint: SHA-256 of the deck file
+            company_name: Company name the outputs were saved under
+            files: Output file paths to snapshot (missing files are skipped)
+            source_name: Original file name, for reference
+            page_hashes: Content hash per page, for matching later versions of the deck
+            public_data_extraction: Public data extraction result, returned again on restore
+                (per-extractor results and the output path are not kept)
+        """
+        files = [path for path in files if os.path.isfile(path)]
+        snapshot_dir = self.index_dir / fingerprint
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(dir=str(self.index_dir), prefix=f"{fingerprint[:12]}-"))
+            for path in files:
+                shutil.copy2(path, staging / os.path.basename(path))
+            with self._lock:
+                shutil.rmtree(snapshot_dir, ignore_errors=True)
+                os.replace(staging, snapshot_dir)
+                self._entries[fingerprint] = {
+                    "company_name": company_name,
+                    "files": [os.path.basename(path) for path in files],
+                    "source_name": source_name,
+                    "page_hashes": list(page_hashes or []),
+                    "public_data_extraction": {
+                        key: value for key, value in (public_data_extraction or {}).items()
+                        if key not in ("results", "output_file")
+                    },
+                    "processed_at": datetime.now().isoformat(timespec="seconds")
+                }
+                self._save()
+        except OSError as e:
+            logger.warning(f"Could not record deck {fingerprint[:12]} in the index: {e}")
+            return
+        logger.info(f"Recorded deck {fingerprint[:12]} ({company_name}, {len(files)} files)")
+
+    def restore(self, fingerprint: str, output_dir: str) -> Optional[Dict[str, Any]]:
+        """
+        Restore a processed deck's outputs into its company directory
+
+        Files that are already identical are left untouched.
+
+        Args:
+            fingerprint: SHA-256 of the deck file
+            output_dir: Base output directory
+
+        Returns:
+            {"company_name", "output_dir", "files_created", "public_data_extraction"},
+            or None if the deck is unknown
+        """
+        entry = self.lookup(fingerprint)
+        if entry is None:
+            return None
+        snapshot_dir = self.index_dir / fingerprint
+        company_dir = OutputManager.create_company_dir(entry["company_name"], output_dir)
+        restored = []
+        public_data = dict(entry.get("public_data_extraction") or {})
+        for name in entry["files"]:
+            source, target = snapshot_dir / name, Path(company_dir) / name
+            if not (target.is_file() and filecmp.cmp(source, target, shallow=False)):
+                shutil.copy2(source, target)
+            restored.append(str(target))
+            if name == PUBLIC_DATA_FILENAME:
+                public_data["output_file"] = str(target)
+        return {
+            "company_name": entry["company_name"],
+            "output_dir": company_dir,
+            "files_created": restored,
+            "public_data_extraction": public_data
+        }
+
+    def forget(self, fingerprint: str) -> None:
+        """Remove a deck and its snapshot from the index"""
+        with self._lock:
+            if self._entries.pop(fingerprint, None) is not None:
+                self._save()
+        shutil.rmtree(self.index_dir / fingerprint, ignore_errors=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size and hit/miss counters"""
+        return {
+            "index_dir": str(self.index_dir),
+            "decks": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+_deck_index: Optional[DeckIndex] = None
+_deck_index_lock = threading.Lock()
+
+
+def get_deck_index() -> DeckIndex:
+    """Get the shared processed deck index"""
+    global _deck_index
+    with _deck_index_lock:
+        if _deck_index is None:
+            _deck_index = DeckIndex(settings.DECK_INDEX_DIR)
+        return _deck_index
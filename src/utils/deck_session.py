@@ -0,0 +1,456 @@
+"""
+Deck Sessions for AI Shark
+
+A deck session holds the rendered pages of one pitch deck for the duration of
+its processing, so the metadata call and every per-topic call can refer to the
+same pages instead of re-sending their pixels:
+
+    inline         - pages are sent as images with each request (local stand-in)
+    files          - each page is uploaded once with the Gemini File API and
+                     requests reference the uploaded files
+    context_cache  - the whole deck is additionally stored in a Gemini context
+                     cache per model; topic requests only name their pages
+
+Uploads are lazy: a page is uploaded when the first request referencing it
+is actually sent, so runs served from the response cache or a cassette
+upload nothing. Concurrent requests share each page's upload.
+
+Requests are built from DeckPage references. Cache and cassette keys hash a
+reference as the page image it stands for, so responses are shared between
+modes; the provider-side form is produced only when the request is sent
+(resolve_request).
+"""
+
+import datetime
+import hashlib
+import io
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import google.generativeai as genai
+from PIL import Image
+
+from config.settings import settings
+from src.utils.client_registry import ClientRegistry, get_client_registry
+from src.utils.llm_cassette import get_llm_cassette
+from src.utils.pdf_rasterizer import PageImage
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+MODE_INLINE = "inline"
+MODE_FILES = "files"
+MODE_CONTEXT_CACHE = "context_cache"
+MODES = (MODE_INLINE, MODE_FILES, MODE_CONTEXT_CACHE)
+
+# Uploaded images are normally ACTIVE at once; wait at most this long otherwise
+FILE_ACTIVE_TIMEOUT_SECONDS = 60
+
+
+class DeckPage:
+    """
+    Reference to one page of a deck session, usable as a request content part
+    """
+
+    def __init__(self, session: "DeckSession", page_number: int):
+        self.session = session
+        self.page_number = page_number
+
+    @property
+    def image(self) -> Union[Image.Image, PageImage]:
+        """Page image, fetched from the session's (possibly lazy) page sequence"""
+        return self.session.images[self.page_number - 1]
+
+    @property
+    def request_key_part(self) -> Union[Image.Image, PageImage]:
+        """Content hashed into cache keys in place of this reference"""
+        return self.image
+
+    def __repr__(self) -> str:
+        return f"DeckPage({self.page_number})"
+
+
+class DeckSession:
+    """
+    Base deck session: pages are sent inline, which is also the local stand-in
+    used when no provider-side storage is available
+    """
+
+    mode = MODE_INLINE
+
+    def __init__(self, images: Sequence[Union[Image.Image, PageImage]]):
+        """
+        Initialize the session
+
+        Args:
+            images: Rendered deck pages in page order (PIL images or encoded PageImages);
+                lazy sequences are read page by page as requests need them
+        """
+        self.images = images
+        self._pages = [DeckPage(self, number) for number in range(1, len(images) + 1)]
+        self.deck_hash = getattr(images, "content_hash", None) or _deck_hash(images)
+        self.closed = False
+
+        # Statistics
+        self.page_references = 0
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def __enter__(self) -> "DeckSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def pages(self, page_numbers: Optional[Sequence[int]] = None) -> List[DeckPage]:
+        """
+        Get page references for a request
+
+        Args:
+            page_numbers: 1-based page numbers (defaults to every page); numbers
+                outside the deck are skipped
+
+        Returns:
+            DeckPage references in the requested order
+        """
+        if page_numbers is None:
+            selected = list(self._pages)
+        else:
+            selected = [self._pages[n - 1] for n in page_numbers
+                        if isinstance(n, int) and 0 < n <= len(self._pages)]
+        self.page_references += len(selected)
+        return selected
+
+    def provider_parts(self, pages: Sequence[DeckPage]) -> List[Any]:
+        """Provider-side content parts for pages (inline images)"""
+        return [_inline_part(page.image) for page in pages]
+
+    def prepare(self, pages: Sequence[DeckPage]) -> None:
+        """Make pages ready to be referenced by a request that is about to be sent"""
+        pass
+
+    def is_uploaded(self, page: DeckPage) -> bool:
+        """Whether a page is stored on the provider side"""
+        return False
+
+    def cached_model(self, model_name: str) -> Optional[genai.GenerativeModel]:
+        """Model bound to a provider context cache of this deck, or None if not cached"""
+        return None
+
+    def close(self) -> None:
+        """Release provider-side resources held by the session"""
+        self.closed = True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session mode and usage counters"""
+        return {
+            "mode": self.mode,
+            "pages": len(self._pages),
+            "page_references": self.page_references
+        }
+
+
+class GeminiDeckSession(DeckSession):
+    """
+    Deck session backed by the Gemini File API and, optionally, context caching
+    """
+
+    def __init__(self,
+                 images: Sequence[Union[Image.Image, PageImage]],
+                 use_context_cache: bool = False,
+                 cache_ttl_seconds: Optional[float] = None,
+                 upload_workers: Optional[int] = None,
+                 page_numbers: Optional[Sequence[int]] = None):
+        """
+        Prepare the session; pages are uploaded when requests first need them
+
+        Args:
+            images: Rendered deck pages in page order
+            use_context_cache: Whether to store the deck in a context cache per model
+            cache_ttl_seconds: Context cache lifetime (defaults to settings)
+            upload_workers: Concurrent page uploads (defaults to settings)
+            page_numbers: 1-based pages that may be uploaded (defaults to every page); other
+                pages are sent inline if a request references them
+        """
+        super().__init__(images)
+        self.mode = MODE_CONTEXT_CACHE if use_context_cache else MODE_FILES
+        self.cache_ttl_seconds = cache_ttl_seconds or settings.DECK_CONTEXT_CACHE_TTL_SECONDS
+        self.upload_workers = max(1, upload_workers or settings.DECK_UPLOAD_WORKERS)
+        self._lock = threading.Lock()
+        self._cache_lock = threading.Lock()  # held while a context cache is created
+        self._uploadable = set(range(1, len(self._pages) + 1)) if page_numbers is None else {
+            n for n in page_numbers if isinstance(n, int) and 0 < n <= len(self._pages)
+        }
+        self._uploads: Dict[int, Future] = {}  # page number -> upload shared by concurrent requests
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._files: Dict[int, Any] = {}
+        self._caches: Dict[str, Any] = {}  # model name -> CachedContent, or None if caching failed
+        # Models bound to this session's caches live as long as the caches, not in the client registry
+        self._cached_models: Dict[str, genai.GenerativeModel] = {}
+        self.bytes_uploaded = 0
+
+    def prepare(self, pages: Sequence[DeckPage]) -> None:
+        """
+        Upload the referenced pages that are not uploaded yet
+
+        A page whose upload fails is sent inline from then on.
+
+        Args:
+            pages: Pages a request is about to reference
+        """
+        started = time.monotonic()
+        with self._lock:
+            numbers = sorted({page.page_number for page in pages} & self._uploadable)
+            if not numbers or self.closed:
+                return
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.upload_workers, thread_name_prefix="deck-upload")
+            started_here = [n for n in numbers if n not in self._uploads]
+            for n in started_here:
+                self._uploads[n] = self._executor.submit(self._upload_page, self._pages[n - 1])
+            uploads = {n: self._uploads[n] for n in numbers}
+        wait(list(uploads.values()))
+
+        for page_number, upload in uploads.items():
+            if upload.cancelled():
+                continue  # the session closed; the page goes inline
+            error = upload.exception()
+            with self._lock:
+                if error is None:
+                    self._files[page_number] = upload.result()
+                elif page_number in self._uploadable:
+                    logger.warning(f"Upload of deck page {page_number} failed, sending it inline: {error}")
+                    self._uploadable.discard(page_number)
+        if started_here:
+            logger.info(f"Uploaded {len(started_here)} deck pages in {time.monotonic() - started:.1f}s "
+                        f"({self.bytes_uploaded / 1024:.0f} KB so far)")
+
+    def _upload_page(self, page: DeckPage) -> Any:
+        """Upload one page image and wait until the file can be referenced"""
+        if isinstance(page.image, PageImage):
+            buffer, mime_type = io.BytesIO(page.image.data), page.image.mime_type
+        else:
+            buffer, mime_type = io.BytesIO(), "image/png"
+            page.image.save(buffer, format="PNG")
+            buffer.seek(0)
+        size = len(buffer.getbuffer())
+        uploaded = genai.upload_file(
+            buffer,
+            mime_type=mime_type,
+            display_name=f"deck-{self.deck_hash[:12]}-page-{page.page_number}"
+        )
+        deadline = time.monotonic() + FILE_ACTIVE_TIMEOUT_SECONDS
+        while getattr(uploaded.state, "name", "ACTIVE") == "PROCESSING" and time.monotonic() < deadline:
+            time.sleep(0.5)
+            uploaded = genai.get_file(uploaded.name)
+        with self._lock:
+            self.bytes_uploaded += size
+        return uploaded
+
+    def provider_parts(self, pages: Sequence[DeckPage]) -> List[Any]:
+        """Uploaded file references for pages (inline images for pages not uploaded)"""
+        return [self._files[page.page_number] if self.is_uploaded(page) else _inline_part(page.image)
+                for page in pages]
+
+    def is_uploaded(self, page: DeckPage) -> bool:
+        """Whether a page was uploaded with the File API"""
+        with self._lock:
+            return page.page_number in self._files
+
+    def cached_model(self, model_name: str) -> Optional[genai.GenerativeModel]:
+        """
+        Get a model bound to a context cache holding the whole deck
+
+        The cache holds every uploadable page, so the first call uploads the whole
+        deck. The cache and its model are created once per model. Creation fails
+        for decks below the provider's minimum cacheable size; the session then
+        keeps using file references for that model.
+
+        Args:
+            model_name: Gemini model the request is sent to
+
+        Returns:
+            GenerativeModel using the context cache, or None
+        """
+        if self.mode != MODE_CONTEXT_CACHE or self.closed:
+            return None
+        with self._lock:
+            uploadable = sorted(self._uploadable)
+        self.prepare([self._pages[n - 1] for n in uploadable])
+        with self._cache_lock:
+            if model_name not in self._caches:
+                cached = self._create_context_cache(model_name)
+                self._caches[model_name] = cached
+                if cached is not None:
+                    self._cached_models[model_name] = genai.GenerativeModel.from_cached_content(cached_content=cached)
+            return self._cached_models.get(model_name)
+
+    def _create_context_cache(self, model_name: str) -> Optional[Any]:
+        """Store every page, labelled with its number, in a context cache"""
+        with self._lock:
+            files = dict(self._files)
+        contents = []
+        for page_number in sorted(files):
+            contents.extend([f"Page {page_number}:", files[page_number]])
+        try:
+            cached = genai.caching.CachedContent.create(
+                model=model_name,
+                display_name=f"deck-{self.deck_hash[:12]}",
+                contents=contents,
+                ttl=datetime.timedelta(seconds=self.cache_ttl_seconds)
+            )
+            logger.info(f"Created context cache for {len(files)} deck pages on {model_name}")
+            return cached
+        except Exception as e:
+            logger.warning(f"Context cache unavailable for {model_name}, using file references: {e}")
+            return None
+
+    def close(self) -> None:
+        """Delete the context caches and uploaded files"""
+        with self._lock:
+            if self.closed:
+                return
+            super().close()
+            executor = self._executor
+        if executor is not None:
+            # Let started uploads finish so their files can be deleted too
+            executor.shutdown(wait=True, cancel_futures=True)
+        for page_number, upload in self._uploads.items():
+            if page_number not in self._files and upload.done() and not upload.cancelled() and upload.exception() is None:
+                self._files[page_number] = upload.result()
+        for cached in self._caches.values():
+            if cached is not None:
+                try:
+                    cached.delete()
+                except Exception as e:
+                    logger.debug(f"Could not delete context cache: {e}")
+        for uploaded in self._files.values():
+            try:
+                genai.delete_file(uploaded.name)
+            except Exception as e:
+                logger.debug(f"Could not delete uploaded page {uploaded.name}: {e}")
+        self._caches.clear()
+        self._cached_models.clear()
+        self._files.clear()
+        self._uploads.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get session mode, upload size and usage counters"""
+        stats = super().get_stats()
+        stats.update({
+            "files_uploaded": len(self._files),
+            "bytes_uploaded": self.bytes_uploaded,
+            "context_caches": sum(1 for cached in self._caches.values() if cached is not None)
+        })
+        return stats
+
+
+def _deck_hash(images: Sequence[Union[Image.Image, PageImage]]) -> str:
+    """Content hash of a deck's page images"""
+    hasher = hashlib.sha256()
+    for image in images:
+        if isinstance(image, PageImage):
+            hasher.update(f"{image.mime_type}:{image.size}|".encode("utf-8"))
+            hasher.update(image.data)
+        else:
+            hasher.update(f"{image.mode}:{image.size}|".encode("utf-8"))
+            hasher.update(image.tobytes())
+    return hasher.hexdigest()
+
+
+def _inline_part(image: Any) -> Any:
+    """Content part sending an image inline (encoded PageImages become blobs)"""
+    return image.to_part() if isinstance(image, PageImage) else image
+
+
+def open_deck_session(images: Sequence[Union[Image.Image, PageImage]],
+                      mode: Optional[str] = None,
+                      page_numbers: Optional[Sequence[int]] = None) -> DeckSession:
+    """
+    Open a deck session for rendered pages
+
+    Falls back to inline pages when the Gemini APIs cannot be used (cassette
+    replay or missing key), or when no page needs uploading. Pages are
+    uploaded as requests need them; a page whose upload fails is sent inline.
+
+    Args:
+        images: Rendered deck pages in page order
+        mode: "inline", "files" or "context_cache" (defaults to DECK_SESSION_MODE)
+        page_numbers: 1-based pages requests will reference as images (defaults to every page)
+
+    Returns:
+        Open DeckSession; close it (or use it as a context manager) when done
+    """
+    mode = (mode or settings.DECK_SESSION_MODE or MODE_INLINE).lower()
+    if mode not in MODES:
+        logger.warning(f"Unknown DECK_SESSION_MODE '{mode}', sending pages inline")
+        mode = MODE_INLINE
+    if (mode == MODE_INLINE or get_llm_cassette().offline or not settings.GOOGLE_API_KEY
+            or (page_numbers is not None and not page_numbers)):
+        return DeckSession(images)
+
+    try:
+        get_client_registry().configure_genai(settings.GOOGLE_API_KEY)
+        return GeminiDeckSession(images, use_context_cache=(mode == MODE_CONTEXT_CACHE), page_numbers=page_numbers)
+    except Exception as e:
+        logger.warning(f"Deck upload failed, sending pages inline: {e}")
+        return DeckSession(images)
+
+
+def _without_pages(content: Sequence[Any]) -> List[Any]:
+    """Drop DeckPage references and the "Page n:" label right before each of them"""
+    parts = []
+    for index, part in enumerate(content):
+        if isinstance(part, DeckPage):
+            continue
+        following = content[index + 1] if index + 1 < len(content) else None
+        if isinstance(following, DeckPage) and isinstance(part, str) and part.strip() == f"Page {following.page_number}:":
+            continue
+        parts.append(part)
+    return parts
+
+
+def resolve_request(content: Any, model_name: str, clients: ClientRegistry) -> Tuple[genai.GenerativeModel, Any]:
+    """
+    Turn request content into the model and parts actually sent to Gemini
+
+    Pages the request references are uploaded first if the session has not
+    uploaded them yet. DeckPage references become inline images or uploaded files, and encoded
+    PageImages become inline blobs. When the deck is in a context cache for
+    the model, the references and their "Page n:" labels become a note naming
+    the pages and the request goes to the cache-bound model.
+
+    Args:
+        content: Prompt string or list of prompt parts, possibly with DeckPage references
+        model_name: Gemini model the request is sent to
+        clients: Client registry supplying the shared model
+
+    Returns:
+        (model, content) tuple
+    """
+    if not isinstance(content, (list, tuple)):
+        return clients.generative_model(model_name), content
+    if not any(isinstance(part, DeckPage) for part in content):
+        return clients.generative_model(model_name), [_inline_part(part) for part in content]
+
+    pages = [part for part in content if isinstance(part, DeckPage)]
+    session = pages[0].session
+    session.prepare(pages)
+
+    cached_model = session.cached_model(model_name) if all(session.is_uploaded(page) for page in pages) else None
+    if cached_model is not None:
+        numbers = ", ".join(str(page.page_number) for page in pages)
+        note = f"Use only these pages of the pitch deck provided above: {numbers}."
+        return cached_model, _without_pages(content) + [note]
+
+    parts = []
+    for part in content:
+        if isinstance(part, DeckPage):
+            parts.extend(part.session.provider_parts([part]))
+        else:
+            parts.append(part)
+    return clients.generative_model(model_name), parts
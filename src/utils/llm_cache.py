@@ -0,0 +1,297 @@
+"""
+Persistent LLM Response Cache for AI Shark
+
+Content-addressed, disk-backed cache that sits in front of LLM calls.
+Keys hash the model name, generation parameters, prompt text and image bytes,
+so byte-identical requests are answered from disk instead of the API.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Bump when the key derivation changes so stale entries are never served
+CACHE_KEY_VERSION = "v1"
+
+
+class LLMResponseCache:
+    """
+    SQLite-backed response cache with size-bounded LRU eviction and optional TTL
+    """
+
+    def __init__(self,
+                 cache_dir: Optional[Path] = None,
+                 max_entries: Optional[int] = None,
+                 max_size_mb: Optional[int] = None,
+                 ttl_seconds: Optional[int] = None,
+                 enabled: Optional[bool] = None):
+        """
+        Initialize the response cache
+
+        Args:
+            cache_dir: Directory holding the cache database (defaults to settings)
+            max_entries: Maximum number of cached responses
+            max_size_mb: Maximum total size of cached responses in megabytes
+            ttl_seconds: Entry lifetime in seconds (0 or None disables expiry)
+            enabled: Whether the cache is active
+        """
+        self.cache_dir = Path(cache_dir or settings.LLM_CACHE_DIR)
+        self.max_entries = max_entries if max_entries is not None else settings.LLM_CACHE_MAX_ENTRIES
+        max_size_mb = max_size_mb if max_size_mb is not None else settings.LLM_CACHE_MAX_SIZE_MB
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.LLM_CACHE_TTL_SECONDS
+        self.enabled = enabled if enabled is not None else settings.LLM_CACHE_ENABLED
+
+        self.db_path = self.cache_dir / "responses.sqlite3"
+        self._lock = threading.Lock()
+        self._initialized = False
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+
+    # Key derivation
+
+    @staticmethod
+    def make_key(model: str, content: Any, params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Build a content-addressed cache key
+
+        Args:
+            model: Model name the request is sent to
+            content: Prompt string or list of prompt parts (text, PIL images, bytes, blobs)
+            params: Generation parameters that influence the response
+
+        Returns:
+            Hex SHA-256 digest identifying the request
+        """
+        hasher = hashlib.sha256()
+        hasher.update(f"{CACHE_KEY_VERSION}|model:{model}|".encode("utf-8"))
+        hasher.update(json.dumps(params or {}, sort_keys=True, default=repr).encode("utf-8"))
+        _hash_part(hasher, content)
+        return hasher.hexdigest()
+
+    # Storage
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the cache database, creating it on first use"""
+        if not self._initialized:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+            conn.commit()
+            self._initialized = True
+            return conn
+        return sqlite3.connect(str(self.db_path), timeout=30)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key from make_key
+
+        Returns:
+            Cached response text, or None on a miss
+        """
+        if not self.enabled:
+            return None
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute(
+                        "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+                    ).fetchone()
+                    now = time.time()
+
+                    if row is not None and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+                        conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                        conn.commit()
+                        row = None
+
+                    if row is None:
+                        self.misses += 1
+                        return None
+
+                    conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                    self.hits += 1
+                    return row[0]
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a response and evict least recently used entries beyond the limits
+
+        Args:
+            key: Cache key from make_key
+            value: Response text to store
+        """
+        if not self.enabled or value is None:
+            return
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    now = time.time()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (key, value, len(value.encode("utf-8")), now, now)
+                    )
+                    self.writes += 1
+                    self._evict(conn)
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop expired entries, then least recently used ones until within limits"""
+        if self.ttl_seconds:
+            cursor = conn.execute(
+                "DELETE FROM entries WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+            self.evictions += max(cursor.rowcount, 0)
+
+        count, total_size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+
+        while (count > self.max_entries or total_size > self.max_size_bytes) and count > 0:
+            key, size = conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at ASC LIMIT 1"
+            ).fetchone()
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            count -= 1
+            total_size -= size
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Remove a single entry (e.g. a response that later failed validation)"""
+        if not self.enabled:
+            return
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache delete failed: {e}")
+
+    def clear(self) -> None:
+        """Remove all cached responses"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM entries")
+                    conn.commit()
+                finally:
+                    conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"LLM cache clear failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and current cache size"""
+        entries, size = 0, 0
+        if self.enabled and self.db_path.exists():
+            try:
+                with self._lock:
+                    conn = self._connect()
+                    try:
+                        entries, size = conn.execute(
+                            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+                        ).fetchone()
+                    finally:
+                        conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache stats failed: {e}")
+
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_bytes": size,
+            "cache_dir": str(self.cache_dir)
+        }
+
+
+def _hash_part(hasher: "hashlib._Hash", part: Any) -> None:
+    """Feed one prompt part (recursively) into the hasher"""
+    if part is None:
+        hasher.update(b"none|")
+    elif hasattr(part, "request_key_part"):
+        # Provider-side references (e.g. uploaded deck pages) hash as the content they stand for
+        _hash_part(hasher, part.request_key_part)
+    elif isinstance(part, str):
+        data = part.encode("utf-8")
+        hasher.update(f"text:{len(data)}|".encode("utf-8"))
+        hasher.update(data)
+    elif isinstance(part, (bytes, bytearray, memoryview)):
+        data = bytes(part)
+        hasher.update(f"bytes:{len(data)}|".encode("utf-8"))
+        hasher.update(data)
+    elif hasattr(part, "tobytes") and hasattr(part, "mode") and hasattr(part, "size"):
+        # PIL image: hash the decoded pixels so re-encoding does not change the key
+        hasher.update(f"image:{part.mode}:{part.size}|".encode("utf-8"))
+        hasher.update(part.tobytes())
+    elif isinstance(part, dict):
+        hasher.update(f"dict:{len(part)}|".encode("utf-8"))
+        for key in sorted(part, key=str):
+            hasher.update(f"key:{key}|".encode("utf-8"))
+            _hash_part(hasher, part[key])
+    elif isinstance(part, (list, tuple)):
+        hasher.update(f"list:{len(part)}|".encode("utf-8"))
+        for item in part:
+            _hash_part(hasher, item)
+    else:
+        hasher.update(f"repr:{part!r}|".encode("utf-8"))
+
+
+_llm_cache: Optional[LLMResponseCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Get the process-wide response cache (created on first use)"""
+    global _llm_cache
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,304 @@
+"""
+Record/Replay LLM Cassettes for AI Shark
+
+A cassette stores real provider responses keyed by the same normalized
+request hash as the response cache (model, parameters, prompt text and image
+pixels), one JSON file per request. Replaying a cassette lets the whole
+pipeline, from pitch deck extraction to the final memo, run deterministically
+on a machine with no network access, with optional simulated latency and
+injected provider errors for benchmarking and resilience testing.
+
+Modes (LLM_CASSETTE_MODE):
+    off     - call the provider (default)
+    record  - call the provider and store every response
+    replay  - serve stored responses only; a missing entry is an error
+    auto    - replay stored responses and record the missing ones
+
+Every model request goes through the cassette: LLMManager (direct Gemini,
+LangChain and embeddings, stored as JSON), LLMSetup, the products/services
+extractor, the founder analysis agent and the Inc42 news scraper. Web search
+APIs and scraped pages are not recorded; in replay mode they are skipped
+(SearchOrchestrator returns no results, the news scraper returns an error
+message), so offline runs carry no web search or news content.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODE_AUTO = "auto"
+MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY, MODE_AUTO)
+
+# Replayed streams are cut into chunks of about this many characters
+STREAM_CHUNK_CHARS = 200
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode when no recording exists for a request"""
+    pass
+
+
+class CassetteInjectedError(Exception):
+    """Simulated provider failure injected during replay (HTTP 503)"""
+    status_code = 503
+
+
+def _prompt_preview(content: Any, limit: int = 300) -> str:
+    """First text of a request, stored to make cassette files readable"""
+    if isinstance(content, str):
+        return content[:limit]
+    if isinstance(content, (list, tuple)):
+        texts = [part for part in content if isinstance(part, str)]
+        images = len(content) - len(texts)
+        preview = " ".join(texts)[:limit]
+        return f"{preview} [+{images} non-text parts]" if images else preview
+    return repr(content)[:limit]
+
+
+class LLMCassette:
+    """
+    Directory of recorded LLM responses with record and replay modes
+    """
+
+    def __init__(self,
+                 mode: Optional[str] = None,
+                 cassette_dir: Optional[Path] = None,
+                 latency_scale: Optional[float] = None,
+                 latency_seconds: Optional[float] = None,
+                 error_rate: Optional[float] = None,
+                 seed: Optional[int] = None):
+        """
+        Initialize the cassette
+
+        Args:
+            mode: "off", "record", "replay" or "auto" (defaults to settings)
+            cassette_dir: Directory holding the recordings
+            latency_scale: Replay delay as a multiple of the recorded latency
+            latency_seconds: Fixed replay delay added to every response
+            error_rate: Probability that a replayed request fails with a 503
+            seed: Seed for error injection, so failures are reproducible
+        """
+        mode = (mode or settings.LLM_CASSETTE_MODE or MODE_OFF).lower()
+        if mode not in MODES:
+            logger.warning(f"Unknown LLM_CASSETTE_MODE '{mode}', cassette disabled")
+            mode = MODE_OFF
+        self.mode = mode
+        self.cassette_dir = Path(cassette_dir or settings.LLM_CASSETTE_DIR)
+        self.latency_scale = settings.LLM_CASSETTE_LATENCY_SCALE if latency_scale is None else latency_scale
+        self.latency_seconds = settings.LLM_CASSETTE_LATENCY_SECONDS if latency_seconds is None else latency_seconds
+        self.error_rate = settings.LLM_CASSETTE_ERROR_RATE if error_rate is None else error_rate
+        self._random = random.Random(settings.LLM_CASSETTE_SEED if seed is None else seed)
+        self._lock = threading.Lock()
+
+        # Statistics
+        self.recorded = 0
+        self.replayed = 0
+        self.missed = 0
+        self.injected_errors = 0
+
+        if self.enabled:
+            logger.info(f"LLM cassette in '{self.mode}' mode at {self.cassette_dir}")
+
+    @property
+    def enabled(self) -> bool:
+        """Whether requests go through the cassette"""
+        return self.mode != MODE_OFF
+
+    @property
+    def offline(self) -> bool:
+        """Whether provider calls are never made (pure replay)"""
+        return self.mode == MODE_REPLAY
+
+    # Storage
+
+    def _path(self, key: str) -> Path:
+        return self.cassette_dir / key[:2] / f"{key}.json"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Read a recorded entry
+
+        Args:
+            key: Request hash
+
+        Returns:
+            Entry dictionary, or None if nothing was recorded
+        """
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Unreadable cassette entry {path}: {e}")
+            return None
+
+    def save(self, key: str, model: str, content: Any, response: str, latency_seconds: float) -> None:
+        """
+        Store a response (atomically, so concurrent writers never leave partial files)
+
+        Args:
+            key: Request hash
+            model: Model that produced the response
+            content: Request content (only a text preview is stored)
+            response: Response text
+            latency_seconds: Observed provider latency
+        """
+        path = self._path(key)
+        entry = {
+            "key": key,
+            "model": model,
+            "prompt_preview": _prompt_preview(content),
+            "response": response,
+            "latency_seconds": round(latency_seconds, 3),
+            "recorded_at": time.time()
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, path)
+            with self._lock:
+                self.recorded += 1
+        except OSError as e:
+            logger.warning(f"Could not record cassette entry {path}: {e}")
+
+    # Replay
+
+    def _replay_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up an entry for replay, raising in pure replay mode when it is missing"""
+        if self.mode == MODE_RECORD:
+            return None
+        entry = self.load(key)
+        if entry is None:
+            with self._lock:
+                self.missed += 1
+            if self.mode == MODE_REPLAY:
+                raise CassetteMissError(f"No cassette recording for request {key[:12]}")
+            return None
+
+        with self._lock:
+            inject = self.error_rate > 0 and self._random.random() < self.error_rate
+            if inject:
+                self.injected_errors += 1
+            else:
+                self.replayed += 1
+        if inject:
+            raise CassetteInjectedError(f"503 Service Unavailable (injected by cassette for {key[:12]})")
+        return entry
+
+    def _replay_delay(self, entry: Dict[str, Any]) -> float:
+        return max(0.0, entry.get("latency_seconds", 0.0) * self.latency_scale + self.latency_seconds)
+
+    def play(self, key: str, model: str, content: Any, request: Callable[[], str]) -> str:
+        """
+        Serve a request from the cassette or the provider, depending on the mode
+
+        Args:
+            key: Request hash
+            model: Model the request is sent to
+            content: Request content
+            request: Callable performing the real provider call and returning text
+
+        Returns:
+            Response text
+        """
+        if not self.enabled:
+            return request()
+
+        entry = self._replay_entry(key)
+        if entry is not None:
+            time.sleep(self._replay_delay(entry))
+            return entry["response"]
+
+        started = time.monotonic()
+        text = request()
+        if text:
+            self.save(key, model, content, text, time.monotonic() - started)
+        return text
+
+    async def aplay(self, key: str, model: str, content: Any, request: Callable[[], Awaitable[str]]) -> str:
+        """Async counterpart of play"""
+        if not self.enabled:
+            return await request()
+
+        entry = await asyncio.to_thread(self._replay_entry, key)
+        if entry is not None:
+            await asyncio.sleep(self._replay_delay(entry))
+            return entry["response"]
+
+        started = time.monotonic()
+        text = await request()
+        if text:
+            await asyncio.to_thread(self.save, key, model, content, text, time.monotonic() - started)
+        return text
+
+    def replay_stream(self, key: str) -> Optional[Iterator[str]]:
+        """
+        Get a chunked replay of a recorded response
+
+        The simulated latency is spread over the chunks, so time-to-first-token
+        and total time behave like a real stream.
+
+        Args:
+            key: Request hash
+
+        Returns:
+            Iterator of text chunks, or None if the request should go to the provider
+        """
+        if not self.enabled:
+            return None
+        entry = self._replay_entry(key)
+        if entry is None:
+            return None
+
+        def chunks() -> Iterator[str]:
+            text = entry["response"]
+            parts = [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)] or [""]
+            delay = self._replay_delay(entry) / len(parts)
+            for part in parts:
+                time.sleep(delay)
+                yield part
+        return chunks()
+
+    @property
+    def records_streams(self) -> bool:
+        """Whether completed provider streams should be saved"""
+        return self.mode in (MODE_RECORD, MODE_AUTO)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get mode and record/replay counters"""
+        return {
+            "mode": self.mode,
+            "cassette_dir": str(self.cassette_dir),
+            "recorded": self.recorded,
+            "replayed": self.replayed,
+            "missed": self.missed,
+            "injected_errors": self.injected_errors
+        }
+
+
+# Global instance
+llm_cassette = LLMCassette()
+
+
+def get_llm_cassette() -> LLMCassette:
+    """Get the process-wide LLM cassette"""
+    return llm_cassette
@@ -4,14 +4,14 @@ Handles both direct Gemini API calls and LangChain integration
 """
 
 import os
-import io
+import re
 import json
-import time
-import functools
+import asyncio
+import weakref
+import threading
 import logging
 from typing import List, Dict, Any, Optional, Union
 from PIL import Image
-import fitz  # PyMuPDF
 import google.generativeai as genai
 from dotenv import load_dotenv
 
@@ -24,7 +24,25 @@ except ImportError:
     LANGCHAIN_AVAILABLE = False
     BaseLanguageModel = None
 
+from config.settings import settings
 from src.utils.prompt_manager import PromptManager
+from src.utils.llm_cache import get_llm_cache
+from src.utils.rate_limiter import get_rate_limiter, estimate_prompt_tokens
+from src.utils.single_flight import llm_request_flight
+from src.utils.token_budget import TokenBudgetPlanner
+from src.utils.circuit_breaker import get_circuit_breaker, is_provider_failure, CircuitBreakerOpenError
+from src.utils.connection_health import connection_health
+from src.utils.llm_telemetry import get_llm_telemetry
+from src.utils.retry_policy import get_retry_policy
+from src.utils.client_registry import get_client_registry, KIND_LANGCHAIN
+from src.utils.llm_cassette import get_llm_cassette
+from src.utils.deck_session import resolve_request
+from src.utils.pdf_rasterizer import rasterize_pdf
+from src.utils.model_router import (
+    get_model_router, min_length, has_numbered_answers, is_json_object,
+    TASK_METADATA_EXTRACTION, TASK_TOPIC_EXTRACTION, TASK_DOCUMENT_STRUCTURING,
+    TASK_FOUNDER_SIMULATION, TASK_DEFAULT
+)
 
 # Load environment variables
 load_dotenv()
@@ -32,10 +50,17 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# The embedding API accepts at most this many texts per request
+MAX_EMBEDDING_BATCH_SIZE = 100
+
 class LLMConnectionError(Exception):
     """Custom exception for LLM connection issues"""
     pass
 
+class LLMConfigurationError(ValueError):
+    """Raised on first use when the Gemini API cannot be configured (e.g. missing key)"""
+    pass
+
 class LLMManager:
     """
     Unified LLM Manager that supports both direct Gemini API and LangChain integration
@@ -45,156 +70,553 @@ class LLMManager:
         self.gemini_model = os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
         self.gemini_embedding_model = os.getenv("GEMINI_EMBEDDING_MODEL", "models/embedding-001")
         self.prompt_manager = PromptManager()
-        self._configure_gemini()
+        self.cache = get_llm_cache()
+        self.budget_planner = TokenBudgetPlanner(model=self.gemini_model)
+        self.router = get_model_router()
+        self.telemetry = get_llm_telemetry()
+        self.retry_policy = get_retry_policy("google")
+        self.clients = get_client_registry()
+        self.cassette = get_llm_cassette()
+        
+        # Gemini is configured on first use so importing this module does no work
+        self._configured = False
+        self._configure_lock = threading.Lock()
         
         # For LangChain compatibility
         self.llm_instance: Optional[BaseLanguageModel] = None
-        self.last_request_time = 0
-        self.min_request_interval = 1.0
+        
+        # Async concurrency limit (one semaphore per event loop)
+        self.max_concurrency = settings.LLM_MAX_CONCURRENCY
+        self._semaphores = weakref.WeakKeyDictionary()
     
     def _configure_gemini(self):
         """Configure the Gemini API with the key from environment variables"""
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
-            raise ValueError("GOOGLE_API_KEY not found. Please set it in a .env file.")
-        genai.configure(api_key=api_key)
-        logger.info("Gemini API configured successfully")
+            raise LLMConfigurationError("GOOGLE_API_KEY not found. Please set it in a .env file.")
+        self.clients.configure_genai(api_key)
+
+    def ensure_configured(self):
+        """Configure the Gemini API once, before the first direct API call"""
+        if not self._configured:
+            with self._configure_lock:
+                if not self._configured:
+                    self._configure_gemini()
+                    self._configured = True
     
     @staticmethod
-    def retry_with_backoff(retries=5, backoff_in_seconds=5):
-        """Decorator for retrying a function with exponential backoff"""
-        def rwb(f):
-            @functools.wraps(f)
-            def wrapper(*args, **kwargs):
-                x = 0
-                while True:
-                    try:
-                        return f(*args, **kwargs)
-                    except Exception as e:
-                        if x == retries:
-                            raise e
-                        else:
-                            sleep = backoff_in_seconds * 2 ** x
-                            logger.warning(f"Error in {f.__name__}: {e}. Retrying in {sleep} seconds.")
-                            time.sleep(sleep)
-                            x += 1
-            return wrapper
-        return rwb
-    
+    def _parse_json_response(response_text: str) -> Optional[Dict[str, Any]]:
+        """Parse a JSON object from a model response, stripping markdown code fences"""
+        cleaned_response = response_text.strip()
+
+        # Remove markdown code blocks if present
+        if "```json" in cleaned_response:
+            cleaned_response = cleaned_response.split("```json")[1].split("```")[0].strip()
+        elif "```" in cleaned_response:
+            # Handle case where it's just ```
+            parts = cleaned_response.split("```")
+            if len(parts) >= 3:
+                cleaned_response = parts[1].strip()
+
+        try:
+            parsed = json.loads(cleaned_response)
+        except json.JSONDecodeError:
+            return None
+        return parsed if isinstance(parsed, dict) else None
+
+    def _generate_text(self,
+                       content: Union[str, List[Any]],
+                       use_cache: bool = True,
+                       validate=None,
+                       model_name: Optional[str] = None) -> str:
+        """
+        Generate text with the direct Gemini API, served from the response cache when possible
+
+        Identical concurrent requests are coalesced so only one reaches the API.
+        Transient provider errors are retried under the Gemini retry policy.
+        With an active cassette the response cache is bypassed and requests are
+        recorded or replayed under the same request key.
+
+        Args:
+            content: Prompt string or list of prompt parts (text and images)
+            use_cache: Whether to read and write the response cache for this call
+            validate: Optional callable; responses failing it are returned but not cached
+            model_name: Gemini model to call (defaults to the configured model)
+
+        Returns:
+            Model response text
+        """
+        model_name = model_name or self.gemini_model
+        request_key = self.cache.make_key(model_name, content)
+        use_cache = use_cache and self.cache.enabled and not self.cassette.enabled
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                logger.info("LLM cache hit, skipping Gemini request")
+                self.telemetry.record_cache_hit("llm_manager", "google", model_name)
+                return cached
+
+        def attempt() -> str:
+            breaker = self._allow_gemini_request()
+            if not self.cassette.offline:
+                self._enforce_rate_limit(content, model_name)
+            try:
+                with self.telemetry.track("llm_manager", "google", model_name, content) as call:
+                    def request() -> str:
+                        model, parts = resolve_request(content, model_name, self.clients)
+                        response = model.generate_content(parts, request_options=self.retry_policy.request_options())
+                        call.set_response(response)
+                        return response.text
+
+                    text = self.cassette.play(request_key, model_name, content, request)
+                    call.add_output(text)
+            except Exception as e:
+                self._record_gemini_outcome(breaker, e)
+                raise
+            self._record_gemini_outcome(breaker)
+            return text
+
+        def call_model() -> str:
+            if not self.cassette.offline:
+                self.ensure_configured()
+            text = self.retry_policy.call(attempt)
+            if use_cache and text and (validate is None or validate(text)):
+                self.cache.set(request_key, text)
+            return text
+
+        return llm_request_flight.do(request_key, call_model)
+
+    @staticmethod
+    def _allow_gemini_request():
+        """Get the Gemini circuit breaker, failing fast while the circuit is open"""
+        breaker = get_circuit_breaker("google")
+        if not breaker.allow_request():
+            raise CircuitBreakerOpenError("Gemini circuit is open; failing fast")
+        return breaker
+
+    @staticmethod
+    def _record_gemini_outcome(breaker, error: Optional[BaseException] = None):
+        """Report a Gemini call outcome; only provider-side errors count as failures"""
+        if error is not None and is_provider_failure(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the concurrency semaphore bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def _agenerate_text(self,
+                              content: Union[str, List[Any]],
+                              use_cache: bool = True,
+                              validate=None,
+                              model_name: Optional[str] = None) -> str:
+        """
+        Async counterpart of _generate_text using the async Gemini client
+
+        Args:
+            content: Prompt string or list of prompt parts (text and images)
+            use_cache: Whether to read and write the response cache for this call
+            validate: Optional callable; responses failing it are returned but not cached
+            model_name: Gemini model to call (defaults to the configured model)
+
+        Returns:
+            Model response text
+        """
+        model_name = model_name or self.gemini_model
+        request_key = self.cache.make_key(model_name, content)
+        use_cache = use_cache and self.cache.enabled and not self.cassette.enabled
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, request_key)
+            if cached is not None:
+                logger.info("LLM cache hit, skipping Gemini request")
+                self.telemetry.record_cache_hit("llm_manager", "google", model_name)
+                return cached
+
+        async def attempt() -> str:
+            breaker = self._allow_gemini_request()
+            if not self.cassette.offline:
+                await get_rate_limiter("google", model_name).acquire_async(estimate_prompt_tokens(content))
+            try:
+                async with self._get_semaphore():
+                    with self.telemetry.track("llm_manager", "google", model_name, content) as call:
+                        async def request() -> str:
+                            model, parts = resolve_request(content, model_name, self.clients)
+                            response = await model.generate_content_async(
+                                parts, request_options=self.retry_policy.request_options()
+                            )
+                            call.set_response(response)
+                            return response.text
+
+                        text = await self.cassette.aplay(request_key, model_name, content, request)
+                        call.add_output(text)
+            except Exception as e:
+                self._record_gemini_outcome(breaker, e)
+                raise
+            self._record_gemini_outcome(breaker)
+            return text
+
+        async def call_model() -> str:
+            if not self.cassette.offline:
+                self.ensure_configured()
+            text = await self.retry_policy.acall(attempt)
+            if use_cache and text and (validate is None or validate(text)):
+                await asyncio.to_thread(self.cache.set, request_key, text)
+            return text
+
+        return await llm_request_flight.do_async(request_key, call_model)
+
+    def _generate_for_task(self,
+                           task: str,
+                           content: Union[str, List[Any]],
+                           use_cache: bool = True,
+                           validate=None) -> str:
+        """
+        Generate text on the task's routed model, escalating when validation fails
+
+        Args:
+            task: Task type used for model routing
+            content: Prompt string or list of prompt parts (text and images)
+            use_cache: Whether to read and write the response cache for this call
+            validate: Optional callable deciding whether a response is acceptable
+
+        Returns:
+            Model response text
+        """
+        return self.router.run_cascade(
+            task,
+            lambda model_name: self._generate_text(content, use_cache, validate, model_name=model_name),
+            validate
+        )
+
+    async def _agenerate_for_task(self,
+                                  task: str,
+                                  content: Union[str, List[Any]],
+                                  use_cache: bool = True,
+                                  validate=None) -> str:
+        """Async counterpart of _generate_for_task"""
+        async def call(model_name: str) -> str:
+            return await self._agenerate_text(content, use_cache, validate, model_name=model_name)
+
+        return await self.router.arun_cascade(task, call, validate)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get response cache hit/miss counters"""
+        return self.cache.stats()
+
+    def get_telemetry(self) -> List[Dict[str, Any]]:
+        """Get per-task/model LLM call metrics recorded in this process"""
+        return self.telemetry.summary()
+
+    # Prompt builders shared by the sync and async paths
+
+    def _metadata_content(self, page_images: List[Image.Image]) -> List[Any]:
+        """
+        Build the metadata extraction request: [prompt, image1, image2, ...] (images or DeckPage references);
+        when some deck pages were left out, each page is labelled with its number so the TOC stays correct
+        """
+        prompt = self.prompt_manager.format_prompt("metadata_extraction")
+        numbers = [getattr(page, "page_number", None) for page in page_images]
+        if None in numbers or numbers == list(range(1, len(numbers) + 1)):
+            return [prompt] + list(page_images)
+        content = [prompt]
+        for number, page in zip(numbers, page_images):
+            content.extend([f"Page {number}:", page])
+        return content
+
+    def _topic_content(self, topic: str, page_images: List[Image.Image]) -> Union[str, List[Any]]:
+        """
+        Build the topic analysis request for the pages of one topic (images, DeckPage
+        references or page text); topics whose pages are all text get a text-only prompt
+        """
+        if page_images and all(isinstance(part, str) for part in page_images):
+            return self.prompt_manager.format_prompt(
+                "topic_text_analysis",
+                topic=topic,
+                pages="\n\n".join(page_images)
+            )
+        prompt = self.prompt_manager.format_prompt(
+            "topic_analysis",
+            topic=topic,
+            version="v2"
+        )
+        return [prompt] + list(page_images)
+
+    def _topic_batches(self, toc: Dict[str, List[int]], page_images: List[Image.Image]) -> List[Dict[str, List[int]]]:
+        """
+        Group TOC topics for multi-topic extraction, in TOC order
+
+        A group is closed when adding the next topic would exceed the topic,
+        page or input token limit; topics without valid pages are left out.
+
+        Args:
+            toc: Mapping of topic to 1-based page numbers
+            page_images: Every page of the deck (images or DeckPage references)
+
+        Returns:
+            List of {topic: page numbers} groups
+        """
+        overhead = self.prompt_manager.format_prompt("multi_topic_analysis", topics="")
+        token_budget = self.budget_planner.budget_for(settings.TOPIC_BATCH_MAX_INPUT_TOKENS, overhead)
+
+        batches, current, pages = [], {}, set()
+        for topic, page_nums in toc.items():
+            if not isinstance(page_nums, list):
+                continue
+            valid = [n for n in page_nums if isinstance(n, int) and 0 < n <= len(page_images)]
+            if not valid:
+                continue
+            merged = pages | set(valid)
+            tokens = estimate_prompt_tokens([page_images[n - 1] for n in merged])
+            if current and (len(current) >= settings.TOPIC_BATCH_MAX_TOPICS
+                            or len(merged) > settings.TOPIC_BATCH_MAX_PAGES
+                            or tokens > token_budget):
+                batches.append(current)
+                current, merged = {}, set(valid)
+            current[topic] = valid
+            pages = merged
+        if current:
+            batches.append(current)
+        return batches
+
+    def _multi_topic_content(self, topics: Dict[str, List[int]], page_images: List[Image.Image]) -> List[Any]:
+        """Build the multi-topic request: [prompt, "Page n:", page n, ...] for the pages of a topic group (text pages label themselves)"""
+        topic_lines = "\n".join(
+            f"- {topic}: pages {', '.join(map(str, page_nums))}" for topic, page_nums in topics.items()
+        )
+        content = [self.prompt_manager.format_prompt("multi_topic_analysis", topics=topic_lines)]
+        for page_num in sorted({n for page_nums in topics.values() for n in page_nums}):
+            part = page_images[page_num - 1]
+            content.extend([part] if isinstance(part, str) else [f"Page {page_num}:", part])
+        return content
+
+    def _match_topic_results(self, topics: Dict[str, List[int]], response_text: str) -> Dict[str, str]:
+        """Map a multi-topic response back to the requested topics, keeping only valid analyses"""
+        parsed = self._parse_json_response(response_text) or {}
+        normalize = lambda name: re.sub(r"[\s_\-]+", " ", str(name)).strip().lower()
+        by_name = {normalize(key): value for key, value in parsed.items()}
+
+        results = {}
+        for topic in topics:
+            value = parsed.get(topic, by_name.get(normalize(topic)))
+            if isinstance(value, str) and self._is_valid_topic_response(value):
+                results[topic] = value.strip()
+        missing = len(topics) - len(results)
+        if missing:
+            logger.warning(f"Multi-topic response missing or invalid for {missing} of {len(topics)} topics")
+        return results
+
+    def _structuring_prompt(self, text: str, filename: str) -> str:
+        """Build the document structuring prompt, trimming the content to its token budget"""
+        overhead = self.prompt_manager.format_prompt("document_structuring", filename=filename, content="")
+        budget = self.budget_planner.budget_for(settings.TOKEN_BUDGET_DOCUMENT_STRUCTURING, overhead)
+        return self.prompt_manager.format_prompt(
+            "document_structuring",
+            filename=filename,
+            content=self.budget_planner.fit(text, budget)
+        )
+
+    def _is_valid_metadata_response(self, response_text: str) -> bool:
+        """Check that a metadata response contains a parseable JSON object"""
+        return self._parse_json_response(response_text) is not None
+
+    def _is_valid_topic_response(self, response_text: str) -> bool:
+        """Check that a topic response is long enough to be a real analysis"""
+        return min_length(200)(response_text)
+
     # Direct Gemini API Methods (for document processing)
     
     def pdf_to_images(self, pdf_path: str) -> List[Image.Image]:
-        """Convert each page of a PDF into a list of PIL Images"""
+        """Convert each page of a PDF into a list of PIL Images (rendered in parallel for larger decks)"""
         try:
-            doc = fitz.open(pdf_path)
-            images = []
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                pix = page.get_pixmap(dpi=150)
-                img_data = pix.tobytes("png")
-                image = Image.open(io.BytesIO(img_data))
-                images.append(image)
-            doc.close()
+            images = rasterize_pdf(pdf_path)
             logger.info(f"Successfully converted PDF to {len(images)} images")
             return images
         except Exception as e:
             logger.error(f"Error converting PDF to images: {e}")
             return []
     
-    @retry_with_backoff()
-    def extract_metadata(self, page_images: List[Image.Image]) -> Optional[Dict[str, Any]]:
+    def extract_metadata(self, page_images: List[Image.Image], use_cache: bool = True) -> Optional[Dict[str, Any]]:
         """Extract startup metadata including name, sector, sub-sector, website, and table of contents"""
         try:
             logger.info("Extracting metadata from pitch deck...")
-            model = genai.GenerativeModel(self.gemini_model)
             
-            # Get the metadata extraction prompt
-            prompt = self.prompt_manager.format_prompt("metadata_extraction")
-            
-            # Prepare content list [prompt, image1, image2, ...]
-            content = [prompt] + page_images
-            
-            response = model.generate_content(content)
-            print(f"Response: {response}")
-            # Clean up the response to extract only the JSON part
-            cleaned_response = response.text.strip()
-
-            # Remove markdown code blocks if present
-            if "```json" in cleaned_response:
-                cleaned_response = cleaned_response.split("```json")[1].split("```")[0].strip()
-            elif "```" in cleaned_response:
-                # Handle case where it's just ```
-                parts = cleaned_response.split("```")
-                if len(parts) >= 3:
-                    cleaned_response = parts[1].strip()
+            response_text = self._generate_for_task(
+                TASK_METADATA_EXTRACTION,
+                self._metadata_content(page_images),
+                use_cache=use_cache,
+                validate=self._is_valid_metadata_response
+            )
             
-            metadata = json.loads(cleaned_response)
+            metadata = self._parse_json_response(response_text)
+            if metadata is None:
+                raise ValueError("Model response did not contain a valid JSON object")
             logger.info("Successfully extracted metadata")
             logger.debug(f"Metadata: {json.dumps(metadata, indent=2)}")
             
             return metadata
             
-        except (json.JSONDecodeError, Exception) as e:
+        except Exception as e:
             logger.error(f"Error extracting metadata: {e}")
-            if 'response' in locals():
-                logger.debug(f"Model response was: {response.text}")
+            if 'response_text' in locals():
+                logger.debug(f"Model response was: {response_text}")
             return None
     
-    @retry_with_backoff()
-    def extract_topic_data(self, topic: str, page_images: List[Image.Image]) -> str:
-        """Extract detailed information for a specific topic from its relevant pages"""
+    def extract_topic_data(self, topic: str, page_images: List[Image.Image], use_cache: bool = True) -> str:
+        """
+        Extract detailed information for a specific topic from its relevant pages
+        
+        Raises:
+            Exception: The provider error once retries are exhausted, so callers
+                can tell a failed topic from extracted content
+        """
         try:
-            model = genai.GenerativeModel(self.gemini_model)
-            
-            # Get the topic analysis prompt
-            prompt = self.prompt_manager.format_prompt(
-                "topic_analysis",
-                topic=topic,
-                version="v2"
+            return self._generate_for_task(
+                TASK_TOPIC_EXTRACTION,
+                self._topic_content(topic, page_images),
+                use_cache=use_cache,
+                validate=self._is_valid_topic_response
             )
             
-            content = [prompt] + page_images
-            response = model.generate_content(content)
-            return response.text
-            
         except Exception as e:
             logger.error(f"Error extracting topic data for '{topic}': {e}")
-            return f"Error extracting data for topic '{topic}': {e}"
+            raise
+    
+    def extract_topics_batch(self,
+                             page_images: List[Image.Image],
+                             toc: Dict[str, List[int]],
+                             use_cache: bool = True) -> Dict[str, str]:
+        """
+        Extract several topics per request, splitting the TOC into groups that fit the limits
+        
+        Args:
+            page_images: Every page of the deck (images or DeckPage references)
+            toc: Mapping of topic to 1-based page numbers
+            use_cache: Whether to read and write the response cache
+            
+        Returns:
+            Mapping of topic to analysis for the topics that came back valid;
+            callers re-request the remaining topics with extract_topic_data
+        """
+        results = {}
+        batches = self._topic_batches(toc, page_images)
+        logger.info(f"Extracting {sum(len(b) for b in batches)} topics in {len(batches)} multi-topic requests")
+        for topics in batches:
+            try:
+                response_text = self._generate_for_task(
+                    TASK_TOPIC_EXTRACTION,
+                    self._multi_topic_content(topics, page_images),
+                    use_cache=use_cache,
+                    validate=is_json_object
+                )
+            except Exception as e:
+                logger.error(f"Multi-topic extraction failed for {list(topics)}: {e}")
+                continue
+            results.update(self._match_topic_results(topics, response_text))
+        return results
     
-    @retry_with_backoff()
-    def structure_document_content(self, text: str, filename: str) -> str:
+    def structure_document_content(self, text: str, filename: str, use_cache: bool = True) -> str:
         """Use LLM to structure and clean up document content"""
         try:
-            model = genai.GenerativeModel(self.gemini_model)
-            
-            # Get the document structuring prompt
-            prompt = self.prompt_manager.format_prompt(
-                "document_structuring",
-                filename=filename,
-                content=text[:8000]  # Limit to avoid token limits
+            return self._generate_for_task(
+                TASK_DOCUMENT_STRUCTURING,
+                self._structuring_prompt(text, filename),
+                use_cache=use_cache
             )
             
-            response = model.generate_content(prompt)
-            return response.text
-            
         except Exception as e:
             logger.error(f"Error structuring document content: {e}")
             return text  # Return original text if LLM processing fails
     
-    @retry_with_backoff()
     def generate_embeddings(self, text: str, task_type: str = "RETRIEVAL_DOCUMENT") -> List[float]:
         """Generate embeddings for the given text"""
         try:
-            embedding = genai.embed_content(
-                model=self.gemini_embedding_model, 
-                content=text, 
-                task_type=task_type
-            )
-            return embedding['embedding']
+            if not self.cassette.offline:
+                self.ensure_configured()
+            return self.retry_policy.call(self._embed_content, text, task_type)
         except Exception as e:
             logger.error(f"Error generating embeddings: {e}")
             return []
     
+    def _embed_content(self, content: Union[str, List[str]], task_type: str) -> Any:
+        """
+        One embedding request, recorded or replayed by the cassette (vectors are stored as JSON)
+        
+        Args:
+            content: Text or list of texts
+            task_type: Embedding task type
+            
+        Returns:
+            Embedding, or one embedding per text for a list
+        """
+        model_name = self.gemini_embedding_model
+        request_key = self.cache.make_key(model_name, content, params={"embedding": True, "task_type": task_type})
+        with self.telemetry.track("llm_manager", "google", model_name, content, task="embedding"):
+            def request() -> str:
+                result = genai.embed_content(
+                    model=model_name,
+                    content=content,
+                    task_type=task_type,
+                    request_options=self.retry_policy.request_options()
+                )
+                return json.dumps(result['embedding'])
+            
+            return json.loads(self.cassette.play(request_key, model_name, content, request))
+    
+    def generate_embeddings_batch(self,
+                                  texts: List[str],
+                                  task_type: str = "RETRIEVAL_DOCUMENT",
+                                  batch_size: Optional[int] = None) -> List[List[float]]:
+        """
+        Generate embeddings for many texts, several texts per request
+        
+        Batches share the embedding model's rate limit and are retried under
+        the Gemini retry policy.
+        
+        Args:
+            texts: Texts to embed
+            task_type: Embedding task type
+            batch_size: Texts per request (defaults to EMBEDDING_BATCH_SIZE)
+            
+        Returns:
+            One embedding per text, in input order
+            
+        Raises:
+            Exception: The provider error once retries are exhausted
+        """
+        if not texts:
+            return []
+        if not self.cassette.offline:
+            self.ensure_configured()
+        batch_size = max(1, min(batch_size or settings.EMBEDDING_BATCH_SIZE, MAX_EMBEDDING_BATCH_SIZE))
+        limiter = get_rate_limiter("google", self.gemini_embedding_model)
+        
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), batch_size):
+            batch = list(texts[start:start + batch_size])
+            
+            def embed() -> List[List[float]]:
+                if not self.cassette.offline:
+                    limiter.acquire(estimate_prompt_tokens(batch))
+                return self._embed_content(batch, task_type)
+            
+            try:
+                embeddings = self.retry_policy.call(embed)
+            except Exception as e:
+                logger.error(f"Error generating embeddings for texts {start}-{start + len(batch) - 1}: {e}")
+                raise
+            if len(embeddings) != len(batch):
+                raise LLMConnectionError(f"Expected {len(batch)} embeddings, received {len(embeddings)}")
+            vectors.extend(embeddings)
+        
+        logger.info(f"Generated {len(vectors)} embeddings in {-(-len(texts) // batch_size)} requests")
+        return vectors
+    
     # LangChain Integration Methods (for multi-agent system)
     
     def create_langchain_llm(self,
@@ -219,8 +641,11 @@ class LLMManager:
             return None
         
         model_name = model_name or self.gemini_model
+        # Retries are owned by the shared retry policy, not the client
+        kwargs.setdefault("max_retries", 0)
+        kwargs.setdefault("timeout", settings.LLM_ATTEMPT_TIMEOUT_SECONDS)
         
-        try:
+        def build():
             llm = ChatGoogleGenerativeAI(
                 model=model_name,
                 temperature=temperature,
@@ -230,6 +655,12 @@ class LLMManager:
             )
             logger.info(f"Created LangChain LLM instance with model: {model_name}")
             return llm
+        
+        try:
+            return self.clients.get_or_create(
+                KIND_LANGCHAIN, "google", model_name, build,
+                temperature=temperature, max_tokens=max_tokens, **kwargs
+            )
         except Exception as e:
             logger.error(f"Failed to create LangChain LLM instance: {e}")
             raise LLMConnectionError(f"Failed to create LangChain LLM: {e}")
@@ -240,47 +671,87 @@ class LLMManager:
             self.llm_instance = self.create_langchain_llm()
         return self.llm_instance
     
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+    @property
+    def rate_limiter(self):
+        """Process-wide rate limiter shared by every caller of the configured Gemini model"""
+        return get_rate_limiter("google", self.gemini_model)
 
-        self.last_request_time = time.time()
+    def _enforce_rate_limit(self, content: Any = None, model_name: Optional[str] = None):
+        """Block until the shared request and token budgets allow this request"""
+        get_rate_limiter("google", model_name or self.gemini_model).acquire(estimate_prompt_tokens(content))
     
-    def invoke_with_retry(self, prompt: str, use_langchain: bool = False, **kwargs) -> str:
+    def invoke_with_retry(self,
+                          prompt: str,
+                          use_langchain: bool = False,
+                          use_cache: bool = True,
+                          task: Optional[str] = None,
+                          validate=None,
+                          **kwargs) -> str:
         """
         Invoke LLM with retry logic and rate limiting
         
         Args:
             prompt: Input prompt
             use_langchain: Whether to use LangChain or direct API
+            use_cache: Whether to serve and store the response in the response cache
+            task: Task type used for model routing on the direct API
+            validate: Optional callable; invalid responses escalate to the next routed model
+                (the LangChain path is not routed, so there they are returned but not cached)
             **kwargs: Additional parameters
             
         Returns:
             Model response as string
         """
-        self._enforce_rate_limit()
-        
         if use_langchain and LANGCHAIN_AVAILABLE:
-            llm = self.get_default_langchain_llm()
-            if llm:
+            # Pure replay never reaches the provider, so no client is needed
+            llm = None if self.cassette.offline else self.get_default_langchain_llm()
+            if llm or self.cassette.offline:
+                request_key = self.cache.make_key(
+                    self.gemini_model, prompt, params={"client": "langchain", **kwargs}
+                )
+                # Cassette runs bypass the cache so every request is recorded or replayed
+                use_cache = use_cache and self.cache.enabled and not self.cassette.enabled
+                if use_cache:
+                    cached = self.cache.get(request_key)
+                    if cached is not None:
+                        logger.info("LLM cache hit, skipping LangChain request")
+                        self.telemetry.record_cache_hit("llm_manager", "google", self.gemini_model, task=task)
+                        return cached
+
+                def attempt() -> str:
+                    breaker = self._allow_gemini_request()
+                    if not self.cassette.offline:
+                        self._enforce_rate_limit(prompt)
+                    try:
+                        with self.telemetry.track("llm_manager", "google", self.gemini_model, prompt, task=task) as call:
+                            def request() -> str:
+                                response = llm.invoke(prompt, **kwargs)
+                                call.set_response(response)
+                                return response.content
+
+                            text = self.cassette.play(request_key, self.gemini_model, prompt, request)
+                            call.add_output(text)
+                    except Exception as e:
+                        self._record_gemini_outcome(breaker, e)
+                        raise
+                    self._record_gemini_outcome(breaker)
+                    return text
+
+                def call_model() -> str:
+                    text = self.retry_policy.call(attempt)
+                    if use_cache and text and (validate is None or validate(text)):
+                        self.cache.set(request_key, text)
+                    return text
+
                 try:
-                    response = llm.invoke(prompt, **kwargs)
-                    return response.content
+                    return llm_request_flight.do(request_key, call_model)
                 except Exception as e:
                     logger.error(f"LangChain LLM invocation failed: {e}")
                     raise
         
         # Fallback to direct API
         try:
-            model = genai.GenerativeModel(self.gemini_model)
-            response = model.generate_content(prompt)
-            return response.text
+            return self._generate_for_task(task or TASK_DEFAULT, prompt, use_cache=use_cache, validate=validate)
         except Exception as e:
             logger.error(f"Direct Gemini API invocation failed: {e}")
             raise
@@ -306,11 +777,26 @@ class LLMManager:
         
         return markdown_string
     
-    def test_connection(self) -> bool:
-        """Test LLM connection with a simple prompt"""
+    def test_connection(self, force: bool = False) -> bool:
+        """
+        Test LLM connection with a simple prompt
+        
+        The result is cached for LLM_HEALTH_CHECK_TTL_SECONDS and shared with
+        every other component testing the Gemini connection.
+        
+        Args:
+            force: Probe even if a fresh cached result exists
+            
+        Returns:
+            True if connection successful, False otherwise
+        """
+        return connection_health.check("google", self._probe_connection, force=force)
+    
+    def _probe_connection(self) -> bool:
+        """Send a real test prompt to Gemini, bypassing the response cache"""
         try:
             test_prompt = "Hello, respond with 'OK' if you can receive this message."
-            response = self.invoke_with_retry(test_prompt)
+            response = self.invoke_with_retry(test_prompt, use_cache=False)
             
             if "OK" in response.upper():
                 logger.info("LLM connection test passed")
@@ -329,17 +815,22 @@ class LLMManager:
             "gemini_model": self.gemini_model,
             "embedding_model": self.gemini_embedding_model,
             "langchain_available": LANGCHAIN_AVAILABLE,
-            "rate_limit_interval": self.min_request_interval,
-            "api_configured": bool(os.getenv("GOOGLE_API_KEY"))
+            "rate_limit": self.rate_limiter.get_stats(),
+            "routing": self.router.get_stats(),
+            "api_configured": bool(os.getenv("GOOGLE_API_KEY")),
+            "connection_health": connection_health.get_stats(),
+            "clients": self.clients.get_stats(),
+            "cassette": self.cassette.get_stats(),
+            "cache_enabled": self.cache.enabled
         }
     
-    @retry_with_backoff()
-    def generate_founder_responses(self, prompt: str) -> str:
+    def generate_founder_responses(self, prompt: str, use_cache: bool = True) -> str:
         """
         Generate founder responses for questionnaire simulation
         
         Args:
             prompt: Formatted prompt for founder response simulation
+            use_cache: Whether to serve and store the response in the response cache
             
         Returns:
             Generated response string
@@ -347,21 +838,126 @@ class LLMManager:
         try:
             logger.info("Generating founder responses using Gemini...")
             
-            # Rate limiting
-            self._enforce_rate_limit()
-            
-            model = genai.GenerativeModel(self.gemini_model)
-            response = model.generate_content(prompt)
+            response_text = self._generate_for_task(
+                TASK_FOUNDER_SIMULATION, prompt, use_cache=use_cache, validate=has_numbered_answers
+            )
             
-            if not response or not response.text:
+            if not response_text:
                 raise LLMConnectionError("Empty response from Gemini API")
             
             logger.info("Successfully generated founder responses")
-            return response.text.strip()
+            return response_text.strip()
             
         except Exception as e:
             logger.error(f"Error generating founder responses: {e}")
-            raise LLMConnectionError(f"Failed to generate founder responses: {e}")
+            raise LLMConnectionError(f"Failed to generate founder responses: {e}") from e
+    
+    # Async Gemini API Methods (for fanning out many calls from one event loop)
+    
+    async def aextract_metadata(self, page_images: List[Image.Image], use_cache: bool = True) -> Optional[Dict[str, Any]]:
+        """Async version of extract_metadata"""
+        try:
+            logger.info("Extracting metadata from pitch deck (async)...")
+            response_text = await self._agenerate_for_task(
+                TASK_METADATA_EXTRACTION,
+                self._metadata_content(page_images),
+                use_cache=use_cache,
+                validate=self._is_valid_metadata_response
+            )
+            
+            metadata = self._parse_json_response(response_text)
+            if metadata is None:
+                raise ValueError("Model response did not contain a valid JSON object")
+            logger.info("Successfully extracted metadata")
+            return metadata
+            
+        except Exception as e:
+            logger.error(f"Error extracting metadata: {e}")
+            return None
+    
+    async def aextract_topic_data(self, topic: str, page_images: List[Image.Image], use_cache: bool = True) -> str:
+        """Async version of extract_topic_data"""
+        try:
+            return await self._agenerate_for_task(
+                TASK_TOPIC_EXTRACTION,
+                self._topic_content(topic, page_images),
+                use_cache=use_cache,
+                validate=self._is_valid_topic_response
+            )
+        except Exception as e:
+            logger.error(f"Error extracting topic data for '{topic}': {e}")
+            raise
+    
+    async def aextract_topics_batch(self,
+                                    page_images: List[Image.Image],
+                                    toc: Dict[str, List[int]],
+                                    use_cache: bool = True) -> Dict[str, str]:
+        """Async version of extract_topics_batch; topic groups are requested concurrently"""
+        async def extract(topics: Dict[str, List[int]]) -> Dict[str, str]:
+            try:
+                response_text = await self._agenerate_for_task(
+                    TASK_TOPIC_EXTRACTION,
+                    self._multi_topic_content(topics, page_images),
+                    use_cache=use_cache,
+                    validate=is_json_object
+                )
+            except Exception as e:
+                logger.error(f"Multi-topic extraction failed for {list(topics)}: {e}")
+                return {}
+            return self._match_topic_results(topics, response_text)
+
+        results = {}
+        for group_results in await asyncio.gather(*(extract(t) for t in self._topic_batches(toc, page_images))):
+            results.update(group_results)
+        return results
+    
+    async def astructure_document_content(self, text: str, filename: str, use_cache: bool = True) -> str:
+        """Async version of structure_document_content"""
+        try:
+            return await self._agenerate_for_task(
+                TASK_DOCUMENT_STRUCTURING,
+                self._structuring_prompt(text, filename),
+                use_cache=use_cache
+            )
+        except Exception as e:
+            logger.error(f"Error structuring document content: {e}")
+            return text  # Return original text if LLM processing fails
+    
+    async def agenerate_founder_responses(self, prompt: str, use_cache: bool = True) -> str:
+        """Async version of generate_founder_responses"""
+        try:
+            response_text = await self._agenerate_for_task(
+                TASK_FOUNDER_SIMULATION, prompt, use_cache=use_cache, validate=has_numbered_answers
+            )
+            if not response_text:
+                raise LLMConnectionError("Empty response from Gemini API")
+            return response_text.strip()
+        except Exception as e:
+            logger.error(f"Error generating founder responses: {e}")
+            raise LLMConnectionError(f"Failed to generate founder responses: {e}") from e
+    
+    async def ainvoke(self,
+                      prompt: str,
+                      use_cache: bool = True,
+                      task: Optional[str] = None,
+                      validate=None) -> str:
+        """
+        Async invoke of the direct Gemini API with rate limiting and bounded concurrency
+        
+        Args:
+            prompt: Input prompt
+            use_cache: Whether to serve and store the response in the response cache
+            task: Task type used for model routing
+            validate: Optional callable; invalid responses escalate to the next routed model
+            
+        Returns:
+            Model response as string
+        """
+        try:
+            return await self._agenerate_for_task(task or TASK_DEFAULT, prompt, use_cache=use_cache, validate=validate)
+        except Exception as e:
+            logger.error(f"Async Gemini API invocation failed: {e}")
+            raise
 
 # Global instance for backward compatibility
 llm_manager = LLMManager()
@@ -6,18 +6,28 @@ This module handles LLM initialization, rate limiting, and error handling.
 """
 
 import logging
-import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Iterator
 import asyncio
-from functools import wraps
+import time
 
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_groq import ChatGroq
 from langchain_core.language_models import BaseLanguageModel
 # from langchain_google_genai.chat_models import HarmCategory, HarmBlockThreshold
-import google.generativeai as genai
 
 from config.settings import settings
+from src.utils.llm_cache import get_llm_cache
+from src.utils.rate_limiter import get_rate_limiter, estimate_prompt_tokens
+from src.utils.single_flight import llm_request_flight
+from src.utils.model_router import get_model_router
+from src.utils.connection_health import connection_health
+from src.utils.llm_telemetry import get_llm_telemetry, task_context
+from src.utils.retry_policy import get_retry_policy
+from src.utils.client_registry import get_client_registry, KIND_LANGCHAIN
+from src.utils.llm_cassette import get_llm_cassette
+from src.utils.circuit_breaker import (
+    get_circuit_breaker, is_provider_failure, CircuitBreakerOpenError, CLOSED
+)
 
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
@@ -33,43 +43,6 @@ class LLMConnectionError(Exception):
     pass
 
 
-def retry_on_failure(max_retries: int = 3, delay: float = 1.0):
-    """Decorator for retrying failed LLM calls"""
-    def decorator(func):
-        @wraps(func)
-        async def async_wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries):
-                try:
-                    return await func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_retries - 1:
-                        logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay}s...")
-                        await asyncio.sleep(delay * (2 ** attempt))  # Exponential backoff
-                    else:
-                        logger.error(f"All {max_retries} attempts failed")
-            raise last_exception
-
-        @wraps(func)
-        def sync_wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    last_exception = e
-                    if attempt < max_retries - 1:
-                        logger.warning(f"Attempt {attempt + 1} failed: {e}. Retrying in {delay}s...")
-                        time.sleep(delay * (2 ** attempt))  # Exponential backoff
-                    else:
-                        logger.error(f"All {max_retries} attempts failed")
-            raise last_exception
-
-        return async_wrapper if asyncio.iscoroutinefunction(func) else sync_wrapper
-    return decorator
-
-
 class LLMSetup:
     """
     Handles LLM initialization and configuration for multiple providers (Google AI, Groq)
@@ -77,10 +50,23 @@ class LLMSetup:
 
     def __init__(self):
         self.llm: Optional[BaseLanguageModel] = None
-        self.last_request_time = 0
-        self.min_request_interval = 1.0  # Minimum seconds between requests
         self.provider = settings.LLM_PROVIDER.lower()
-        self._initialize_provider()
+        self.cache = get_llm_cache()
+        self.router = get_model_router()
+        self.telemetry = get_llm_telemetry()
+        self.clients = get_client_registry()
+        self.cassette = get_llm_cassette()
+        self._task_llms: Dict[str, BaseLanguageModel] = {}
+        self._fallback_llms: Dict[str, BaseLanguageModel] = {}
+
+        # The provider is initialized on first use so importing this module does no work
+        self._initialized = False
+
+    def _ensure_initialized(self):
+        """Initialize the configured provider once, before the first LLM is created"""
+        if not self._initialized:
+            self._initialize_provider()
+            self._initialized = True
 
     def _initialize_provider(self):
         """Initialize the configured LLM provider"""
@@ -93,11 +79,14 @@ class LLMSetup:
 
     def _initialize_genai(self):
         """Initialize Google Generative AI client"""
+        if self.cassette.offline:
+            logger.info("Cassette replay mode: Google AI client not configured")
+            return
         if not settings.GOOGLE_API_KEY:
             raise LLMConnectionError("Google API key not found in environment variables")
 
         try:
-            genai.configure(api_key=settings.GOOGLE_API_KEY)
+            self.clients.configure_genai(settings.GOOGLE_API_KEY)
             logger.info("Google Generative AI client initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize Google AI client: {e}")
@@ -105,6 +94,9 @@ class LLMSetup:
 
     def _initialize_groq(self):
         """Initialize Groq API client"""
+        if self.cassette.offline:
+            logger.info("Cassette replay mode: Groq client not configured")
+            return
         if not settings.GROQ_API_KEY:
             raise LLMConnectionError("Groq API key not found in environment variables")
 
@@ -124,6 +116,9 @@ class LLMSetup:
         """
         Create and configure LLM instance for the specified provider
 
+        Instances are shared through the client registry: identical settings
+        return the same long-lived client and its open connections.
+
         Args:
             model_name: Model name (defaults based on provider)
             temperature: Sampling temperature (defaults based on provider)
@@ -134,6 +129,7 @@ class LLMSetup:
         Returns:
             Configured LLM instance
         """
+        self._ensure_initialized()
         provider = provider or self.provider
 
         if provider == "google":
@@ -152,8 +148,14 @@ class LLMSetup:
         model_name = model_name or settings.GEMINI_MODEL
         temperature = temperature if temperature is not None else settings.GEMINI_TEMPERATURE
         max_tokens = max_tokens or settings.GEMINI_MAX_TOKENS
-
-        try:
+        # Retries are owned by the shared retry policy, not the client
+        kwargs.setdefault("max_retries", 0)
+        kwargs.setdefault("timeout", settings.LLM_ATTEMPT_TIMEOUT_SECONDS)
+        if self.cassette.offline and not settings.GOOGLE_API_KEY:
+            # Replayed clients never reach the provider but still need a key to construct
+            kwargs.setdefault("google_api_key", "cassette-replay")
+
+        def build() -> ChatGoogleGenerativeAI:
             llm = ChatGoogleGenerativeAI(
                 model=model_name,
                 temperature=temperature,
@@ -163,6 +165,12 @@ class LLMSetup:
             )
             logger.info(f"Created Google AI LLM instance with model: {model_name}")
             return llm
+
+        try:
+            return self.clients.get_or_create(
+                KIND_LANGCHAIN, "google", model_name, build,
+                temperature=temperature, max_tokens=max_tokens, **kwargs
+            )
         except Exception as e:
             logger.error(f"Failed to create Google AI LLM instance: {e}")
             raise LLMConnectionError(f"Failed to create Google AI LLM: {e}")
@@ -176,17 +184,26 @@ class LLMSetup:
         model_name = model_name or settings.GROQ_MODEL
         temperature = temperature if temperature is not None else settings.GROQ_TEMPERATURE
         max_tokens = max_tokens or settings.GROQ_MAX_TOKENS
+        # Retries are owned by the shared retry policy, not the client
+        kwargs.setdefault("max_retries", 0)
+        kwargs.setdefault("timeout", settings.LLM_ATTEMPT_TIMEOUT_SECONDS)
 
-        try:
+        def build() -> ChatGroq:
             llm = ChatGroq(
                 model=model_name,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                groq_api_key=settings.GROQ_API_KEY,
+                groq_api_key=settings.GROQ_API_KEY or ("cassette-replay" if self.cassette.offline else None),
                 **kwargs
             )
             logger.info(f"Created Groq LLM instance with model: {model_name}")
             return llm
+
+        try:
+            return self.clients.get_or_create(
+                KIND_LANGCHAIN, "groq", model_name, build,
+                temperature=temperature, max_tokens=max_tokens, **kwargs
+            )
         except Exception as e:
             logger.error(f"Failed to create Groq LLM instance: {e}")
             raise LLMConnectionError(f"Failed to create Groq LLM: {e}")
@@ -197,83 +214,477 @@ class LLMSetup:
             self.llm = self.create_llm()
         return self.llm
 
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+    def create_llm_for_task(self, task: str, **kwargs) -> BaseLanguageModel:
+        """
+        Create an LLM instance on the model routed for a task
+
+        Args:
+            task: Task type used for model routing
+            **kwargs: Additional parameters for create_llm
+
+        Returns:
+            Configured LLM instance
+        """
+        if (kwargs.get("provider") or self.provider) == "google" and not kwargs.get("model_name"):
+            kwargs["model_name"] = self.router.primary(task)
+        return self.create_llm(**kwargs)
+
+    def get_llm_for_task(self, task: str, model_name: Optional[str] = None) -> BaseLanguageModel:
+        """
+        Get a shared LLM instance for a task
+
+        Routing only applies to Google models; other providers use the default LLM.
+
+        Args:
+            task: Task type used for model routing
+            model_name: Explicit model from the task's route (defaults to its first model)
+
+        Returns:
+            LLM instance
+        """
+        if self.provider != "google":
+            return self.get_default_llm()
+
+        model_name = model_name or self.router.primary(task)
+        llm = self._task_llms.get(model_name)
+        if llm is None:
+            llm = self.create_llm(model_name=model_name)
+            self._task_llms[model_name] = llm
+        return llm
+
+    def _llm_identity(self, llm: BaseLanguageModel) -> tuple:
+        """Get the (provider, model name) pair an LLM instance talks to"""
+        if isinstance(llm, ChatGroq):
+            provider = "groq"
+        elif isinstance(llm, ChatGoogleGenerativeAI):
+            provider = "google"
+        else:
+            provider = self.provider
+        model_name = getattr(llm, "model", None) or getattr(llm, "model_name", None) or type(llm).__name__
+        return provider, str(model_name)
+
+    def _enforce_rate_limit(self, llm: BaseLanguageModel, prompt: str):
+        """Block until the shared provider/model budgets allow this request"""
+        provider, model_name = self._llm_identity(llm)
+        get_rate_limiter(provider, model_name).acquire(estimate_prompt_tokens(prompt))
+
+    async def _aenforce_rate_limit(self, llm: BaseLanguageModel, prompt: str):
+        """Wait without blocking the event loop until the shared budgets allow this request"""
+        provider, model_name = self._llm_identity(llm)
+        await get_rate_limiter(provider, model_name).acquire_async(estimate_prompt_tokens(prompt))
+
+    def _request_key(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> Optional[str]:
+        """
+        Build the request key used for response caching and in-flight coalescing
+
+        Returns None for mock LLMs, whose canned responses must not be shared.
+        """
+        if isinstance(llm, MockLLM):
+            return None
+
+        _, model_name = self._llm_identity(llm)
+        params = {
+            "client": type(llm).__name__,
+            "temperature": getattr(llm, "temperature", None),
+            "max_tokens": getattr(llm, "max_tokens", None) or getattr(llm, "max_output_tokens", None),
+            **kwargs
+        }
+        return self.cache.make_key(model_name, prompt, params=params)
+
+    def _get_fallback_llm(self, failed_provider: str) -> Optional[BaseLanguageModel]:
+        """
+        Get the LLM to fail over to while a provider's circuit is open
+
+        Args:
+            failed_provider: Provider whose circuit is open
+
+        Returns:
+            Fallback LLM instance, or None if failover is disabled or not configured
+        """
+        provider = (settings.LLM_FALLBACK_PROVIDER or "").lower()
+        if not provider or provider == failed_provider:
+            return None
+        api_key = settings.GOOGLE_API_KEY if provider == "google" else settings.GROQ_API_KEY
+        if not api_key:
+            logger.warning(f"Fallback provider '{provider}' has no API key configured")
+            return None
+
+        llm = self._fallback_llms.get(provider)
+        if llm is None:
+            llm = self.create_llm(provider=provider, model_name=settings.LLM_FALLBACK_MODEL or None)
+            self._fallback_llms[provider] = llm
+        return llm
+
+    def _invoke_tracked(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> str:
+        """
+        Invoke an LLM through the cassette, recording the call in the telemetry registry
+
+        Returns:
+            Response text
+        """
+        provider, model_name = self._llm_identity(llm)
+        with self.telemetry.track("llm_setup", provider, model_name, prompt) as call:
+            def request() -> str:
+                response = llm.invoke(prompt, **kwargs)
+                call.set_response(response)
+                return response.content
+
+            key = self._request_key(llm, prompt, **kwargs)
+            content = request() if key is None else self.cassette.play(key, model_name, prompt, request)
+            call.add_output(content)
+        return content
+
+    async def _ainvoke_tracked(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> str:
+        """Async counterpart of _invoke_tracked"""
+        provider, model_name = self._llm_identity(llm)
+        with self.telemetry.track("llm_setup", provider, model_name, prompt) as call:
+            async def request() -> str:
+                response = await llm.ainvoke(prompt, **kwargs)
+                call.set_response(response)
+                return response.content
+
+            key = self._request_key(llm, prompt, **kwargs)
+            content = await request() if key is None else await self.cassette.aplay(key, model_name, prompt, request)
+            call.add_output(content)
+        return content
+
+    def _record_outcome(self, breaker, error: Optional[BaseException] = None):
+        """Report a call outcome to a breaker; only provider-side errors count as failures"""
+        if error is not None and is_provider_failure(error):
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    def _invoke_guarded(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> tuple:
+        """
+        Invoke an LLM behind its provider's circuit breaker, failing over when it is open
+
+        A provider failure that opens the circuit is retried once on the fallback
+        provider right away; failures that leave it closed are re-raised for retry.
+
+        Returns:
+            (response text, True if the primary LLM answered)
+        """
+        if isinstance(llm, MockLLM):
+            self._enforce_rate_limit(llm, prompt)
+            return llm.invoke(prompt, **kwargs).content, True
+
+        provider, _ = self._llm_identity(llm)
+        breaker = get_circuit_breaker(provider)
+        if breaker.allow_request():
+            try:
+                self._enforce_rate_limit(llm, prompt)
+                content = self._invoke_tracked(llm, prompt, **kwargs)
+            except Exception as e:
+                self._record_outcome(breaker, e)
+                if not is_provider_failure(e) or breaker.state == CLOSED:
+                    raise
+                logger.warning(f"Provider '{provider}' circuit opened after: {e}")
+            else:
+                breaker.record_success()
+                return content, True
+
+        fallback = self._get_fallback_llm(provider)
+        if fallback is None:
+            raise CircuitBreakerOpenError(f"Circuit for provider '{provider}' is open and no fallback is available")
+
+        fallback_provider, fallback_model = self._llm_identity(fallback)
+        fallback_breaker = get_circuit_breaker(fallback_provider)
+        if not fallback_breaker.allow_request():
+            raise CircuitBreakerOpenError(
+                f"Circuits for provider '{provider}' and fallback '{fallback_provider}' are both open"
+            )
 
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+        logger.info(f"Failing over from '{provider}' to {fallback_provider}/{fallback_model}")
+        try:
+            self._enforce_rate_limit(fallback, prompt)
+            content = self._invoke_tracked(fallback, prompt, **kwargs)
+        except Exception as e:
+            self._record_outcome(fallback_breaker, e)
+            raise
+        fallback_breaker.record_success()
+        return content, False
+
+    async def _ainvoke_guarded(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> tuple:
+        """Async counterpart of _invoke_guarded"""
+        if isinstance(llm, MockLLM):
+            await self._aenforce_rate_limit(llm, prompt)
+            return (await llm.ainvoke(prompt, **kwargs)).content, True
+
+        provider, _ = self._llm_identity(llm)
+        breaker = get_circuit_breaker(provider)
+        if breaker.allow_request():
+            try:
+                await self._aenforce_rate_limit(llm, prompt)
+                content = await self._ainvoke_tracked(llm, prompt, **kwargs)
+            except Exception as e:
+                self._record_outcome(breaker, e)
+                if not is_provider_failure(e) or breaker.state == CLOSED:
+                    raise
+                logger.warning(f"Provider '{provider}' circuit opened after: {e}")
+            else:
+                breaker.record_success()
+                return content, True
+
+        fallback = self._get_fallback_llm(provider)
+        if fallback is None:
+            raise CircuitBreakerOpenError(f"Circuit for provider '{provider}' is open and no fallback is available")
+
+        fallback_provider, fallback_model = self._llm_identity(fallback)
+        fallback_breaker = get_circuit_breaker(fallback_provider)
+        if not fallback_breaker.allow_request():
+            raise CircuitBreakerOpenError(
+                f"Circuits for provider '{provider}' and fallback '{fallback_provider}' are both open"
+            )
 
-        self.last_request_time = time.time()
+        logger.info(f"Failing over from '{provider}' to {fallback_provider}/{fallback_model}")
+        try:
+            await self._aenforce_rate_limit(fallback, prompt)
+            content = await self._ainvoke_tracked(fallback, prompt, **kwargs)
+        except Exception as e:
+            self._record_outcome(fallback_breaker, e)
+            raise
+        fallback_breaker.record_success()
+        return content, False
 
-    @retry_on_failure(max_retries=3, delay=1.0)
-    def invoke_with_retry(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> str:
+    def invoke_with_retry(self, llm: BaseLanguageModel, prompt: str, use_cache: bool = True, **kwargs) -> str:
         """
         Invoke LLM with retry logic and rate limiting
 
+        Transient provider errors are retried under the provider's retry policy.
+
         Args:
             llm: Language model instance
             prompt: Input prompt
+            use_cache: Whether to serve and store the response in the response cache
             **kwargs: Additional parameters for the model
 
         Returns:
             Model response as string
         """
-        self._enforce_rate_limit()
+        request_key = self._request_key(llm, prompt, **kwargs)
+        # Cassette runs bypass the cache so every request is recorded or replayed
+        use_cache = use_cache and self.cache.enabled and request_key is not None and not self.cassette.enabled
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                logger.info("LLM cache hit, skipping provider request")
+                self.telemetry.record_cache_hit("llm_setup", *self._llm_identity(llm))
+                return cached
+
+        policy = get_retry_policy(self._llm_identity(llm)[0])
+
+        def call_model() -> str:
+            content, from_primary = policy.call(self._invoke_guarded, llm, prompt, **kwargs)
+            logger.debug(f"LLM invocation successful. Response length: {len(content)}")
+            # Fallback answers are not cached under the primary model's key
+            if use_cache and content and from_primary:
+                self.cache.set(request_key, content)
+            return content
 
         try:
-            response = llm.invoke(prompt, **kwargs)
-            logger.debug(f"LLM invocation successful. Response length: {len(response.content)}")
-            return response.content
+            if request_key is None:
+                return call_model()
+            return llm_request_flight.do(request_key, call_model)
         except Exception as e:
             logger.error(f"LLM invocation failed: {e}")
             raise
 
-    async def ainvoke_with_retry(self, llm: BaseLanguageModel, prompt: str, **kwargs) -> str:
+    def invoke_with_cascade(self,
+                            task: str,
+                            prompt: str,
+                            llm: Optional[BaseLanguageModel] = None,
+                            validate=None,
+                            use_cache: bool = True,
+                            **kwargs) -> str:
         """
-        Async invoke LLM with retry logic and rate limiting
+        Invoke an LLM for a task, escalating to stronger routed models on invalid output
 
         Args:
-            llm: Language model instance
+            task: Task type used for model routing
             prompt: Input prompt
+            llm: LLM to try first (defaults to the task's routed LLM)
+            validate: Optional callable deciding whether a response is acceptable
+            use_cache: Whether to serve and store responses in the response cache
             **kwargs: Additional parameters for the model
 
         Returns:
             Model response as string
         """
-        # Async rate limiting
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        llm = llm or self.get_llm_for_task(task)
+        provider, model_name = self._llm_identity(llm)
+        if validate is None or provider != "google" or isinstance(llm, MockLLM):
+            with task_context(task):
+                return self.invoke_with_retry(llm, prompt, use_cache=use_cache, **kwargs)
 
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
-            logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            await asyncio.sleep(sleep_time)
+        def call(target_model: str) -> str:
+            target = llm if target_model == model_name else self.get_llm_for_task(task, target_model)
+            return self.invoke_with_retry(target, prompt, use_cache=use_cache, **kwargs)
+
+        models = [model_name] + self.router.escalations_after(task, model_name)
+        return self.router.run_cascade(task, call, validate, models=models)
+
+    async def ainvoke_with_retry(self, llm: BaseLanguageModel, prompt: str, use_cache: bool = True, **kwargs) -> str:
+        """
+        Async invoke LLM with retry logic and rate limiting
+
+        Args:
+            llm: Language model instance
+            prompt: Input prompt
+            use_cache: Whether to serve and store the response in the response cache
+            **kwargs: Additional parameters for the model
 
-        self.last_request_time = time.time()
+        Returns:
+            Model response as string
+        """
+        request_key = self._request_key(llm, prompt, **kwargs)
+        # Cassette runs bypass the cache so every request is recorded or replayed
+        use_cache = use_cache and self.cache.enabled and request_key is not None and not self.cassette.enabled
+        if use_cache:
+            cached = await asyncio.to_thread(self.cache.get, request_key)
+            if cached is not None:
+                logger.info("LLM cache hit, skipping provider request")
+                self.telemetry.record_cache_hit("llm_setup", *self._llm_identity(llm))
+                return cached
+
+        policy = get_retry_policy(self._llm_identity(llm)[0])
+
+        async def call_model() -> str:
+            content, from_primary = await policy.acall(self._ainvoke_guarded, llm, prompt, **kwargs)
+            logger.debug(f"Async LLM invocation successful. Response length: {len(content)}")
+            # Fallback answers are not cached under the primary model's key
+            if use_cache and content and from_primary:
+                await asyncio.to_thread(self.cache.set, request_key, content)
+            return content
 
         try:
-            response = await llm.ainvoke(prompt, **kwargs)
-            logger.debug(f"Async LLM invocation successful. Response length: {len(response.content)}")
-            return response.content
+            if request_key is None:
+                return await call_model()
+            return await llm_request_flight.do_async(request_key, call_model)
         except Exception as e:
             logger.error(f"Async LLM invocation failed: {e}")
             raise
 
-    def test_connection(self) -> bool:
+    def stream_with_retry(self, llm: BaseLanguageModel, prompt: str, use_cache: bool = True, **kwargs) -> Iterator[str]:
+        """
+        Stream an LLM response chunk by chunk with retries and rate limiting
+
+        Transient provider errors raised before the first chunk are retried under
+        the provider's retry policy; a stream that fails after yielding output is
+        not restarted. A cached response is yielded as a single chunk. A streamed
+        response is stored in the cache only once the stream has completed.
+        Streams are not coalesced, since partial output cannot be shared between
+        callers.
+
+        Args:
+            llm: Language model instance
+            prompt: Input prompt
+            use_cache: Whether to serve and store the response in the response cache
+            **kwargs: Additional parameters for the model
+
+        Yields:
+            Response text chunks
+        """
+        request_key = self._request_key(llm, prompt, **kwargs)
+        # Cassette runs bypass the cache so every request is recorded or replayed
+        use_cache = use_cache and self.cache.enabled and request_key is not None and not self.cassette.enabled
+        if use_cache:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                logger.info("LLM cache hit, skipping provider request")
+                self.telemetry.record_cache_hit("llm_setup", *self._llm_identity(llm))
+                yield cached
+                return
+
+        replay = self.cassette.replay_stream(request_key) if request_key is not None else None
+        if replay is not None:
+            with self.telemetry.track("llm_setup", *self._llm_identity(llm), prompt) as call:
+                for text in replay:
+                    call.add_output(text)
+                    yield text
+            return
+
+        policy = get_retry_policy(self._llm_identity(llm)[0])
+
+        if not hasattr(llm, "stream"):
+            content, from_primary = policy.call(self._invoke_guarded, llm, prompt, **kwargs)
+            if use_cache and content and from_primary:
+                self.cache.set(request_key, content)
+            yield content
+            return
+
+        # The attempt that produced output, so the completed stream is stored under the right model
+        outcome = {}
+
+        def attempt() -> Iterator[str]:
+            # Streams start on the fallback provider while the primary circuit is open
+            target, breaker = llm, None
+            if not isinstance(llm, MockLLM):
+                provider, _ = self._llm_identity(llm)
+                breaker = get_circuit_breaker(provider)
+                if not breaker.allow_request():
+                    target = self._get_fallback_llm(provider)
+                    if target is None:
+                        raise CircuitBreakerOpenError(f"Circuit for provider '{provider}' is open and no fallback is available")
+                    breaker = get_circuit_breaker(self._llm_identity(target)[0])
+                    logger.info(f"Streaming from fallback {'/'.join(self._llm_identity(target))}")
+
+            self._enforce_rate_limit(target, prompt)
+
+            parts = []
+            outcome.update(target=target, parts=parts)
+            try:
+                with self.telemetry.track("llm_setup", *self._llm_identity(target), prompt) as call:
+                    for chunk in target.stream(prompt, **kwargs):
+                        text = getattr(chunk, "content", chunk)
+                        if not isinstance(text, str):
+                            text = str(text)
+                        if text:
+                            call.add_output(text)
+                            parts.append(text)
+                            yield text
+            except Exception as e:
+                if breaker:
+                    self._record_outcome(breaker, e)
+                logger.error(f"LLM stream failed after {sum(len(p) for p in parts)} characters: {e}")
+                raise
+
+            if breaker:
+                breaker.record_success()
+
+        started = time.monotonic()
+        yield from policy.stream(attempt)
+
+        target, parts = outcome.get("target"), outcome.get("parts")
+        if not parts:
+            return
+        logger.debug(f"LLM stream completed. Response length: {sum(len(p) for p in parts)}")
+        if use_cache and target is llm:
+            self.cache.set(request_key, "".join(parts))
+        if self.cassette.records_streams and target is llm and request_key is not None:
+            self.cassette.save(request_key, self._llm_identity(llm)[1], prompt, "".join(parts), time.monotonic() - started)
+
+    def test_connection(self, force: bool = False) -> bool:
         """
         Test LLM connection with a simple prompt
 
+        The result is cached for LLM_HEALTH_CHECK_TTL_SECONDS and shared with
+        every other component testing the same provider.
+
+        Args:
+            force: Probe even if a fresh cached result exists
+
         Returns:
             True if connection successful, False otherwise
         """
+        return connection_health.check(self.provider, self._probe_connection, force=force)
+
+    def _probe_connection(self) -> bool:
+        """Send a real test prompt to the configured provider, bypassing the response cache"""
         try:
             llm = self.get_default_llm()
             test_prompt = "Hello, respond with 'OK' if you can receive this message."
-            response = self.invoke_with_retry(llm, test_prompt)
+            response = self.invoke_with_retry(llm, test_prompt, use_cache=False)
 
             if "OK" in response.upper():
                 logger.info("LLM connection test passed")
@@ -296,7 +707,13 @@ class LLMSetup:
                 "max_tokens": settings.GEMINI_MAX_TOKENS,
                 "retry_attempts": settings.GEMINI_RETRY_ATTEMPTS,
                 "retry_delay": settings.GEMINI_RETRY_DELAY,
-                "rate_limit_interval": self.min_request_interval
+                "retry_policy": get_retry_policy("google").get_stats(),
+                "clients": self.clients.get_stats(),
+                "cassette": self.cassette.get_stats(),
+                "rate_limit": get_rate_limiter("google", settings.GEMINI_MODEL).get_stats(),
+                "routing": self.router.get_stats(),
+                "circuit_breaker": get_circuit_breaker("google").get_stats(),
+                "fallback_provider": settings.LLM_FALLBACK_PROVIDER
             }
         elif self.provider == "groq":
             return {
@@ -306,7 +723,12 @@ class LLMSetup:
                 "max_tokens": settings.GROQ_MAX_TOKENS,
                 "retry_attempts": settings.GROQ_RETRY_ATTEMPTS,
                 "retry_delay": settings.GROQ_RETRY_DELAY,
-                "rate_limit_interval": self.min_request_interval
+                "retry_policy": get_retry_policy("groq").get_stats(),
+                "clients": self.clients.get_stats(),
+                "cassette": self.cassette.get_stats(),
+                "rate_limit": get_rate_limiter("groq", settings.GROQ_MODEL).get_stats(),
+                "circuit_breaker": get_circuit_breaker("groq").get_stats(),
+                "fallback_provider": settings.LLM_FALLBACK_PROVIDER
             }
         else:
             return {"provider": "unknown"}
@@ -321,6 +743,16 @@ def get_llm() -> BaseLanguageModel:
     return llm_setup.get_default_llm()
 
 
+def get_llm_for_task(task: str) -> BaseLanguageModel:
+    """Get the shared LLM instance routed for a task"""
+    return llm_setup.get_llm_for_task(task)
+
+
+def create_llm_for_task(task: str, **kwargs) -> BaseLanguageModel:
+    """Create a new LLM instance on the model routed for a task"""
+    return llm_setup.create_llm_for_task(task, **kwargs)
+
+
 def create_custom_llm(**kwargs) -> BaseLanguageModel:
     """Convenience function to create custom LLM instance"""
     return llm_setup.create_llm(**kwargs)
@@ -360,6 +792,12 @@ class MockLLM:
         """Mock async invoke method"""
         return self.invoke(prompt, **kwargs)
 
+    def stream(self, prompt: str, **kwargs) -> Iterator[object]:
+        """Mock stream method, yielding the next response line by line"""
+        response = self.invoke(prompt, **kwargs)
+        for line in response.content.splitlines(keepends=True):
+            yield type(response)(line)
+
 
 def create_mock_llm(responses: List[str] = None) -> MockLLM:
     """Create mock LLM for testing"""
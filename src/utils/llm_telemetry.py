@@ -0,0 +1,490 @@
+"""
+Per-Call LLM Telemetry for AI Shark
+
+Every LLM request (LLMManager, LLMSetup and the direct genai call sites)
+records task, model, prompt/output tokens, time-to-first-token, latency,
+retry attempt, HTTP status class and cache hit into a process-wide registry.
+The registry keeps aggregate counters plus a bounded window of recent calls
+and exports both as JSON and in the Prometheus text exposition format.
+
+Task and retry attempt are carried in context variables, so the routing and
+retry layers set them once and every call made underneath is labelled:
+
+    with task_context(TASK_TOPIC_EXTRACTION):
+        with llm_telemetry.track("llm_manager", "google", model_name, content) as call:
+            response = model.generate_content(content)
+            call.set_response(response, response.text)
+"""
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from config.settings import settings
+from src.utils.rate_limiter import estimate_prompt_tokens, CHARS_PER_TOKEN
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+STATUS_CACHED = "cached"
+
+_current_task: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("llm_task", default=None)
+_current_attempt: contextvars.ContextVar[int] = contextvars.ContextVar("llm_attempt", default=0)
+
+
+@contextmanager
+def task_context(task: Optional[str]) -> Iterator[None]:
+    """Label every LLM call made inside the block with a task type"""
+    token = _current_task.set(task)
+    try:
+        yield
+    finally:
+        _current_task.reset(token)
+
+
+@contextmanager
+def attempt_context(attempt: int) -> Iterator[None]:
+    """Mark LLM calls made inside the block as retry attempt N (0 = first try)"""
+    token = _current_attempt.set(attempt)
+    try:
+        yield
+    finally:
+        _current_attempt.reset(token)
+
+
+def current_task() -> Optional[str]:
+    """Get the task type set by the enclosing task_context, if any"""
+    return _current_task.get()
+
+
+def current_attempt() -> int:
+    """Get the retry attempt set by the enclosing attempt_context"""
+    return _current_attempt.get()
+
+
+def status_class(error: Optional[BaseException] = None) -> str:
+    """
+    Classify a call outcome by HTTP status class
+
+    Args:
+        error: Exception raised by the call, or None on success
+
+    Returns:
+        "2xx", "4xx", "5xx", "timeout", "network", "cancelled" or "error"
+    """
+    if error is None:
+        return "2xx"
+    if isinstance(error, (GeneratorExit, KeyboardInterrupt)):
+        return "cancelled"
+
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and 100 <= status < 600:
+        return f"{status // 100}xx"
+
+    name = type(error).__name__
+    message = str(error).lower()
+    if "Timeout" in name or "DeadlineExceeded" in name or "timed out" in message or "deadline exceeded" in message:
+        return "timeout"
+    if name in ("ResourceExhausted", "TooManyRequests", "RateLimitError") or "429" in message or "quota" in message:
+        return "4xx"
+    if name in ("ServiceUnavailable", "InternalServerError", "BadGateway", "ServerError") or \
+            any(code in message for code in ("500", "502", "503", "504")):
+        return "5xx"
+    if "Connection" in name or "connection" in message:
+        return "network"
+    if name in ("InvalidArgument", "PermissionDenied", "NotFound", "BadRequestError", "AuthenticationError"):
+        return "4xx"
+    return "error"
+
+
+def usage_from_response(response: Any) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Read reported token usage from a Gemini or LangChain response
+
+    Args:
+        response: genai GenerateContentResponse or LangChain message
+
+    Returns:
+        (prompt tokens, output tokens); None where the provider did not report them
+    """
+    usage = getattr(response, "usage_metadata", None)
+    if isinstance(usage, dict):
+        # LangChain AIMessage
+        return usage.get("input_tokens"), usage.get("output_tokens")
+    if usage is not None:
+        # Gemini GenerateContentResponse
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        output_tokens = getattr(usage, "candidates_token_count", None)
+        if prompt_tokens or output_tokens:
+            return prompt_tokens, output_tokens
+
+    metadata = getattr(response, "response_metadata", None)
+    if isinstance(metadata, dict):
+        token_usage = metadata.get("token_usage") or metadata.get("usage") or {}
+        if isinstance(token_usage, dict):
+            return token_usage.get("prompt_tokens"), token_usage.get("completion_tokens")
+    return None, None
+
+
+@dataclass
+class LLMCallRecord:
+    """Metrics for one LLM request (or one cache hit)"""
+    source: str
+    provider: str
+    model: str
+    task: str
+    prompt_tokens: int
+    output_tokens: int
+    latency_seconds: float
+    ttft_seconds: Optional[float]
+    retries: int
+    status_class: str
+    cache_hit: bool
+    tokens_estimated: bool
+    timestamp: float
+    error: Optional[str] = None
+
+
+class CallTracker:
+    """
+    Context manager timing one LLM request and recording it on exit
+
+    Exceptions are recorded with their status class and re-raised.
+    """
+
+    def __init__(self, telemetry: "LLMTelemetry", source: str, provider: str, model: str,
+                 prompt: Any = None, task: Optional[str] = None):
+        self.telemetry = telemetry
+        self.source = source
+        self.provider = provider
+        self.model = model
+        self.prompt = prompt
+        self.task = task or current_task() or "default"
+        self.retries = current_attempt()
+        self.prompt_tokens: Optional[int] = None
+        self.output_tokens: Optional[int] = None
+        self.output_chars = 0
+        self._started = 0.0
+        self._first_token_at: Optional[float] = None
+
+    def __enter__(self) -> "CallTracker":
+        self._started = time.monotonic()
+        return self
+
+    def first_token(self) -> None:
+        """Mark the arrival of the first streamed chunk"""
+        if self._first_token_at is None:
+            self._first_token_at = time.monotonic()
+
+    def add_output(self, text: Optional[str]) -> None:
+        """Account streamed or returned output text (used when usage is not reported)"""
+        if text:
+            self.first_token()
+            self.output_chars += len(text)
+
+    def set_response(self, response: Any, text: Optional[str] = None) -> None:
+        """
+        Take token usage from a provider response
+
+        Args:
+            response: Provider response object
+            text: Response text, used to estimate output tokens if usage is missing
+        """
+        prompt_tokens, output_tokens = usage_from_response(response)
+        if prompt_tokens is not None:
+            self.prompt_tokens = prompt_tokens
+        if output_tokens is not None:
+            self.output_tokens = output_tokens
+        self.add_output(text)
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        finished = time.monotonic()
+        estimated = self.prompt_tokens is None or self.output_tokens is None
+        prompt_tokens = self.prompt_tokens if self.prompt_tokens is not None else estimate_prompt_tokens(self.prompt)
+        output_tokens = self.output_tokens if self.output_tokens is not None else self.output_chars // CHARS_PER_TOKEN
+
+        if self._first_token_at is not None:
+            ttft = self._first_token_at - self._started
+        else:
+            # Non-streaming responses arrive all at once; failed calls have no first token
+            ttft = finished - self._started if exc is None else None
+
+        self.telemetry.record(LLMCallRecord(
+            source=self.source,
+            provider=self.provider,
+            model=self.model,
+            task=self.task,
+            prompt_tokens=prompt_tokens,
+            output_tokens=output_tokens,
+            latency_seconds=finished - self._started,
+            ttft_seconds=ttft,
+            retries=self.retries,
+            status_class=status_class(exc),
+            cache_hit=False,
+            tokens_estimated=estimated,
+            timestamp=time.time(),
+            error=f"{type(exc).__name__}: {exc}"[:200] if exc is not None else None
+        ))
+        return False
+
+
+class _Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.buckets[index] += 1
+
+
+class _Series:
+    """Aggregates for one (source, provider, model, task) label set"""
+
+    def __init__(self):
+        self.calls_by_status: Dict[str, int] = {}
+        self.cache_hits = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.latency = _Histogram()
+        self.ttft = _Histogram()
+
+
+class LLMTelemetry:
+    """
+    Process-wide registry of LLM call metrics
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, max_records: Optional[int] = None):
+        """
+        Initialize the registry
+
+        Args:
+            enabled: Whether calls are recorded (defaults to settings)
+            max_records: Recent call records kept for export and percentiles
+        """
+        self.enabled = settings.LLM_TELEMETRY_ENABLED if enabled is None else enabled
+        self._lock = threading.Lock()
+        self._records = deque(maxlen=max_records or settings.LLM_TELEMETRY_MAX_RECORDS)
+        self._series: Dict[Tuple[str, str, str, str], _Series] = {}
+
+    def track(self, source: str, provider: str, model: str,
+              prompt: Any = None, task: Optional[str] = None) -> CallTracker:
+        """
+        Start tracking one provider request
+
+        Args:
+            source: Calling layer ("llm_manager", "llm_setup", "public_data", ...)
+            provider: LLM provider
+            model: Model name
+            prompt: Request content, used to estimate prompt tokens if usage is missing
+            task: Task type (defaults to the enclosing task_context)
+
+        Returns:
+            CallTracker to use as a context manager around the request
+        """
+        return CallTracker(self, source, provider, model, prompt, task)
+
+    def record_cache_hit(self, source: str, provider: str, model: str, task: Optional[str] = None) -> None:
+        """Record a request answered from the response cache"""
+        self.record(LLMCallRecord(
+            source=source,
+            provider=provider,
+            model=model,
+            task=task or current_task() or "default",
+            prompt_tokens=0,
+            output_tokens=0,
+            latency_seconds=0.0,
+            ttft_seconds=None,
+            retries=current_attempt(),
+            status_class=STATUS_CACHED,
+            cache_hit=True,
+            tokens_estimated=False,
+            timestamp=time.time()
+        ))
+
+    def record(self, record: LLMCallRecord) -> None:
+        """Add a call record to the registry"""
+        if not self.enabled:
+            return
+        key = (record.source, record.provider, record.model, record.task)
+        with self._lock:
+            self._records.append(record)
+            series = self._series.get(key)
+            if series is None:
+                series = _Series()
+                self._series[key] = series
+            series.calls_by_status[record.status_class] = series.calls_by_status.get(record.status_class, 0) + 1
+            if record.cache_hit:
+                series.cache_hits += 1
+                return
+            if record.retries:
+                series.retries += 1
+            series.prompt_tokens += record.prompt_tokens
+            series.output_tokens += record.output_tokens
+            series.latency.observe(record.latency_seconds)
+            if record.ttft_seconds is not None:
+                series.ttft.observe(record.ttft_seconds)
+        logger.debug(f"LLM call {record.source}/{record.model} task={record.task} "
+                     f"status={record.status_class} latency={record.latency_seconds:.2f}s")
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> Optional[float]:
+        if not values:
+            return None
+        ordered = sorted(values)
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    def summary(self, task: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get aggregate metrics per source, provider, model and task
+
+        Latency percentiles are computed over the recent-call window.
+
+        Args:
+            task: Only include this task type
+
+        Returns:
+            One dictionary per label set
+        """
+        with self._lock:
+            series_items = list(self._series.items())
+            records = list(self._records)
+
+        latencies: Dict[Tuple[str, str, str, str], List[float]] = {}
+        for record in records:
+            if not record.cache_hit:
+                key = (record.source, record.provider, record.model, record.task)
+                latencies.setdefault(key, []).append(record.latency_seconds)
+
+        rows = []
+        for (source, provider, model, series_task), series in series_items:
+            if task is not None and series_task != task:
+                continue
+            window = latencies.get((source, provider, model, series_task), [])
+            rows.append({
+                "source": source,
+                "provider": provider,
+                "model": model,
+                "task": series_task,
+                "calls": sum(series.calls_by_status.values()),
+                "calls_by_status": dict(series.calls_by_status),
+                "cache_hits": series.cache_hits,
+                "retried_calls": series.retries,
+                "prompt_tokens": series.prompt_tokens,
+                "output_tokens": series.output_tokens,
+                "avg_latency_seconds": round(series.latency.sum / series.latency.count, 3) if series.latency.count else None,
+                "p50_latency_seconds": self._percentile(window, 0.5),
+                "p95_latency_seconds": self._percentile(window, 0.95),
+                "avg_ttft_seconds": round(series.ttft.sum / series.ttft.count, 3) if series.ttft.count else None
+            })
+        return rows
+
+    def recent_calls(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get the most recent call records, oldest first"""
+        with self._lock:
+            records = list(self._records)
+        if limit is not None:
+            records = records[-limit:]
+        return [asdict(record) for record in records]
+
+    def to_json(self, include_calls: bool = True, indent: Optional[int] = 2) -> str:
+        """
+        Export the registry as JSON
+
+        Args:
+            include_calls: Include the recent per-call records
+            indent: JSON indentation
+
+        Returns:
+            JSON document with "summary" and optionally "calls"
+        """
+        export: Dict[str, Any] = {"generated_at": time.time(), "summary": self.summary()}
+        if include_calls:
+            export["calls"] = self.recent_calls()
+        return json.dumps(export, indent=indent)
+
+    @staticmethod
+    def _labels(**labels: str) -> str:
+        escaped = []
+        for name, value in labels.items():
+            value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+            escaped.append(f'{name}="{value}"')
+        return "{" + ",".join(escaped) + "}"
+
+    def _histogram_lines(self, name: str, labels: Dict[str, str], histogram: _Histogram) -> List[str]:
+        lines = []
+        for bound, count in zip(LATENCY_BUCKETS, histogram.buckets):
+            lines.append(f"{name}_bucket{self._labels(**labels, le=str(bound))} {count}")
+        lines.append(f"{name}_bucket{self._labels(**labels, le='+Inf')} {histogram.count}")
+        lines.append(f"{name}_sum{self._labels(**labels)} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{self._labels(**labels)} {histogram.count}")
+        return lines
+
+    def to_prometheus(self) -> str:
+        """
+        Export aggregate metrics in the Prometheus text exposition format
+
+        Returns:
+            Exposition text ending with a newline
+        """
+        calls, cache_hits, retries, tokens, latency, ttft = [], [], [], [], [], []
+        # Render under the lock so the exposition is consistent
+        with self._lock:
+            for (source, provider, model, task), series in self._series.items():
+                labels = {"source": source, "provider": provider, "model": model, "task": task}
+                for status, count in sorted(series.calls_by_status.items()):
+                    calls.append(f"llm_calls_total{self._labels(**labels, status_class=status)} {count}")
+                cache_hits.append(f"llm_cache_hits_total{self._labels(**labels)} {series.cache_hits}")
+                retries.append(f"llm_retried_calls_total{self._labels(**labels)} {series.retries}")
+                tokens.append(f"llm_tokens_total{self._labels(**labels, type='prompt')} {series.prompt_tokens}")
+                tokens.append(f"llm_tokens_total{self._labels(**labels, type='output')} {series.output_tokens}")
+                latency.extend(self._histogram_lines("llm_request_latency_seconds", labels, series.latency))
+                ttft.extend(self._histogram_lines("llm_time_to_first_token_seconds", labels, series.ttft))
+
+        lines = [
+            "# HELP llm_calls_total LLM requests by outcome status class (cached = served from the response cache).",
+            "# TYPE llm_calls_total counter", *calls,
+            "# HELP llm_cache_hits_total LLM requests served from the response cache.",
+            "# TYPE llm_cache_hits_total counter", *cache_hits,
+            "# HELP llm_retried_calls_total LLM requests that were retry attempts.",
+            "# TYPE llm_retried_calls_total counter", *retries,
+            "# HELP llm_tokens_total Prompt and output tokens (provider-reported, else estimated).",
+            "# TYPE llm_tokens_total counter", *tokens,
+            "# HELP llm_request_latency_seconds Total LLM request latency.",
+            "# TYPE llm_request_latency_seconds histogram", *latency,
+            "# HELP llm_time_to_first_token_seconds Time until the first response token arrived.",
+            "# TYPE llm_time_to_first_token_seconds histogram", *ttft,
+        ]
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Clear all recorded metrics"""
+        with self._lock:
+            self._records.clear()
+            self._series.clear()
+
+
+# Global instance
+llm_telemetry = LLMTelemetry()
+
+
+def get_llm_telemetry() -> LLMTelemetry:
+    """Get the process-wide LLM telemetry registry"""
+    return llm_telemetry
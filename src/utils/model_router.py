@@ -0,0 +1,270 @@
+"""
+Task-Aware Model Routing for AI Shark
+
+Maps each kind of LLM task to an ordered chain of models. The first model is
+used for every call; the next one is only tried when the response fails the
+task's validation (e.g. unparseable JSON or missing report sections), so most
+calls run on the cheaper, lower-latency model.
+
+Routes can be overridden with LLM_MODEL_ROUTES, for example:
+    LLM_MODEL_ROUTES="final_memo=strong,topic_extraction=gemini-2.5-flash>gemini-2.5-pro"
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.settings import settings
+from src.utils.llm_telemetry import task_context
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Task types
+TASK_METADATA_EXTRACTION = "metadata_extraction"
+TASK_TOPIC_EXTRACTION = "topic_extraction"
+TASK_DOCUMENT_STRUCTURING = "document_structuring"
+TASK_AGENT_ANALYSIS = "agent_analysis"
+TASK_QUESTIONNAIRE = "questionnaire"
+TASK_FOUNDER_SIMULATION = "founder_simulation"
+TASK_FINAL_MEMO = "final_memo"
+TASK_PUBLIC_DATA = "public_data"
+TASK_DEFAULT = "default"
+
+# Model tier aliases usable in routes
+FAST = "fast"
+STRONG = "strong"
+
+DEFAULT_ROUTES: Dict[str, List[str]] = {
+    TASK_METADATA_EXTRACTION: [FAST, STRONG],
+    TASK_TOPIC_EXTRACTION: [FAST, STRONG],
+    TASK_DOCUMENT_STRUCTURING: [FAST],
+    TASK_AGENT_ANALYSIS: [FAST, STRONG],
+    TASK_QUESTIONNAIRE: [FAST, STRONG],
+    TASK_FOUNDER_SIMULATION: [FAST, STRONG],
+    TASK_FINAL_MEMO: [STRONG],
+    TASK_PUBLIC_DATA: [FAST, STRONG],
+    TASK_DEFAULT: [FAST],
+}
+
+Validator = Callable[[str], bool]
+
+
+# Response validators
+
+def is_json_object(text: str) -> bool:
+    """Check that a response contains a JSON object (markdown code fences allowed)"""
+    cleaned = (text or "").strip()
+    if "```json" in cleaned:
+        cleaned = cleaned.split("```json")[1].split("```")[0].strip()
+    elif "```" in cleaned:
+        parts = cleaned.split("```")
+        if len(parts) >= 3:
+            cleaned = parts[1].strip()
+    try:
+        return isinstance(json.loads(cleaned), dict)
+    except (json.JSONDecodeError, TypeError):
+        return False
+
+
+def min_length(characters: int) -> Validator:
+    """Validator requiring a response of at least the given length"""
+    def validate(text: str) -> bool:
+        return bool(text) and len(text.strip()) >= characters
+    return validate
+
+
+def has_sections(*headings: str) -> Validator:
+    """Validator requiring each markdown heading to be present (case-insensitive)"""
+    patterns = [re.compile(rf'^#+\s*\**{re.escape(h)}', re.IGNORECASE | re.MULTILINE) for h in headings]
+
+    def validate(text: str) -> bool:
+        return bool(text) and all(p.search(text) for p in patterns)
+    return validate
+
+
+def has_numbered_answers(text: str) -> bool:
+    """Check that a response contains a numbered list starting at 1"""
+    return bool(text) and re.search(r'^\s*1\.', text, re.MULTILINE) is not None
+
+
+def all_of(*validators: Optional[Validator]) -> Validator:
+    """Combine validators; a response is valid when it passes all of them"""
+    active = [v for v in validators if v is not None]
+
+    def validate(text: str) -> bool:
+        return all(v(text) for v in active)
+    return validate
+
+
+class ModelRouter:
+    """
+    Resolves the model chain for a task and runs validated cascades
+    """
+
+    def __init__(self,
+                 fast_model: Optional[str] = None,
+                 strong_model: Optional[str] = None,
+                 routes: Optional[str] = None,
+                 cascade_enabled: Optional[bool] = None):
+        """
+        Initialize the router
+
+        Args:
+            fast_model: Model used for the "fast" tier
+            strong_model: Model used for the "strong" tier
+            routes: Route overrides ("task=model>model,task=model")
+            cascade_enabled: Whether failed validations escalate to the next model
+        """
+        self.fast_model = fast_model or settings.LLM_FAST_MODEL
+        self.strong_model = strong_model or settings.LLM_STRONG_MODEL
+        self.cascade_enabled = settings.LLM_CASCADE_ENABLED if cascade_enabled is None else cascade_enabled
+
+        self.routes: Dict[str, List[str]] = {task: list(chain) for task, chain in DEFAULT_ROUTES.items()}
+        self.routes.update(self._parse_routes(settings.LLM_MODEL_ROUTES if routes is None else routes))
+
+        # Statistics
+        self._lock = threading.Lock()
+        self.calls: Dict[str, Dict[str, int]] = {}
+        self.escalations: Dict[str, int] = {}
+
+    @staticmethod
+    def _parse_routes(spec: str) -> Dict[str, List[str]]:
+        """Parse "task=model>model,task=model" into a route table"""
+        routes = {}
+        for entry in (spec or "").split(","):
+            if "=" not in entry:
+                continue
+            task, chain = entry.split("=", 1)
+            models = [m.strip() for m in chain.split(">") if m.strip()]
+            if task.strip() and models:
+                routes[task.strip()] = models
+        return routes
+
+    def _resolve(self, model: str) -> str:
+        if model == FAST:
+            return self.fast_model
+        if model == STRONG:
+            return self.strong_model
+        return model
+
+    def route(self, task: Optional[str]) -> List[str]:
+        """
+        Get the ordered model chain for a task
+
+        Args:
+            task: Task type (unknown tasks use the default route)
+
+        Returns:
+            Model names, cheapest first, without duplicates
+        """
+        chain = self.routes.get(task or TASK_DEFAULT) or self.routes[TASK_DEFAULT]
+        models: List[str] = []
+        for model in chain:
+            resolved = self._resolve(model)
+            if resolved not in models:
+                models.append(resolved)
+        return models if self.cascade_enabled else models[:1]
+
+    def primary(self, task: Optional[str]) -> str:
+        """Get the first model a task is sent to"""
+        return self.route(task)[0]
+
+    def escalations_after(self, task: Optional[str], model: str) -> List[str]:
+        """
+        Get the models a task escalates to after the given model
+
+        A model outside the task's route (e.g. an explicitly configured one)
+        escalates straight to the last, strongest model of the route.
+        """
+        if not self.cascade_enabled:
+            return []
+        chain = self.route(task)
+        model = model.split("/", 1)[1] if model.startswith("models/") else model
+        if model in chain:
+            return chain[chain.index(model) + 1:]
+        return [chain[-1]] if chain[-1] != model else []
+
+    def _record(self, task: str, model: str, escalated: bool):
+        with self._lock:
+            self.calls.setdefault(task, {})
+            self.calls[task][model] = self.calls[task].get(model, 0) + 1
+            if escalated:
+                self.escalations[task] = self.escalations.get(task, 0) + 1
+
+    def run_cascade(self,
+                    task: Optional[str],
+                    call: Callable[[str], str],
+                    validate: Optional[Validator] = None,
+                    models: Optional[List[str]] = None) -> str:
+        """
+        Call models in route order until a response passes validation
+
+        Exceptions are not escalated; they propagate so retry handling applies.
+
+        Args:
+            task: Task type
+            call: Callable taking a model name and returning the response text
+            validate: Optional response validator; without one the first response is used
+            models: Explicit model chain (defaults to the task's route)
+
+        Returns:
+            The first valid response, or the last response if none passed
+        """
+        task = task or TASK_DEFAULT
+        chain = models or self.route(task)
+        text = ""
+        with task_context(task):
+            for index, model in enumerate(chain):
+                self._record(task, model, escalated=index > 0)
+                text = call(model)
+                if validate is None or validate(text):
+                    return text
+                if index + 1 < len(chain):
+                    logger.warning(f"Response from {model} failed validation for task '{task}', "
+                                   f"escalating to {chain[index + 1]}")
+        if validate is not None:
+            logger.warning(f"No model produced a valid response for task '{task}'")
+        return text
+
+    async def arun_cascade(self,
+                           task: Optional[str],
+                           call: Callable[[str], Awaitable[str]],
+                           validate: Optional[Validator] = None,
+                           models: Optional[List[str]] = None) -> str:
+        """Async counterpart of run_cascade"""
+        task = task or TASK_DEFAULT
+        chain = models or self.route(task)
+        text = ""
+        with task_context(task):
+            for index, model in enumerate(chain):
+                self._record(task, model, escalated=index > 0)
+                text = await call(model)
+                if validate is None or validate(text):
+                    return text
+                if index + 1 < len(chain):
+                    logger.warning(f"Response from {model} failed validation for task '{task}', "
+                                   f"escalating to {chain[index + 1]}")
+        if validate is not None:
+            logger.warning(f"No model produced a valid response for task '{task}'")
+        return text
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the route table and per-task call/escalation counters"""
+        with self._lock:
+            return {
+                "routes": {task: self.route(task) for task in self.routes},
+                "calls": {task: dict(models) for task, models in self.calls.items()},
+                "escalations": dict(self.escalations)
+            }
+
+
+# Global instance
+model_router = ModelRouter()
+
+
+def get_model_router() -> ModelRouter:
+    """Get the process-wide model router"""
+    return model_router
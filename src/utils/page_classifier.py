@@ -0,0 +1,128 @@
+"""
+Page Classifier for AI Shark
+
+Decides per PDF page whether its text layer carries the content. Decks
+exported from Google Slides or PowerPoint keep their text, so most slides can
+be sent to the model as extracted text, which costs a fraction of an image
+prompt. Pages whose area is dominated by images or vector graphics (charts,
+diagrams, screenshots), or that have little or no text layer, stay on the
+vision path.
+
+Coverage is measured from PyMuPDF's page.get_text("dict") blocks and
+page.get_drawings(); drawings covering (almost) the whole page are slide
+backgrounds and are ignored.
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import List, Optional
+
+import fitz  # PyMuPDF
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Drawings covering at least this share of the page are backgrounds, not graphics
+BACKGROUND_COVERAGE = 0.9
+
+
+@dataclass
+class PageText:
+    """
+    Text layer of one page and how much of the page it covers
+    """
+    page_number: int
+    text: str
+    text_coverage: float  # share of the page covered by text blocks
+    visual_coverage: float  # share covered by images and vector graphics
+    text_dominant: bool
+    title: str = ""  # line set in the largest font, usually the slide title
+
+    def to_part(self) -> str:
+        """Prompt part carrying the page's text in place of its image"""
+        return f"Page {self.page_number} (text layer):\n{self.text}"
+
+
+def _area(rect: "fitz.Rect", page_rect: "fitz.Rect") -> float:
+    """Area of a rectangle clipped to the page"""
+    clipped = fitz.Rect(rect) & page_rect
+    return 0.0 if clipped.is_empty else clipped.width * clipped.height
+
+
+def classify_page(page: "fitz.Page",
+                  min_chars: Optional[int] = None,
+                  max_visual_coverage: Optional[float] = None) -> PageText:
+    """
+    Measure a page's text and visual coverage and classify it
+
+    Args:
+        page: fitz page
+        min_chars: Minimum text layer length for the text path (defaults to PAGE_TEXT_MIN_CHARS)
+        max_visual_coverage: Largest image/graphics share allowed on the text path
+            (defaults to PAGE_TEXT_MAX_VISUAL_COVERAGE)
+
+    Returns:
+        PageText for the page
+    """
+    min_chars = settings.PAGE_TEXT_MIN_CHARS if min_chars is None else min_chars
+    max_visual_coverage = settings.PAGE_TEXT_MAX_VISUAL_COVERAGE if max_visual_coverage is None else max_visual_coverage
+
+    page_rect = page.rect
+    page_area = page_rect.width * page_rect.height or 1.0
+
+    lines, text_area, visual_area = [], 0.0, 0.0
+    title, title_size = "", 0.0
+    for block in page.get_text("dict").get("blocks", []):
+        if block.get("type") == 0:
+            text_area += _area(block["bbox"], page_rect)
+            for line in block.get("lines", []):
+                spans = line.get("spans", [])
+                line_text = "".join(span.get("text", "") for span in spans).strip()
+                if line_text:
+                    lines.append(line_text)
+                    size = max(span.get("size", 0.0) for span in spans)
+                    if size > title_size:
+                        title, title_size = line_text, size
+        elif block.get("type") == 1:
+            visual_area += _area(block["bbox"], page_rect)
+
+    for drawing in page.get_drawings():
+        area = _area(drawing["rect"], page_rect)
+        if area < BACKGROUND_COVERAGE * page_area:
+            visual_area += area
+
+    text = "\n".join(lines)
+    text_coverage = min(1.0, text_area / page_area)
+    visual_coverage = min(1.0, visual_area / page_area)
+    return PageText(
+        page_number=page.number + 1,
+        text=text,
+        text_coverage=round(text_coverage, 3),
+        visual_coverage=round(visual_coverage, 3),
+        text_dominant=len(text) >= min_chars and visual_coverage <= max_visual_coverage,
+        title=title
+    )
+
+
+def classify_document(doc: "fitz.Document") -> List[PageText]:
+    """
+    Classify every page of an open document
+
+    Args:
+        doc: Open fitz document
+
+    Returns:
+        PageText per page, in page order; pages that fail to parse go to the vision path
+    """
+    pages = []
+    for index in range(len(doc)):
+        try:
+            pages.append(classify_page(doc.load_page(index)))
+        except Exception as e:
+            logger.warning(f"Could not read the text layer of page {index + 1}: {e}")
+            pages.append(PageText(index + 1, "", 0.0, 1.0, False))
+    text_pages = sum(1 for page in pages if page.text_dominant)
+    logger.info(f"Text layer covers {text_pages} of {len(pages)} pages; the rest use vision")
+    return pages
@@ -0,0 +1,270 @@
+"""
+Perceptual Page Deduplication for AI Shark
+
+Decks repeat slides (section dividers, a repeated agenda, appendix copies),
+and the same page then travels in several vision requests. Each page gets a
+perceptual fingerprint from a tiny grayscale render:
+
+    aHash  - 8x8 block means compared with their mean
+    dHash  - 9x8 block means, each compared with its right neighbour
+
+Pages whose aHash and dHash both lie within PAGE_DEDUP_MAX_DISTANCE bits of
+an earlier page are collapsed onto it. Slides sharing a template fall within
+that distance, so the match must be confirmed: by the text layer where the
+pages have one, otherwise by a pixel comparison of larger grayscale renders
+(scanned decks and decks converted slide by slide to images).
+
+Blank pages (almost no contrast) are dropped. Divider slides (a title of a
+few words without figures, on an otherwise empty page) stay available for
+metadata extraction, since their titles name the deck's sections, but are
+removed from topic page lists. The resulting map is recorded in
+metadata.json under "page_dedup".
+"""
+
+import difflib
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import fitz  # PyMuPDF
+import numpy as np
+
+from config.settings import settings
+from src.utils.page_classifier import PageText
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8
+# Pages are rendered this many pixels per hash cell, then block-averaged
+RENDER_CELL = 4
+# Pages with a text layer are only duplicates if their texts are at least this similar
+MIN_TEXT_SIMILARITY = 0.9
+# Divider slides carry a short title and almost no images or graphics
+DIVIDER_MAX_VISUAL_COVERAGE = 0.05
+# Pages without a text layer are compared pixel by pixel at this size (16:9)
+PIXEL_RENDER_SIZE = (128, 72)
+# Largest grayscale difference (0-255) of any pixel between confirmed duplicates
+PIXEL_MAX_DIFFERENCE = 24
+
+_FIGURE_PATTERN = re.compile(r"[\d$€£¥%]")
+
+
+@dataclass
+class PageFingerprint:
+    """
+    Perceptual hashes and contrast of one page
+    """
+    page_number: int
+    ahash: int
+    dhash: int
+    contrast: float  # grayscale standard deviation (0-255)
+    pixels: bytes = field(default=b"", repr=False)  # PIXEL_RENDER_SIZE grayscale render
+
+
+@dataclass
+class DedupResult:
+    """
+    Which pages stand for which, and which pages are dropped
+    """
+    canonical: Dict[int, int] = field(default_factory=dict)  # duplicate page -> first identical page
+    blank: List[int] = field(default_factory=list)
+    dividers: List[int] = field(default_factory=list)
+
+    @property
+    def dropped(self) -> List[int]:
+        """Pages left out of topic extraction (duplicates, blanks and dividers)"""
+        return sorted(set(self.canonical) | set(self.blank) | set(self.dividers))
+
+    def kept_pages(self, page_count: int) -> List[int]:
+        """1-based pages sent for metadata extraction (dividers are kept: their titles outline the deck)"""
+        dropped = set(self.canonical) | set(self.blank)
+        return [n for n in range(1, page_count + 1) if n not in dropped]
+
+    def remap_pages(self, page_numbers: Sequence[Any]) -> List[Any]:
+        """
+        Map pages to their canonical page, dropping blanks and dividers
+
+        A list made only of dropped pages is kept as is (apart from
+        duplicates), so no topic loses all of its pages.
+
+        Args:
+            page_numbers: 1-based page numbers of one topic
+
+        Returns:
+            Page numbers without duplicates, in first-seen order
+        """
+        removed = set(self.blank) | set(self.dividers)
+        mapped = [self.canonical.get(n, n) for n in page_numbers]
+        kept = [n for n in mapped if n not in removed] or mapped
+        return list(dict.fromkeys(kept))
+
+    def remap_toc(self, toc: Dict[str, Any]) -> Dict[str, Any]:
+        """Remap every page list of a table of contents (other values are left alone)"""
+        return {topic: self.remap_pages(pages) if isinstance(pages, list) else pages for topic, pages in toc.items()}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable dedup map for metadata.json"""
+        return {
+            "duplicates": {str(page): canonical for page, canonical in sorted(self.canonical.items())},
+            "blank": self.blank,
+            "dividers": self.dividers,
+            "dropped": self.dropped
+        }
+
+
+def _block_means(gray: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Downscale a grayscale image to rows x cols by averaging blocks"""
+    row_edges = np.linspace(0, gray.shape[0], rows + 1).astype(int)
+    col_edges = np.linspace(0, gray.shape[1], cols + 1).astype(int)
+    row_sums = np.add.reduceat(gray, row_edges[:-1], axis=0)
+    sums = np.add.reduceat(row_sums, col_edges[:-1], axis=1)
+    counts = np.outer(np.diff(row_edges), np.diff(col_edges))
+    return sums / np.maximum(counts, 1)
+
+
+def _bits(mask: np.ndarray) -> int:
+    """Pack a boolean array into an integer"""
+    return int("".join("1" if bit else "0" for bit in mask.flatten()), 2)
+
+
+def fingerprint_page(page: "fitz.Page") -> PageFingerprint:
+    """
+    Compute the aHash, dHash and contrast of a page from a tiny grayscale render,
+    plus a larger render for confirming duplicates of pages without text
+
+    Args:
+        page: fitz page
+
+    Returns:
+        PageFingerprint
+    """
+    width = (HASH_SIZE + 1) * RENDER_CELL
+    height = HASH_SIZE * RENDER_CELL
+    matrix = fitz.Matrix(width / page.rect.width, height / page.rect.height)
+    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+    gray = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)[:, :pix.width]
+    gray = gray.astype(np.float32)
+
+    a_cells = _block_means(gray, HASH_SIZE, HASH_SIZE)
+    d_cells = _block_means(gray, HASH_SIZE, HASH_SIZE + 1)
+
+    pixel_width, pixel_height = PIXEL_RENDER_SIZE
+    matrix = fitz.Matrix(pixel_width / page.rect.width, pixel_height / page.rect.height)
+    pixel_pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+    pixels = np.frombuffer(pixel_pix.samples, dtype=np.uint8).reshape(pixel_pix.height, pixel_pix.stride)
+    return PageFingerprint(
+        page_number=page.number + 1,
+        ahash=_bits(a_cells > a_cells.mean()),
+        dhash=_bits(d_cells[:, 1:] > d_cells[:, :-1]),
+        contrast=round(float(gray.std()), 2),
+        pixels=pixels[:, :pixel_pix.width].tobytes()
+    )
+
+
+def fingerprint_document(doc: "fitz.Document") -> List[PageFingerprint]:
+    """
+    Fingerprint every page of an open document
+
+    Args:
+        doc: Open fitz document
+
+    Returns:
+        PageFingerprint per page, in page order
+    """
+    return [fingerprint_page(doc.load_page(index)) for index in range(len(doc))]
+
+
+def hamming(a: int, b: int) -> int:
+    """Number of differing bits"""
+    return bin(a ^ b).count("1")
+
+
+def _has_text(page: Optional[PageText]) -> bool:
+    return page is not None and bool(page.text.strip())
+
+
+def _same_text(a: Optional[PageText], b: Optional[PageText]) -> bool:
+    """Whether two pages' text layers match closely enough"""
+    first, second = " ".join(a.text.split()), " ".join(b.text.split())
+    return first == second or difflib.SequenceMatcher(None, first, second).ratio() >= MIN_TEXT_SIMILARITY
+
+
+def _same_pixels(a: PageFingerprint, b: PageFingerprint) -> bool:
+    """
+    Whether two pages look identical pixel by pixel
+
+    Fingerprints without larger renders only match when both hashes are identical.
+    """
+    if not a.pixels or len(a.pixels) != len(b.pixels):
+        return a.ahash == b.ahash and a.dhash == b.dhash and not a.pixels and not b.pixels
+    first = np.frombuffer(a.pixels, dtype=np.uint8).astype(np.int16)
+    second = np.frombuffer(b.pixels, dtype=np.uint8).astype(np.int16)
+    return int(np.abs(first - second).max()) <= PIXEL_MAX_DIFFERENCE
+
+
+def _is_duplicate(original: PageFingerprint,
+                  fingerprint: PageFingerprint,
+                  texts: Dict[int, PageText],
+                  max_distance: int) -> bool:
+    """Whether a page repeats an earlier one: close hashes, confirmed by text or pixels"""
+    if (hamming(original.ahash, fingerprint.ahash) > max_distance
+            or hamming(original.dhash, fingerprint.dhash) > max_distance):
+        return False
+    first, second = texts.get(original.page_number), texts.get(fingerprint.page_number)
+    if _has_text(first) or _has_text(second):
+        return _has_text(first) and _has_text(second) and _same_text(first, second)
+    return _same_pixels(original, fingerprint)
+
+
+def _is_divider(page: Optional[PageText]) -> bool:
+    """A title-only page without figures (a slide like "$2.4M ARR" is content, not a divider)"""
+    if page is None:
+        return False
+    text = " ".join(page.text.split())
+    return (0 < len(text) <= settings.PAGE_DIVIDER_MAX_CHARS
+            and text == " ".join(page.title.split())
+            and not _FIGURE_PATTERN.search(text)
+            and page.visual_coverage <= DIVIDER_MAX_VISUAL_COVERAGE)
+
+
+def find_duplicates(fingerprints: Sequence[PageFingerprint],
+                    page_texts: Optional[Sequence[PageText]] = None,
+                    max_distance: Optional[int] = None) -> DedupResult:
+    """
+    Collapse near-identical pages and find blank and divider pages
+
+    Args:
+        fingerprints: PageFingerprint per page
+        page_texts: PageText per page (dividers are only detected with a text layer)
+        max_distance: Largest aHash and dHash distance of duplicates (defaults to PAGE_DEDUP_MAX_DISTANCE)
+
+    Returns:
+        DedupResult
+    """
+    max_distance = settings.PAGE_DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+    texts = {page.page_number: page for page in page_texts or []}
+    result = DedupResult()
+
+    originals: List[PageFingerprint] = []
+    for fingerprint in fingerprints:
+        page_number = fingerprint.page_number
+        if fingerprint.contrast <= settings.PAGE_BLANK_MAX_CONTRAST:
+            result.blank.append(page_number)
+            continue
+        match = next((original for original in originals
+                      if _is_duplicate(original, fingerprint, texts, max_distance)), None)
+        if match is not None:
+            result.canonical[page_number] = match.page_number
+            continue
+        originals.append(fingerprint)
+
+        # The cover is short on text too, but names the company
+        if page_number > 1 and _is_divider(texts.get(page_number)):
+            result.dividers.append(page_number)
+
+    if result.dropped:
+        logger.info(f"Page dedup: {len(result.canonical)} duplicates, {len(result.blank)} blank, "
+                    f"{len(result.dividers)} dividers of {len(fingerprints)} pages")
+    return result
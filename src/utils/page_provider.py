@@ -0,0 +1,329 @@
+"""
+Lazy Page Image Provider for AI Shark
+
+Serves the rendered pages of a PDF on demand instead of materializing the
+whole deck up front. Renders are looked up in three places:
+
+    1. a bounded in-memory LRU of encoded pages (shared by all stages)
+    2. a disk render cache keyed by (PDF content hash, page, render policy),
+       shared by reruns and other processes
+    3. the PDF itself, rendered in-process, or in parallel on the rasterizer
+       pool when a stage prefetches the pages it is about to use
+
+Stages see a lazy, list-like view per render policy (pages(policy)), so
+memory use depends on the LRU size rather than on the deck length.
+"""
+
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from config.settings import settings
+from src.utils.page_classifier import PageText, classify_document
+from src.utils.page_dedup import PageFingerprint, fingerprint_document
+from src.utils.pdf_rasterizer import PageImage, RenderPolicy, render_page, render_pages
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp"}
+_MIME_TYPES = {ext: mime for mime, ext in _EXTENSIONS.items()}
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents, read in chunks"""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class LazyPages(Sequence):
+    """
+    Read-only, list-like view of a deck's pages at one render policy
+    """
+
+    def __init__(self, provider: "PageProvider", policy: RenderPolicy):
+        self.provider = provider
+        self.policy = policy
+
+    @property
+    def content_hash(self) -> str:
+        """Hash identifying the deck and render policy without rendering any page"""
+        return f"{self.provider.pdf_hash}:{self.policy.cache_key}"
+
+    def __len__(self) -> int:
+        return self.provider.page_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("page index out of range")
+        return self.provider.get(index + 1, self.policy)
+
+    def __iter__(self) -> Iterator[PageImage]:
+        for index in range(len(self)):
+            yield self[index]
+
+    def prefetch(self, page_numbers: Optional[Iterable[int]] = None) -> None:
+        """Render pages ahead of use (see PageProvider.prefetch)"""
+        self.provider.prefetch(self.policy, page_numbers)
+
+
+class PageProvider:
+    """
+    On-demand page renders for one PDF, with a memory LRU and a disk cache
+    """
+
+    def __init__(self,
+                 pdf_path: str,
+                 cache_dir: Optional[Path] = None,
+                 memory_pages: Optional[int] = None,
+                 disk_cache: Optional[bool] = None,
+                 delete_on_close: bool = False):
+        """
+        Open a PDF for lazy rendering
+
+        Args:
+            pdf_path: Path to the PDF file
+            cache_dir: Disk render cache directory (defaults to PAGE_RENDER_CACHE_DIR)
+            memory_pages: Encoded pages kept in memory (defaults to PAGE_CACHE_MEMORY_PAGES)
+            disk_cache: Whether to read and write the disk cache (defaults to settings)
+            delete_on_close: Delete the PDF on close (for temporary conversions)
+        """
+        self.pdf_path = str(pdf_path)
+        self.delete_on_close = delete_on_close
+        self.pdf_hash = file_hash(self.pdf_path)
+        self.memory_pages = settings.PAGE_CACHE_MEMORY_PAGES if memory_pages is None else memory_pages
+        self.disk_cache = settings.PAGE_RENDER_CACHE_ENABLED if disk_cache is None else disk_cache
+        self.cache_dir = Path(cache_dir or settings.PAGE_RENDER_CACHE_DIR) / self.pdf_hash[:2] / self.pdf_hash
+
+        self._lock = threading.Lock()
+        self._doc_lock = threading.Lock()  # fitz documents are not thread-safe
+        self._doc: Optional[fitz.Document] = None
+        self._memory: "OrderedDict[Tuple[int, str], PageImage]" = OrderedDict()
+        self._page_texts: Optional[List[PageText]] = None
+        self._fingerprints: Optional[List[PageFingerprint]] = None
+
+        doc = fitz.open(self.pdf_path)
+        self.page_count = len(doc)
+        doc.close()
+
+        # Statistics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+
+    def __enter__(self) -> "PageProvider":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def pages(self, policy: RenderPolicy) -> LazyPages:
+        """
+        Get a lazy view of every page at a render policy
+
+        Args:
+            policy: Render policy of the stage
+
+        Returns:
+            LazyPages sequence; pages render when indexed
+        """
+        return LazyPages(self, policy)
+
+    def page_texts(self) -> List[PageText]:
+        """
+        Get the text layer and text/vision classification of every page (computed once)
+
+        Returns:
+            PageText per page, in page order
+        """
+        with self._doc_lock:
+            if self._page_texts is None:
+                if self._doc is None:
+                    self._doc = fitz.open(self.pdf_path)
+                self._page_texts = classify_document(self._doc)
+            return self._page_texts
+
+    def page_fingerprints(self) -> List[PageFingerprint]:
+        """
+        Get the perceptual fingerprint of every page (computed once, from tiny grayscale renders)
+
+        Returns:
+            PageFingerprint per page, in page order
+        """
+        with self._doc_lock:
+            if self._fingerprints is None:
+                if self._doc is None:
+                    self._doc = fitz.open(self.pdf_path)
+                self._fingerprints = fingerprint_document(self._doc)
+            return self._fingerprints
+
+    # Lookup
+
+    def _path(self, page_number: int, policy: RenderPolicy) -> Path:
+        extension = _EXTENSIONS.get(f"image/{policy.image_format}", policy.image_format)
+        return self.cache_dir / f"p{page_number:04d}-{policy.cache_key}.{extension}"
+
+    def _remember(self, key: Tuple[int, str], page: PageImage) -> None:
+        with self._lock:
+            self._memory[key] = page
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_pages:
+                self._memory.popitem(last=False)
+
+    def _read_disk(self, page_number: int, policy: RenderPolicy) -> Optional[PageImage]:
+        if not self.disk_cache:
+            return None
+        path = self._path(page_number, policy)
+        try:
+            data = path.read_bytes()
+            width, height = Image.open(io.BytesIO(data)).size
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning(f"Unreadable page render {path}: {e}")
+            return None
+        return PageImage(data, _MIME_TYPES.get(path.suffix[1:], "image/png"), width, height)
+
+    def _write_disk(self, page_number: int, policy: RenderPolicy, page: PageImage) -> None:
+        """Store a render atomically, so concurrent processes never read partial files"""
+        if not self.disk_cache:
+            return
+        path = self._path(page_number, policy)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(page.data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not cache page render {path}: {e}")
+
+    def get(self, page_number: int, policy: RenderPolicy) -> PageImage:
+        """
+        Get one rendered page
+
+        Args:
+            page_number: 1-based page number
+            policy: Render policy
+
+        Returns:
+            Encoded PageImage
+        """
+        key = (page_number, policy.cache_key)
+        with self._lock:
+            page = self._memory.get(key)
+            if page is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return page
+
+        page = self._read_disk(page_number, policy)
+        if page is not None:
+            self.disk_hits += 1
+        else:
+            with self._doc_lock:
+                if self._doc is None:
+                    self._doc = fitz.open(self.pdf_path)
+                page = render_page(self._doc, page_number - 1, policy)
+            self.renders += 1
+            self._write_disk(page_number, policy, page)
+        self._remember(key, page)
+        return page
+
+    def prefetch(self, policy: RenderPolicy, page_numbers: Optional[Iterable[int]] = None) -> None:
+        """
+        Render pages missing from the disk cache in parallel on the rasterizer pool
+
+        Without a disk cache there is nowhere to keep the renders, so pages are
+        left to render lazily.
+
+        Args:
+            policy: Render policy of the stage
+            page_numbers: 1-based pages to prepare (defaults to every page)
+        """
+        if not self.disk_cache:
+            return
+        if page_numbers is None:
+            page_numbers = range(1, self.page_count + 1)
+        numbers = sorted({n for n in page_numbers
+                          if isinstance(n, int) and 0 < n <= self.page_count})
+        missing = [n for n in numbers if not self._path(n, policy).exists()]
+        if not missing:
+            return
+        pages = render_pages(self.pdf_path, policy, page_indices=[n - 1 for n in missing])
+        self.renders += len(pages)
+        for page_number, page in zip(missing, pages):
+            self._write_disk(page_number, policy, page)
+
+    def close(self) -> None:
+        """Close the PDF and drop the in-memory renders"""
+        with self._doc_lock:
+            if self._doc is not None:
+                self._doc.close()
+                self._doc = None
+        with self._lock:
+            self._memory.clear()
+        if self.delete_on_close and os.path.exists(self.pdf_path):
+            os.unlink(self.pdf_path)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get page count and render/cache counters"""
+        return {
+            "pages": self.page_count,
+            "memory_pages": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "renders": self.renders
+        }
+
+
+def prune_render_cache(cache_dir: Optional[Path] = None, max_size_mb: Optional[int] = None) -> int:
+    """
+    Delete the least recently written decks until the disk render cache fits its size limit
+
+    Args:
+        cache_dir: Disk render cache directory (defaults to PAGE_RENDER_CACHE_DIR)
+        max_size_mb: Size limit (defaults to PAGE_RENDER_CACHE_MAX_SIZE_MB)
+
+    Returns:
+        Number of deck directories removed
+    """
+    cache_dir = Path(cache_dir or settings.PAGE_RENDER_CACHE_DIR)
+    max_bytes = (settings.PAGE_RENDER_CACHE_MAX_SIZE_MB if max_size_mb is None else max_size_mb) * 1024 * 1024
+    if not cache_dir.exists():
+        return 0
+
+    decks: List[Tuple[float, int, Path]] = []
+    for deck_dir in cache_dir.glob("*/*"):
+        files = [f for f in deck_dir.iterdir() if f.is_file()]
+        if files:
+            decks.append((max(f.stat().st_mtime for f in files), sum(f.stat().st_size for f in files), deck_dir))
+
+    total = sum(size for _, size, _ in decks)
+    removed = 0
+    for _, size, deck_dir in sorted(decks):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(deck_dir, ignore_errors=True)
+        total -= size
+        removed += 1
+    if removed:
+        logger.info(f"Pruned {removed} decks from the page render cache")
+    return removed
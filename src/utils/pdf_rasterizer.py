@@ -0,0 +1,324 @@
+"""
+Parallel PDF Rasterizer for AI Shark
+
+Renders PDF pages on several cores. The page range is split into contiguous
+shards, one per worker process; each worker opens its own fitz document
+(documents cannot be shared across processes) and returns its pages in page
+order. Small documents, or a pool that cannot start, are rendered serially
+in-process.
+
+Pages for the LLM are produced as compressed PageImage blobs according to a
+per-stage render policy: low-resolution thumbnails for metadata/TOC
+detection, higher resolution for topic extraction. Each page is rendered
+directly at the resolution its policy allows (never above the model's useful
+maximum), uniform margins are trimmed, and the pixmap is encoded straight to
+JPEG/WebP, so no full-size decoded image is kept per page.
+"""
+
+import atexit
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageChops
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+DEFAULT_DPI = 150
+
+STAGE_METADATA = "metadata"
+STAGE_TOPIC = "topic"
+STAGES = (STAGE_METADATA, STAGE_TOPIC)
+
+MIME_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+# Pixels differing from the background by at most this much count as margin
+TRIM_TOLERANCE = 12
+TRIM_PADDING = 8
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RenderPolicy:
+    """How pages are rendered and encoded for one pipeline stage"""
+    dpi: int = DEFAULT_DPI
+    max_side: int = 0  # longest side in pixels; 0 disables the cap
+    image_format: str = "png"  # png, jpeg or webp
+    quality: int = 85
+    trim_margins: bool = False
+
+    @property
+    def cache_key(self) -> str:
+        """Readable key identifying renders made with this policy"""
+        trim = "trim" if self.trim_margins else "full"
+        return f"{self.dpi}dpi-{self.max_side}px-{self.image_format}-q{self.quality}-{trim}"
+
+
+@dataclass
+class PageImage:
+    """
+    One encoded page image, usable as a request content part
+    """
+    data: bytes
+    mime_type: str
+    width: int
+    height: int
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+    @property
+    def request_key_part(self) -> bytes:
+        """Content hashed into cache keys in place of this image"""
+        return self.data
+
+    def to_part(self) -> Dict[str, Any]:
+        """Inline blob part for the Gemini API"""
+        return {"mime_type": self.mime_type, "data": self.data}
+
+    def to_image(self) -> Image.Image:
+        """Decode to a PIL image"""
+        return Image.open(io.BytesIO(self.data))
+
+
+def stage_policy(stage: str) -> RenderPolicy:
+    """
+    Get the render policy of a pipeline stage from settings
+
+    Args:
+        stage: STAGE_METADATA or STAGE_TOPIC
+
+    Returns:
+        RenderPolicy for the stage
+    """
+    if stage == STAGE_METADATA:
+        dpi, max_side = settings.PAGE_IMAGE_METADATA_DPI, settings.PAGE_IMAGE_METADATA_MAX_SIDE
+    else:
+        dpi, max_side = settings.PAGE_IMAGE_TOPIC_DPI, settings.PAGE_IMAGE_TOPIC_MAX_SIDE
+    return RenderPolicy(
+        dpi=dpi,
+        max_side=max_side,
+        image_format=settings.PAGE_IMAGE_FORMAT.lower(),
+        quality=settings.PAGE_IMAGE_QUALITY,
+        trim_margins=settings.PAGE_IMAGE_TRIM_MARGINS
+    )
+
+
+def trim_margins(image: Image.Image) -> Image.Image:
+    """
+    Crop uniform margins (the color of the top-left pixel) around the page content
+
+    Args:
+        image: Page image
+
+    Returns:
+        Cropped image, or the original if the page is blank or has no margin
+    """
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    mask = ImageChops.difference(image, background).convert("L").point(lambda v: 255 if v > TRIM_TOLERANCE else 0)
+    bbox = mask.getbbox()
+    if bbox is None:
+        return image
+    left, top, right, bottom = bbox
+    bbox = (max(0, left - TRIM_PADDING), max(0, top - TRIM_PADDING),
+            min(image.width, right + TRIM_PADDING), min(image.height, bottom + TRIM_PADDING))
+    if bbox == (0, 0, image.width, image.height):
+        return image
+    return image.crop(bbox)
+
+
+def encode_image(image: Image.Image, policy: RenderPolicy) -> PageImage:
+    """
+    Trim, downscale and encode a PIL image according to a render policy
+
+    Args:
+        image: Page image
+        policy: Render policy
+
+    Returns:
+        Encoded PageImage
+    """
+    image = image.convert("RGB")
+    if policy.trim_margins:
+        image = trim_margins(image)
+    if policy.max_side and max(image.size) > policy.max_side:
+        image = image.copy()
+        image.thumbnail((policy.max_side, policy.max_side), Image.LANCZOS)
+
+    image_format = policy.image_format if policy.image_format in MIME_TYPES else "png"
+    buffer = io.BytesIO()
+    if image_format == "png":
+        image.save(buffer, format="PNG", optimize=True)
+    else:
+        image.save(buffer, format=image_format.upper(), quality=policy.quality)
+    return PageImage(buffer.getvalue(), MIME_TYPES[image_format], image.width, image.height)
+
+
+def _render_page(page: "fitz.Page", policy: RenderPolicy) -> PageImage:
+    """Render one page at the policy's resolution, capped so the longest side fits max_side"""
+    zoom = policy.dpi / 72
+    if policy.max_side:
+        zoom = min(zoom, policy.max_side / max(page.rect.width, page.rect.height))
+    pix = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+
+    # Untrimmed PNG/JPEG pages are encoded straight from the pixmap
+    if not policy.trim_margins and policy.image_format == "png":
+        return PageImage(pix.tobytes("png"), MIME_TYPES["png"], pix.width, pix.height)
+    if not policy.trim_margins and policy.image_format == "jpeg":
+        return PageImage(pix.tobytes("jpeg", jpg_quality=policy.quality), MIME_TYPES["jpeg"], pix.width, pix.height)
+
+    mode = "RGB" if pix.n == 3 else "L"
+    return encode_image(Image.frombytes(mode, (pix.width, pix.height), pix.samples), policy)
+
+
+def render_page(doc: "fitz.Document", page_index: int, policy: RenderPolicy) -> PageImage:
+    """
+    Render one page of an open document
+
+    Args:
+        doc: Open fitz document
+        page_index: Page index (0-based)
+        policy: Render policy
+
+    Returns:
+        Encoded PageImage
+    """
+    return _render_page(doc.load_page(page_index), policy)
+
+
+def _render_indices(pdf_path: str, page_indices: List[int], policy: RenderPolicy) -> List[PageImage]:
+    """
+    Render selected pages of a PDF (runs in a worker process)
+
+    Args:
+        pdf_path: Path to the PDF file
+        page_indices: Page indices (0-based)
+        policy: Render policy
+
+    Returns:
+        PageImage per page, in the order of page_indices
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return [render_page(doc, page_index, policy) for page_index in page_indices]
+    finally:
+        doc.close()
+
+
+def _shards(page_indices: List[int], workers: int) -> List[List[int]]:
+    """Split page indices into at most `workers` contiguous, near-equal runs"""
+    workers = max(1, min(workers, len(page_indices)))
+    size, extra = divmod(len(page_indices), workers)
+    shards, start = [], 0
+    for i in range(workers):
+        end = start + size + (1 if i < extra else 0)
+        shards.append(page_indices[start:end])
+        start = end
+    return shards
+
+
+def _worker_count(workers: Optional[int]) -> int:
+    """Resolve the configured worker count (0 means one per CPU)"""
+    workers = settings.PDF_RASTER_WORKERS if workers is None else workers
+    return workers if workers > 0 else (os.cpu_count() or 1)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """Get the shared worker pool, so process start-up is paid once per process"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn: forking a process that already runs threads is unsafe
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def _shutdown_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+            _pool = None
+
+
+atexit.register(_shutdown_pool)
+
+
+def render_pages(pdf_path: str,
+                 policy: RenderPolicy,
+                 workers: Optional[int] = None,
+                 page_indices: Optional[List[int]] = None) -> List[PageImage]:
+    """
+    Render the pages of a PDF to encoded page images
+
+    Args:
+        pdf_path: Path to the PDF file
+        policy: Render policy (see stage_policy)
+        workers: Worker processes (defaults to PDF_RASTER_WORKERS; 0 means one per CPU)
+        page_indices: 0-based pages to render (defaults to every page)
+
+    Returns:
+        List of PageImages in the order of page_indices (page order by default)
+    """
+    started = time.monotonic()
+    if page_indices is None:
+        doc = fitz.open(pdf_path)
+        page_indices = list(range(len(doc)))
+        doc.close()
+    page_count = len(page_indices)
+    if not page_count:
+        return []
+
+    workers = min(_worker_count(workers), page_count)
+    if workers <= 1 or page_count < settings.PDF_RASTER_PARALLEL_MIN_PAGES:
+        pages = _render_indices(pdf_path, page_indices, policy)
+        logger.info(f"Rendered {page_count} pages serially in {time.monotonic() - started:.2f}s "
+                    f"({sum(len(p.data) for p in pages) / 1024:.0f} KB)")
+        return pages
+
+    shards = _shards(page_indices, workers)
+    try:
+        pool = _get_pool(workers)
+        futures = [pool.submit(_render_indices, pdf_path, shard, policy) for shard in shards]
+        pages = [page for future in futures for page in future.result()]
+    except Exception as e:
+        # A broken or unavailable pool must not fail the document
+        logger.warning(f"Parallel rendering failed, rendering serially: {e}")
+        _shutdown_pool()
+        pages = _render_indices(pdf_path, page_indices, policy)
+
+    logger.info(f"Rendered {page_count} pages on {len(shards)} workers in {time.monotonic() - started:.2f}s "
+                f"({sum(len(p.data) for p in pages) / 1024:.0f} KB)")
+    return pages
+
+
+def rasterize_pdf(pdf_path: str, dpi: int = DEFAULT_DPI, workers: Optional[int] = None) -> List[Image.Image]:
+    """
+    Render every page of a PDF to a PIL image (PNG, untrimmed)
+
+    Args:
+        pdf_path: Path to the PDF file
+        dpi: Rendering resolution
+        workers: Worker processes (defaults to PDF_RASTER_WORKERS; 0 means one per CPU)
+
+    Returns:
+        List of PIL Images, one per page, in page order
+    """
+    return [page.to_image() for page in render_pages(pdf_path, RenderPolicy(dpi=dpi), workers)]
@@ -0,0 +1,208 @@
+"""
+Shared Rate Limiting for AI Shark LLM Callers
+
+Process-wide token-bucket rate limiters keyed by provider/model. Each limiter
+enforces a requests-per-minute and a tokens-per-minute budget and can be used
+from threads (acquire) and from asyncio code (acquire_async).
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Gemini bills each image part at a flat token count
+TOKENS_PER_IMAGE = 258
+CHARS_PER_TOKEN = 4
+
+
+class TokenBucket:
+    """
+    Token bucket that may go into debt: a reservation is always granted and the
+    caller sleeps until the debt has been refilled, so waiters are served in order.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = float(capacity)
+        self.refill_per_second = float(refill_per_second)
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self.last_refill
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+            self.last_refill = now
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take amount tokens from the bucket
+
+        Returns:
+            Seconds the caller has to wait before the reservation is honoured
+        """
+        self._refill(now)
+        self.tokens -= amount
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.refill_per_second
+
+
+class RateLimiter:
+    """
+    Thread-safe, async-aware limiter combining request and token budgets
+    """
+
+    def __init__(self, name: str, requests_per_minute: int, tokens_per_minute: Optional[int] = None):
+        """
+        Initialize rate limiter
+
+        Args:
+            name: Identifier used in logs (e.g. "google/gemini-2.5-flash")
+            requests_per_minute: Maximum requests per minute (<= 0 disables the limit)
+            tokens_per_minute: Maximum estimated prompt tokens per minute (<= 0 or None disables the limit)
+        """
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._lock = threading.Lock()
+
+        self.request_bucket = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+            if requests_per_minute and requests_per_minute > 0 else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+            if tokens_per_minute and tokens_per_minute > 0 else None
+        )
+
+        # Statistics
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.total_wait_time = 0.0
+
+    def _reserve(self, tokens: int) -> float:
+        """Reserve one request and the given tokens, returning the required wait"""
+        with self._lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self.request_bucket:
+                wait = max(wait, self.request_bucket.reserve(1, now))
+            if self.token_bucket and tokens > 0:
+                # A single request larger than the whole budget waits for one full window
+                amount = min(tokens, self.token_bucket.capacity)
+                wait = max(wait, self.token_bucket.reserve(amount, now))
+            self.total_requests += 1
+            self.total_tokens += max(tokens, 0)
+            self.total_wait_time += wait
+            return wait
+
+    def acquire(self, tokens: int = 0) -> float:
+        """
+        Block until the request fits within the budgets
+
+        Args:
+            tokens: Estimated prompt tokens for the request
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiting {self.name}: sleeping for {wait:.2f} seconds")
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: int = 0) -> float:
+        """
+        Wait (without blocking the event loop) until the request fits within the budgets
+
+        Args:
+            tokens: Estimated prompt tokens for the request
+
+        Returns:
+            Seconds spent waiting
+        """
+        wait = self._reserve(tokens)
+        if wait > 0:
+            logger.debug(f"Rate limiting {self.name}: sleeping for {wait:.2f} seconds")
+            await asyncio.sleep(wait)
+        return wait
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter configuration and usage statistics"""
+        return {
+            "name": self.name,
+            "requests_per_minute": self.requests_per_minute,
+            "tokens_per_minute": self.tokens_per_minute,
+            "total_requests": self.total_requests,
+            "total_tokens": self.total_tokens,
+            "total_wait_time": self.total_wait_time
+        }
+
+
+def estimate_prompt_tokens(content: Any) -> int:
+    """
+    Cheaply estimate the prompt tokens of a request
+
+    Args:
+        content: Prompt string or list of prompt parts (text, images, blobs)
+
+    Returns:
+        Estimated token count
+    """
+    if content is None:
+        return 0
+    if isinstance(content, str):
+        return max(1, len(content) // CHARS_PER_TOKEN)
+    if isinstance(content, (list, tuple)):
+        return sum(estimate_prompt_tokens(part) for part in content)
+    if isinstance(content, dict) and "text" in content:
+        return estimate_prompt_tokens(content["text"])
+    # Images, blobs and uploaded file references
+    return TOKENS_PER_IMAGE
+
+
+def _budgets_for(provider: str) -> Tuple[int, int]:
+    """Read the per-minute budgets for a provider from settings"""
+    if provider == "groq":
+        return settings.GROQ_REQUESTS_PER_MINUTE, settings.GROQ_TOKENS_PER_MINUTE
+    return settings.GEMINI_REQUESTS_PER_MINUTE, settings.GEMINI_TOKENS_PER_MINUTE
+
+
+_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(provider: str, model: str) -> RateLimiter:
+    """
+    Get the process-wide limiter for a provider/model pair
+
+    Args:
+        provider: LLM provider ("google" or "groq")
+        model: Model name
+
+    Returns:
+        Shared RateLimiter instance
+    """
+    key = (provider.lower(), model)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(key)
+            if limiter is None:
+                requests_per_minute, tokens_per_minute = _budgets_for(key[0])
+                limiter = RateLimiter(f"{key[0]}/{model}", requests_per_minute, tokens_per_minute)
+                _limiters[key] = limiter
+    return limiter
+
+
+def get_all_rate_limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """Get statistics for every limiter created in this process"""
+    return {limiter.name: limiter.get_stats() for limiter in list(_limiters.values())}
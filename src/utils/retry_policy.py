@@ -0,0 +1,453 @@
+"""
+Unified Retry and Deadline Engine for AI Shark LLM Calls
+
+One retry layer wraps each provider request. Errors are classified: rate
+limits (429), server errors (5xx), timeouts and connection failures are
+retried with full-jitter exponential backoff, honoring any Retry-After the
+provider sends; client errors (4xx), safety blocks and open circuits fail
+immediately. Every request has an overall deadline covering all attempts and
+backoff sleeps, and a process-wide retry budget stops retry storms when a
+provider is struggling.
+
+Policies nest safely: a policy invoked while another one is active runs its
+function once and leaves retrying to the outer policy, so retries never
+multiply across layers.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import re
+import threading
+import time
+from collections import deque
+from email.utils import parsedate_to_datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+from config.settings import settings
+from src.utils.circuit_breaker import CircuitBreakerOpenError, is_provider_failure
+from src.utils.llm_telemetry import attempt_context
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+_SAFETY_BLOCK_TYPES = {"BlockedPromptException", "StopCandidateException"}
+# The SDK's own wording only; "blocked" alone also appears in proxy and quota errors
+_SAFETY_BLOCK_MARKERS = ("finish_reason: safety", "finish_reason is safety", "block_reason", "blocked prompt",
+                         "prompt was blocked", "safety rating")
+
+# "Please retry in 17.2s." / "retry_delay {\n  seconds: 17\n}"
+_RETRY_DELAY_PATTERNS = (
+    re.compile(r"retry in\s+([\d.]+)\s*s", re.IGNORECASE),
+    re.compile(r"retry_delay\s*\{\s*seconds:\s*(\d+)", re.IGNORECASE),
+)
+
+# Absolute monotonic deadline of the active retry scope, if any
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("llm_deadline", default=None)
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """Yield an exception and the exceptions it was raised from"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def _status_code(error: BaseException) -> Optional[int]:
+    status = getattr(error, "status_code", None) or getattr(error, "code", None)
+    if isinstance(status, int) and 100 <= status < 600:
+        return status
+    return None
+
+
+def is_safety_block(error: BaseException) -> bool:
+    """Check whether an exception reports a prompt or response blocked by safety filters"""
+    if type(error).__name__ in _SAFETY_BLOCK_TYPES:
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in _SAFETY_BLOCK_MARKERS)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Decide whether an LLM call error is worth retrying
+
+    Args:
+        error: Exception raised by the call (causes are inspected too)
+
+    Returns:
+        True for 408/429/5xx, timeouts and connection failures; False for other
+        client errors, safety blocks, open circuits and unrecognized errors
+    """
+    for err in _error_chain(error):
+        if isinstance(err, CircuitBreakerOpenError) or is_safety_block(err):
+            return False
+        status = _status_code(err)
+        if status is not None:
+            return status in RETRYABLE_STATUS_CODES
+        if is_provider_failure(err):
+            return True
+    return False
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Read the provider's requested retry delay from an exception
+
+    Looks at a retry_after attribute, a Retry-After response header and the
+    retry delay Gemini embeds in quota errors.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        Seconds to wait, or None if the provider did not say
+    """
+    for err in _error_chain(error):
+        value = getattr(err, "retry_after", None)
+        headers = getattr(getattr(err, "response", None), "headers", None)
+        if value is None and headers is not None:
+            try:
+                value = headers.get("retry-after")
+            except Exception:
+                value = None
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                try:
+                    return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+                except (TypeError, ValueError):
+                    pass
+
+        message = str(err)
+        for pattern in _RETRY_DELAY_PATTERNS:
+            match = pattern.search(message)
+            if match:
+                return float(match.group(1))
+    return None
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left before the active request deadline, or None outside a retry scope"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries within a sliding window
+
+    Retries may make up at most `ratio` of the requests seen in the window,
+    with a small floor so a quiet process can still retry.
+    """
+
+    def __init__(self,
+                 ratio: Optional[float] = None,
+                 min_retries_per_window: Optional[int] = None,
+                 window_seconds: float = 60.0):
+        """
+        Initialize the budget
+
+        Args:
+            ratio: Allowed retries per request in the window
+            min_retries_per_window: Retries always allowed per window
+            window_seconds: Sliding window length
+        """
+        self.ratio = settings.LLM_RETRY_BUDGET_RATIO if ratio is None else ratio
+        self.min_retries = settings.LLM_RETRY_BUDGET_MIN_PER_MINUTE if min_retries_per_window is None else min_retries_per_window
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._retries = deque()
+
+        # Statistics
+        self.denied = 0
+
+    def _trim(self, now: float) -> None:
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window_seconds:
+                events.popleft()
+
+    def record_request(self) -> None:
+        """Count a new (first-attempt) request"""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_acquire(self) -> bool:
+        """
+        Take one retry from the budget
+
+        Returns:
+            True if the retry may proceed
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            allowed = max(self.min_retries, int(len(self._requests) * self.ratio))
+            if len(self._retries) >= allowed:
+                self.denied += 1
+                return False
+            self._retries.append(now)
+            return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get window counters"""
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "requests_in_window": len(self._requests),
+                "retries_in_window": len(self._retries),
+                "denied_retries": self.denied
+            }
+
+
+class RetryPolicy:
+    """
+    Classified, deadline-bounded retries with jittered backoff
+    """
+
+    def __init__(self,
+                 name: str,
+                 max_attempts: int,
+                 base_delay: float,
+                 max_delay: Optional[float] = None,
+                 deadline_seconds: Optional[float] = None,
+                 attempt_timeout: Optional[float] = None,
+                 budget: Optional[RetryBudget] = None):
+        """
+        Initialize the policy
+
+        Args:
+            name: Name used in logs
+            max_attempts: Total attempts per request, including the first
+            base_delay: Backoff base in seconds (doubled per attempt, full jitter)
+            max_delay: Backoff cap in seconds
+            deadline_seconds: Overall time allowed for all attempts and sleeps
+            attempt_timeout: Timeout for a single attempt
+            budget: Shared retry budget (defaults to the process-wide one)
+        """
+        self.name = name
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay if max_delay is not None else settings.LLM_RETRY_MAX_DELAY
+        self.deadline_seconds = deadline_seconds if deadline_seconds is not None else settings.LLM_REQUEST_DEADLINE_SECONDS
+        self.attempt_timeout = attempt_timeout if attempt_timeout is not None else settings.LLM_ATTEMPT_TIMEOUT_SECONDS
+        self.budget = budget or retry_budget
+
+        # Statistics
+        self.retries = 0
+        self.gave_up = 0
+
+    def attempt_timeout_seconds(self) -> float:
+        """Timeout for the next attempt, shortened to fit the active deadline"""
+        remaining = remaining_time()
+        if remaining is None:
+            return self.attempt_timeout
+        return max(1.0, min(self.attempt_timeout, remaining))
+
+    def request_options(self) -> Dict[str, Any]:
+        """genai request_options for one attempt: bounded timeout, no SDK-level retry"""
+        return {"timeout": self.attempt_timeout_seconds(), "retry": None}
+
+    def _retry_delay(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Decide whether to retry after a failed attempt; returns the sleep or None to give up"""
+        if not is_retryable(error):
+            return None
+        if attempt + 1 >= self.max_attempts:
+            logger.warning(f"[{self.name}] giving up after {attempt + 1} attempts: {error}")
+            self.gave_up += 1
+            return None
+
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        requested = retry_after_seconds(error)
+        if requested is not None:
+            delay = max(delay, requested)
+
+        remaining = remaining_time()
+        if remaining is not None and delay >= remaining:
+            logger.warning(f"[{self.name}] not retrying: {delay:.1f}s backoff exceeds the "
+                           f"{remaining:.1f}s left before the deadline")
+            self.gave_up += 1
+            return None
+        if not self.budget.try_acquire():
+            logger.warning(f"[{self.name}] not retrying: process-wide retry budget exhausted")
+            self.gave_up += 1
+            return None
+
+        self.retries += 1
+        logger.warning(f"[{self.name}] attempt {attempt + 1} failed: {error}. Retrying in {delay:.1f}s")
+        return delay
+
+    def _enter_scope(self):
+        deadline = time.monotonic() + self.deadline_seconds
+        outer = _deadline.get()
+        if outer is not None:
+            deadline = min(deadline, outer)
+        return _deadline.set(deadline)
+
+    def call(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call a function under this policy
+
+        Args:
+            func: Function performing one attempt
+            *args, **kwargs: Arguments for the function
+
+        Returns:
+            The function's result
+        """
+        if _deadline.get() is not None:
+            # An outer policy owns the retries and the deadline
+            return func(*args, **kwargs)
+
+        token = self._enter_scope()
+        self.budget.record_request()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    with attempt_context(attempt):
+                        return func(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+        finally:
+            _deadline.reset(token)
+
+    async def acall(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Async counterpart of call for coroutine functions"""
+        if _deadline.get() is not None:
+            return await func(*args, **kwargs)
+
+        token = self._enter_scope()
+        self.budget.record_request()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    with attempt_context(attempt):
+                        return await func(*args, **kwargs)
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+        finally:
+            _deadline.reset(token)
+
+    def stream(self, func: Callable[..., Iterable[Any]], *args, **kwargs) -> Iterator[Any]:
+        """
+        Iterate a stream under this policy
+
+        Failures before the first item are retried like any other attempt. Once an
+        item has been yielded the stream is not restarted (the caller has already
+        consumed partial output), so later failures propagate.
+
+        Args:
+            func: Function opening one attempt's stream (e.g. a generator function)
+            *args, **kwargs: Arguments for the function
+
+        Yields:
+            The stream's items
+        """
+        if _deadline.get() is not None:
+            yield from func(*args, **kwargs)
+            return
+
+        token = self._enter_scope()
+        self.budget.record_request()
+        try:
+            attempt = 0
+            while True:
+                try:
+                    with attempt_context(attempt):
+                        iterator = iter(func(*args, **kwargs))
+                        first = next(iterator)
+                    break
+                except StopIteration:
+                    return
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+        finally:
+            # The deadline only covers opening the stream, never the caller's code between items
+            _deadline.reset(token)
+
+        yield first
+        yield from iterator
+
+    def __call__(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """Use the policy as a decorator (sync or async functions)"""
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                return await self.acall(func, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(func, *args, **kwargs)
+        return wrapper
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get policy configuration and counters"""
+        return {
+            "name": self.name,
+            "max_attempts": self.max_attempts,
+            "deadline_seconds": self.deadline_seconds,
+            "attempt_timeout": self.attempt_timeout,
+            "retries": self.retries,
+            "gave_up": self.gave_up,
+            "budget": self.budget.get_stats()
+        }
+
+
+# Process-wide retry budget and per-provider policies
+retry_budget = RetryBudget()
+_policies: Dict[str, RetryPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_retry_policy(provider: str = "google") -> RetryPolicy:
+    """
+    Get the process-wide retry policy for a provider
+
+    Attempts and base delay come from GEMINI_RETRY_* or GROQ_RETRY_* settings.
+
+    Args:
+        provider: LLM provider ("google" or "groq")
+
+    Returns:
+        Shared RetryPolicy instance
+    """
+    key = provider.lower()
+    policy = _policies.get(key)
+    if policy is None:
+        with _policies_lock:
+            policy = _policies.get(key)
+            if policy is None:
+                if key == "groq":
+                    attempts, delay = settings.GROQ_RETRY_ATTEMPTS, settings.GROQ_RETRY_DELAY
+                else:
+                    attempts, delay = settings.GEMINI_RETRY_ATTEMPTS, settings.GEMINI_RETRY_DELAY
+                policy = RetryPolicy(key, max_attempts=attempts, base_delay=delay)
+                _policies[key] = policy
+    return policy
@@ -0,0 +1,154 @@
+"""
+Single-Flight Request Coalescing for AI Shark
+
+When several callers issue the same LLM request at the same time, only the
+first one (the leader) reaches the provider. Later callers with the same
+request key wait on the leader's future and receive its result or exception.
+A leader that is cancelled or interrupted rather than failing hands the
+request over to one of its waiters.
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+
+class _LeaderAbandoned(Exception):
+    """Tells waiters the leader was interrupted before finishing, so one of them must take over"""
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls across threads and event loops
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+        # Statistics
+        self.leader_calls = 0
+        self.shared_calls = 0
+
+    def _join(self, key: str):
+        """Register interest in key, returning (future, is_leader)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = Future()
+                self._calls[key] = future
+                self.leader_calls += 1
+                return future, True
+            self.shared_calls += 1
+            return future, False
+
+    def _finish(self, key: str) -> None:
+        with self._lock:
+            self._calls.pop(key, None)
+
+    def _settle(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        """Release key, then hand the leader's outcome to its waiters"""
+        # Released first, so a waiter taking over an abandoned call never re-joins the finished future
+        self._finish(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers sharing key
+
+        If the leader is interrupted (KeyboardInterrupt, cancellation) instead of
+        failing, its waiters do not inherit that: one of them runs the call again
+        as the new leader.
+
+        A sync waiter blocks its thread until the leader finishes. Never call do()
+        from an event loop thread while the leader is a do_async() call on that same
+        loop: the leader cannot make progress and the loop blocks for good.
+
+        Args:
+            key: Request key (e.g. the response cache key)
+            fn: Zero-argument callable performing the request
+
+        Returns:
+            Result of the leader's call; exceptions propagate to every waiter
+        """
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                break
+            logger.info("Identical LLM request already in flight, waiting for its result")
+            try:
+                return future.result()
+            except _LeaderAbandoned:
+                logger.info("Leader of an identical LLM request was interrupted, taking over")
+
+        try:
+            result = fn()
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            self._settle(key, future, error=_LeaderAbandoned())
+            raise
+        self._settle(key, future, result)
+        return result
+
+    async def do_async(self, key: str, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Async counterpart of do; waiters can be in any thread or event loop
+
+        Cancelling a waiter only cancels that waiter. Cancelling the leader hands
+        the call to one of its waiters, which runs it again as the new leader.
+
+        Args:
+            key: Request key (e.g. the response cache key)
+            coro_fn: Zero-argument callable returning the awaitable performing the request
+
+        Returns:
+            Result of the leader's call; exceptions propagate to every waiter
+        """
+        while True:
+            future, is_leader = self._join(key)
+            if is_leader:
+                break
+            logger.info("Identical LLM request already in flight, waiting for its result")
+            try:
+                # Shielded, so a cancelled waiter does not cancel the shared future
+                return await asyncio.shield(asyncio.wrap_future(future))
+            except _LeaderAbandoned:
+                logger.info("Leader of an identical LLM request was cancelled, taking over")
+
+        try:
+            result = await coro_fn()
+        except Exception as e:
+            self._settle(key, future, error=e)
+            raise
+        except BaseException:
+            self._settle(key, future, error=_LeaderAbandoned())
+            raise
+        self._settle(key, future, result)
+        return result
+
+    def in_flight(self) -> int:
+        """Number of distinct requests currently in flight"""
+        with self._lock:
+            return len(self._calls)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get leader/shared call counters"""
+        return {
+            "leader_calls": self.leader_calls,
+            "shared_calls": self.shared_calls,
+            "in_flight": self.in_flight()
+        }
+
+
+# Process-wide instance shared by every LLM client
+llm_request_flight = SingleFlight()
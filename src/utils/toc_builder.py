@@ -0,0 +1,302 @@
+"""
+Local Table of Contents Builder for AI Shark
+
+Builds the Stage 1 pitch deck metadata (startup name, sector, website and the
+topic -> pages map) from the PDF text layer, without a vision call:
+
+    - every page is scored against a keyword model of the standard pitch deck
+      topics; slide titles weigh more than body text, and terms are
+      IDF-weighted over the deck so words on every slide count little
+    - the website comes from URL-like strings, the name from the cover slide
+      title (confirmed against the website domain or a legal-entity mention)
+    - sector and sub-sector come from a keyword map and stay null if unclear
+
+The result carries a confidence; callers fall back to the LLM when it is
+below TOC_LOCAL_MIN_CONFIDENCE or the name could not be found, e.g. for
+decks exported as images.
+"""
+
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from src.utils.page_classifier import PageText
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Topic names follow the metadata_extraction prompt
+TOPIC_KEYWORDS: Dict[str, List[str]] = {
+    "Problem": ["problem", "pain", "pain point", "challenge", "opportunity", "why now", "status quo", "inefficient"],
+    "Solution": ["solution", "product", "how it works", "platform", "features", "demo", "technology", "our approach"],
+    "Market_Size": ["market", "market size", "tam", "sam", "som", "addressable", "market opportunity", "cagr"],
+    "Business_Model": ["business model", "revenue model", "pricing", "monetization", "subscription", "unit economics"],
+    "Competition": ["competition", "competitors", "competitive", "landscape", "alternatives", "differentiation", "moat"],
+    "Team": ["team", "founders", "founder", "leadership", "advisors", "ceo", "cto", "management", "board"],
+    "Traction": ["traction", "growth", "customers", "users", "milestones", "pilots", "mrr", "arr", "retention"],
+    "Financials": ["financials", "financial", "revenue", "projections", "forecast", "p&l", "ebitda", "burn", "margin"],
+    "Go_To_Market": ["go to market", "go-to-market", "gtm", "sales strategy", "distribution", "channels", "acquisition"],
+    "Ask": ["ask", "funding", "raise", "raising", "investment", "use of funds", "round", "seed", "series a"],
+    "Roadmap": ["roadmap", "future", "next steps", "vision", "timeline", "expansion", "plans"]
+}
+
+# Sector -> sub-sector -> keywords
+SECTOR_KEYWORDS: Dict[str, Dict[str, List[str]]] = {
+    "Financial Services": {
+        "Fintech": ["fintech", "payments", "lending", "banking", "credit", "wallet", "neobank", "insurance", "insurtech"]
+    },
+    "Healthcare": {
+        "HealthTech": ["healthtech", "patients", "clinic", "hospital", "telemedicine", "healthcare", "doctors"],
+        "BioTech": ["biotech", "drug", "therapeutics", "clinical trial", "molecule", "genomics"]
+    },
+    "Education": {
+        "Ed-Tech": ["edtech", "ed-tech", "students", "learning", "courses", "teachers", "upskilling"]
+    },
+    "Technology": {
+        "AI": ["artificial intelligence", "machine learning", "llm", "generative ai", "computer vision", "ai-powered"],
+        "SaaS": ["saas", "b2b software", "enterprise software", "workflow", "dashboard", "api"],
+        "Cybersecurity": ["cybersecurity", "security", "threat", "fraud detection", "encryption"]
+    },
+    "Consumer Goods": {
+        "D2C": ["d2c", "direct to consumer", "brand", "e-commerce", "ecommerce", "retail", "apparel", "beauty"]
+    },
+    "Food & Agriculture": {
+        "AgriTech": ["agritech", "farmers", "agriculture", "crop", "farm"],
+        "FoodTech": ["food", "restaurant", "delivery", "kitchen"]
+    },
+    "Energy": {
+        "CleanTech": ["cleantech", "climate", "solar", "renewable", "carbon", "battery", "ev charging"]
+    },
+    "Mobility": {
+        "Logistics": ["logistics", "fleet", "supply chain", "freight", "last mile", "shipping"]
+    },
+    "Real Estate": {
+        "PropTech": ["proptech", "real estate", "property", "rental", "housing"]
+    }
+}
+
+TITLE_WEIGHT = 3.0
+# A page is assigned when its best topic scores at least this much, and this many times the runner-up
+MIN_PAGE_SCORE = 1.0
+MIN_PAGE_MARGIN = 1.3
+
+URL_PATTERN = re.compile(
+    r"(?<![@\w.])((?:https?://)?(?:www\.)?[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]+)*"
+    r"\.(?:com|io|ai|co|app|tech|org|net|in|xyz|dev|health|finance)\b)(?:/[^\s)]*)?",
+    re.IGNORECASE
+)
+ENTITY_PATTERN = re.compile(
+    r"(?:©|\(c\)|copyright)?\s*(?:\d{4}\s+)?([A-Z][\w&.\- ]{1,40}?)\s+"
+    r"(?:Inc\.?|Ltd\.?|LLC|GmbH|Pvt\.?\s*Ltd\.?|Private Limited|Technologies|Labs)\b"
+)
+WORD_PATTERN = re.compile(r"[a-z0-9&]+(?:[-'][a-z0-9]+)*")
+
+# Titles that are never company names
+GENERIC_TITLES = {"pitch deck", "investor presentation", "confidential", "agenda", "welcome", "introduction"}
+
+
+@dataclass
+class LocalMetadata:
+    """
+    Stage 1 metadata built from the text layer, with its confidence
+    """
+    startup_name: Optional[str]
+    sector: Optional[str]
+    sub_sector: Optional[str]
+    website: Optional[str]
+    table_of_contents: Dict[str, List[int]]
+    confidence: float  # share of content pages assigned to a topic with a clear margin
+    page_scores: Dict[int, Dict[str, float]] = field(default_factory=dict)
+
+    def to_metadata(self) -> Dict[str, Any]:
+        """Metadata dictionary in the metadata_extraction format"""
+        return {
+            "startup_name": self.startup_name,
+            "sector": self.sector,
+            "sub_sector": self.sub_sector,
+            "website": self.website,
+            "table_of_contents": self.table_of_contents,
+            "metadata_source": "local"
+        }
+
+
+def _normalize(text: str) -> str:
+    return " ".join(WORD_PATTERN.findall(text.lower()))
+
+
+def _count(phrase: str, text: str) -> int:
+    """Occurrences of a keyword or phrase as whole words in normalized text"""
+    return len(re.findall(rf"(?<!\w){re.escape(phrase)}(?!\w)", text))
+
+
+def score_pages(pages: Sequence[PageText]) -> Dict[int, Dict[str, float]]:
+    """
+    Score every page against every topic (title hits weighted, IDF over the deck)
+
+    Args:
+        pages: PageText per page
+
+    Returns:
+        {page_number: {topic: score}} for pages with a text layer
+    """
+    normalized = {page.page_number: (_normalize(page.title), _normalize(page.text)) for page in pages if page.text}
+    keywords = sorted({keyword for words in TOPIC_KEYWORDS.values() for keyword in words})
+    document_frequency = Counter(
+        keyword for title, body in normalized.values() for keyword in keywords if _count(keyword, body)
+    )
+    page_count = max(1, len(normalized))
+    idf = {keyword: math.log((1 + page_count) / (1 + document_frequency[keyword])) + 1 for keyword in keywords}
+
+    scores = {}
+    for page_number, (title, body) in normalized.items():
+        scores[page_number] = {
+            topic: round(sum(
+                idf[keyword] * (TITLE_WEIGHT * _count(keyword, title) + min(_count(keyword, body), 3) / 3)
+                for keyword in words
+            ), 3)
+            for topic, words in TOPIC_KEYWORDS.items()
+        }
+    return scores
+
+
+def _assign(scores: Dict[str, float]) -> Optional[str]:
+    """Best topic of a page, or None when it is weak or ambiguous"""
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    (best, best_score), runner_up = ranked[0], ranked[1][1] if len(ranked) > 1 else 0.0
+    if best_score < MIN_PAGE_SCORE or best_score < MIN_PAGE_MARGIN * runner_up:
+        return None
+    return best
+
+
+def extract_website(pages: Sequence[PageText]) -> Optional[str]:
+    """
+    Find the company website among URL-like strings (most frequent domain wins, cover and last slide count double)
+
+    Args:
+        pages: PageText per page
+
+    Returns:
+        https:// URL, or None
+    """
+    votes = Counter()
+    for index, page in enumerate(pages):
+        weight = 2 if index in (0, len(pages) - 1) else 1
+        for match in URL_PATTERN.finditer(page.text):
+            domain = re.sub(r"^(?:https?://)?(?:www\.)?", "", match.group(1).lower())
+            votes[domain] += weight
+    if not votes:
+        return None
+    return f"https://{votes.most_common(1)[0][0]}"
+
+
+def extract_startup_name(pages: Sequence[PageText], website: Optional[str]) -> Optional[str]:
+    """
+    Take the cover slide title as the name when the website domain or a legal-entity mention confirms it
+
+    Args:
+        pages: PageText per page
+        website: Extracted website (its domain confirms the name)
+
+    Returns:
+        Startup name, or None when it cannot be confirmed
+    """
+    if not pages:
+        return None
+    domain_stem = re.sub(r"^https://", "", website).split(".")[0] if website else ""
+    squash = lambda text: re.sub(r"[^a-z0-9]", "", text.lower())
+    entities = [m.group(1).strip() for page in pages for m in ENTITY_PATTERN.finditer(page.text)]
+
+    candidates = [page.title for page in pages[:2] if page.title] + entities
+    for candidate in candidates:
+        candidate = candidate.strip(" -|:")
+        if not candidate or candidate.lower() in GENERIC_TITLES or len(candidate.split()) > 5:
+            continue
+        if domain_stem and (squash(candidate) in domain_stem or domain_stem in squash(candidate)):
+            return candidate
+        if any(squash(candidate) == squash(entity) for entity in entities):
+            return candidate
+    # A single legal entity mentioned throughout is a name on its own
+    if entities and Counter(entities).most_common(1)[0][1] >= 2:
+        return Counter(entities).most_common(1)[0][0]
+    return None
+
+
+def classify_sector(pages: Sequence[PageText]) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Pick the sector and sub-sector whose keywords occur most often in the deck
+
+    Args:
+        pages: PageText per page
+
+    Returns:
+        (sector, sub_sector), both None when no sub-sector is mentioned at least twice
+    """
+    text = _normalize(" ".join(page.text for page in pages))
+    best, best_hits = (None, None), 1
+    for sector, sub_sectors in SECTOR_KEYWORDS.items():
+        for sub_sector, words in sub_sectors.items():
+            hits = sum(_count(_normalize(word), text) for word in words)
+            if hits > best_hits:
+                best, best_hits = (sector, sub_sector), hits
+    return best
+
+
+def build_local_metadata(pages: Sequence[PageText]) -> LocalMetadata:
+    """
+    Build Stage 1 metadata from the text layer
+
+    Args:
+        pages: PageText per page (see PageProvider.page_texts)
+
+    Returns:
+        LocalMetadata; check confidence and startup_name before using it
+    """
+    scores = score_pages(pages)
+    toc: Dict[str, List[int]] = {}
+    assigned = 0
+    for page_number in sorted(scores):
+        topic = _assign(scores[page_number])
+        if topic is not None:
+            toc.setdefault(topic, []).append(page_number)
+            assigned += 1
+
+    # The cover (and any closing slide) rarely belongs to a topic, so it does not count against the deck
+    content_pages = max(1, len(pages) - 1)
+    confidence = min(1.0, assigned / content_pages)
+    website = extract_website(pages)
+    sector, sub_sector = classify_sector(pages)
+    ordered_toc = {topic: toc[topic] for topic in TOPIC_KEYWORDS if topic in toc}
+    return LocalMetadata(
+        startup_name=extract_startup_name(pages, website),
+        sector=sector,
+        sub_sector=sub_sector,
+        website=website,
+        table_of_contents=ordered_toc,
+        confidence=round(confidence, 3),
+        page_scores=scores
+    )
+
+
+def local_metadata_or_none(pages: Sequence[PageText]) -> Optional[Dict[str, Any]]:
+    """
+    Get Stage 1 metadata from the text layer when it is confident enough
+
+    Args:
+        pages: PageText per page
+
+    Returns:
+        Metadata dictionary, or None when the LLM should be asked instead
+    """
+    if not pages:
+        return None
+    local = build_local_metadata(pages)
+    confident = (local.startup_name is not None
+                 and local.confidence >= settings.TOC_LOCAL_MIN_CONFIDENCE
+                 and len(local.table_of_contents) >= settings.TOC_LOCAL_MIN_TOPICS)
+    logger.info(f"Local TOC: {len(local.table_of_contents)} topics, confidence {local.confidence:.2f}, "
+                f"name {local.startup_name!r} -> {'using it' if confident else 'falling back to the LLM'}")
+    return local.to_metadata() if confident else None
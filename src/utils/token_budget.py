@@ -0,0 +1,369 @@
+"""
+Token Budget Planner for AI Shark Prompts
+
+Estimates prompt tokens with tiktoken and fits named prompt inputs into a
+token budget. Instead of slicing characters blindly, the planner removes whole
+markdown sections starting with the lowest-priority input, then trailing
+blocks, and never cuts a table or code block in half.
+"""
+
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union, Tuple
+
+from config.settings import settings
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Context windows (input tokens) per model family; matched by longest prefix
+MODEL_CONTEXT_WINDOWS = {
+    "gemini-2.5-pro": 1_048_576,
+    "gemini-2.5-flash": 1_048_576,
+    "gemini-2.0-flash": 1_048_576,
+    "gemini-1.5-pro": 2_097_152,
+    "gemini-1.5-flash": 1_048_576,
+    "llama3-8b-8192": 8_192,
+    "llama3-70b-8192": 8_192,
+    "llama-3.1": 131_072,
+    "llama-3.3": 131_072,
+    "openai/gpt-oss": 131_072,
+}
+DEFAULT_CONTEXT_WINDOW = 32_768
+
+# tiktoken has no Gemini vocabulary; cl100k_base is a close, slightly conservative proxy
+TIKTOKEN_ENCODING = "cl100k_base"
+CHARS_PER_TOKEN = 4
+TRIM_NOTICE_TOKENS = 24
+
+_HEADING_RE = re.compile(r'^#{1,6}\s')
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Load the tiktoken encoding once; None if tiktoken is unavailable"""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+                except Exception as e:
+                    logger.warning(f"tiktoken unavailable, falling back to character estimate: {e}")
+                    _encoding = None
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens in text
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Estimated token count
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return max(1, len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Hard-truncate text to at most max_tokens tokens, preferring a line boundary"""
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        truncated = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        truncated = encoding.decode(tokens[:max_tokens])
+
+    cut = truncated.rfind("\n")
+    if cut > len(truncated) // 2:
+        truncated = truncated[:cut]
+    return truncated.rstrip()
+
+
+def context_window_for(model: Optional[str]) -> int:
+    """Get the input context window for a model name"""
+    if not model:
+        return DEFAULT_CONTEXT_WINDOW
+    name = model.split("/", 1)[1] if model.startswith("models/") else model
+    matches = [prefix for prefix in MODEL_CONTEXT_WINDOWS if name.startswith(prefix)]
+    if not matches:
+        return DEFAULT_CONTEXT_WINDOW
+    return MODEL_CONTEXT_WINDOWS[max(matches, key=len)]
+
+
+@dataclass
+class BudgetInput:
+    """A named prompt input competing for the token budget"""
+    name: str
+    text: str
+    priority: float = 1.0  # Higher priority inputs are trimmed last
+
+
+def split_markdown_sections(text: str) -> List[str]:
+    """Split markdown into sections at headings (headings inside code fences are ignored)"""
+    sections: List[str] = []
+    current: List[str] = []
+    in_fence = False
+
+    for line in text.split("\n"):
+        if line.strip().startswith("```"):
+            in_fence = not in_fence
+        if not in_fence and _HEADING_RE.match(line) and current:
+            sections.append("\n".join(current))
+            current = []
+        current.append(line)
+
+    if current:
+        sections.append("\n".join(current))
+    return sections
+
+
+def split_blocks(section: str) -> List[str]:
+    """
+    Split a section into atomic blocks
+
+    Paragraphs are separated by blank lines; a markdown table or a fenced code
+    block is always a single block so it is never cut in the middle.
+    """
+    blocks: List[str] = []
+    current: List[str] = []
+    in_fence = False
+    current_is_table = False
+
+    def flush():
+        if current:
+            blocks.append("\n".join(current))
+            current.clear()
+
+    for line in section.split("\n"):
+        stripped = line.strip()
+
+        if stripped.startswith("```"):
+            if not in_fence:
+                flush()
+            current.append(line)
+            in_fence = not in_fence
+            if not in_fence:
+                flush()
+            continue
+
+        if in_fence:
+            current.append(line)
+            continue
+
+        if not stripped:
+            flush()
+            continue
+
+        is_table = stripped.startswith("|")
+        if current and is_table != current_is_table:
+            flush()
+        current.append(line)
+        current_is_table = is_table
+
+    flush()
+    return blocks
+
+
+def _is_atomic(block: str) -> bool:
+    """Tables and code blocks must be kept whole or dropped"""
+    stripped = block.lstrip()
+    return stripped.startswith("|") or stripped.startswith("```")
+
+
+class TokenBudgetPlanner:
+    """
+    Plans prompt inputs against a model's context window and a per-call budget
+    """
+
+    def __init__(self, model: Optional[str] = None, reserved_output_tokens: Optional[int] = None):
+        """
+        Initialize the planner
+
+        Args:
+            model: Model the prompt is sent to (defaults to the configured Gemini model)
+            reserved_output_tokens: Tokens kept free for the response
+        """
+        self.model = model or settings.GEMINI_MODEL
+        self.reserved_output_tokens = (
+            reserved_output_tokens if reserved_output_tokens is not None
+            else settings.TOKEN_BUDGET_RESERVED_OUTPUT
+        )
+
+    @property
+    def max_prompt_tokens(self) -> int:
+        """Largest prompt that fits the model's context window"""
+        context_window = context_window_for(self.model)
+        # Small-context models never reserve more than half the window for output
+        return max(0, context_window - min(self.reserved_output_tokens, context_window // 2))
+
+    def estimate(self, text: str) -> int:
+        """Estimate prompt tokens for text"""
+        return count_tokens(text)
+
+    def budget_for(self, cap: Optional[int] = None, overhead_text: str = "") -> int:
+        """
+        Compute the tokens available for variable inputs
+
+        Args:
+            cap: Optional per-call cap on input tokens
+            overhead_text: Fixed prompt text (template, instructions) that is always sent
+
+        Returns:
+            Token budget for the variable inputs
+        """
+        available = self.max_prompt_tokens - count_tokens(overhead_text)
+        if cap is not None:
+            available = min(available, cap)
+        return max(0, available)
+
+    def fit(self, text: str, max_tokens: int) -> str:
+        """
+        Fit a single text into max_tokens, trimming trailing sections first
+
+        Args:
+            text: Markdown or plain text
+            max_tokens: Token budget
+
+        Returns:
+            Text within the budget
+        """
+        return self.allocate({"text": text}, max_tokens)["text"]
+
+    def allocate(self,
+                 inputs: Union[Dict[str, str], Dict[str, Tuple[str, float]], List[BudgetInput]],
+                 budget: int) -> Dict[str, str]:
+        """
+        Fit several named inputs into a shared token budget
+
+        Sections are removed starting with the lowest-priority input and, within an
+        input, from the end. If that is not enough, trailing blocks are removed the
+        same way, and only as a last resort a leading paragraph is truncated.
+
+        Args:
+            inputs: Mapping of name -> text, name -> (text, priority), or BudgetInput list
+            budget: Total token budget for all inputs
+
+        Returns:
+            Mapping of name -> (possibly trimmed) text
+        """
+        items = self._normalize_inputs(inputs)
+        budget = min(budget, self.max_prompt_tokens)
+
+        originals = {item.name: item.text for item in items}
+        total = sum(count_tokens(item.text) for item in items)
+        if total <= budget:
+            return originals
+
+        # Structure: per input, a list of sections, each a list of [block, tokens]
+        structure: Dict[str, List[List[List]]] = {}
+        for item in items:
+            structure[item.name] = [
+                [[block, count_tokens(block)] for block in split_blocks(section)]
+                for section in split_markdown_sections(item.text or "")
+            ]
+
+        def current_total() -> int:
+            return sum(tokens for sections in structure.values()
+                       for blocks in sections for _, tokens in blocks)
+
+        effective_budget = max(0, budget - TRIM_NOTICE_TOKENS * len(items))
+        total = current_total()
+        trimmed: Dict[str, int] = {item.name: 0 for item in items}
+        by_priority = sorted(items, key=lambda item: item.priority)
+
+        # Pass 1: drop whole sections (never an input's first section)
+        candidates = sorted(
+            ((item.priority, -index, item.name, index)
+             for item in items
+             for index in range(1, len(structure[item.name]))),
+        )
+        for _, _, name, index in candidates:
+            if total <= effective_budget:
+                break
+            section = structure[name][index]
+            total -= sum(tokens for _, tokens in section)
+            structure[name][index] = []
+            trimmed[name] += 1
+
+        # Pass 2: drop trailing blocks, keeping each input's first block
+        for item in by_priority:
+            if total <= effective_budget:
+                break
+            sections = structure[item.name]
+            for section_index in range(len(sections) - 1, -1, -1):
+                blocks = sections[section_index]
+                keep = 1 if section_index == 0 else 0
+                while len(blocks) > keep and total > effective_budget:
+                    _, tokens = blocks.pop()
+                    total -= tokens
+                    trimmed[item.name] += 1
+                if total <= effective_budget:
+                    break
+
+        # Pass 3: truncate (or drop, for tables/code) the remaining leading block
+        for item in by_priority:
+            if total <= effective_budget:
+                break
+            sections = structure[item.name]
+            if not sections or not sections[0]:
+                continue
+            block, tokens = sections[0][0]
+            excess = total - effective_budget
+            if _is_atomic(block) or tokens <= excess:
+                sections[0].pop(0)
+                total -= tokens
+            else:
+                shortened = truncate_to_tokens(block, tokens - excess)
+                new_tokens = count_tokens(shortened)
+                sections[0][0] = [shortened, new_tokens]
+                total -= tokens - new_tokens
+            trimmed[item.name] += 1
+
+        result = {}
+        for item in items:
+            if not trimmed[item.name]:
+                result[item.name] = originals[item.name]
+                continue
+            kept = [
+                "\n\n".join(block for block, _ in blocks)
+                for blocks in structure[item.name] if blocks
+            ]
+            text = "\n\n".join(kept)
+            text += f"\n\n*[Trimmed to fit the token budget: {trimmed[item.name]} part(s) omitted]*"
+            result[item.name] = text.strip()
+            logger.info(f"Token budget: trimmed '{item.name}' "
+                        f"({count_tokens(originals[item.name])} -> {count_tokens(result[item.name])} tokens)")
+
+        return result
+
+    @staticmethod
+    def _normalize_inputs(inputs) -> List[BudgetInput]:
+        if isinstance(inputs, dict):
+            items = []
+            for name, value in inputs.items():
+                if isinstance(value, tuple):
+                    text, priority = value
+                    items.append(BudgetInput(name=name, text=text or "", priority=priority))
+                else:
+                    items.append(BudgetInput(name=name, text=value or ""))
+            return items
+        return list(inputs)
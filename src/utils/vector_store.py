@@ -0,0 +1,292 @@
+"""
+Persistent NumPy Vector Store for AI Shark
+
+Per-company embedding store kept next to the company's other outputs:
+
+    <company_dir>/vector_store/vectors.npy   float32 matrix, one row per entry
+    <company_dir>/vector_store/index.json    ids, text hashes and metadata
+
+The matrix is opened memory-mapped, so loading a store is instant and search
+only pages in what it touches. Entries are keyed by a hash of the embedding
+model and text; add_texts embeds only texts that are not stored yet, so
+re-running the pipeline costs no embedding calls for unchanged content.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+STORE_DIRNAME = "vector_store"
+VECTORS_FILENAME = "vectors.npy"
+INDEX_FILENAME = "index.json"
+
+
+def text_hash(text: str, model: str = "") -> str:
+    """
+    Hash a text for deduplication
+
+    Args:
+        text: Embedded text
+        model: Embedding model (vectors from different models never match)
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return hashlib.sha256(f"{model}|{text}".encode("utf-8")).hexdigest()
+
+
+class VectorStore:
+    """
+    Memory-mapped float32 vector store with a JSON id/metadata sidecar
+    """
+
+    def __init__(self, store_dir: Path, model: str):
+        """
+        Open (or prepare) a store
+
+        Args:
+            store_dir: Directory holding vectors.npy and index.json
+            model: Embedding model the vectors come from
+        """
+        self.store_dir = Path(store_dir)
+        self.model = model
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._entries: List[Dict[str, Any]] = []
+        self._rows_by_id: Dict[str, int] = {}
+        self._rows_by_hash: Dict[str, int] = {}
+        self._load()
+
+    @property
+    def vectors_path(self) -> Path:
+        return self.store_dir / VECTORS_FILENAME
+
+    @property
+    def index_path(self) -> Path:
+        return self.store_dir / INDEX_FILENAME
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # Persistence
+
+    def _load(self) -> None:
+        """Open the sidecar and memory-map the vectors, ignoring a store from another model"""
+        if not (self.index_path.exists() and self.vectors_path.exists()):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("model") != self.model:
+                logger.warning(f"Vector store {self.store_dir} was built with {index.get('model')}, "
+                               f"ignoring it for {self.model}")
+                return
+            vectors = np.load(self.vectors_path, mmap_mode="r")
+            entries = index.get("entries", [])
+            if vectors.ndim != 2 or vectors.shape[0] != len(entries):
+                logger.warning(f"Vector store {self.store_dir} is inconsistent, ignoring it")
+                return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load vector store {self.store_dir}: {e}")
+            return
+
+        self._vectors = vectors
+        self._entries = entries
+        self._reindex()
+        logger.info(f"Loaded {len(entries)} vectors from {self.store_dir}")
+
+    def _reindex(self) -> None:
+        self._rows_by_id = {entry["id"]: row for row, entry in enumerate(self._entries)}
+        self._rows_by_hash = {entry["hash"]: row for row, entry in enumerate(self._entries)}
+
+    def _write(self, vectors: np.ndarray, entries: List[Dict[str, Any]]) -> None:
+        """Write the matrix and sidecar atomically, then re-map the matrix"""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_vectors = tempfile.mkstemp(dir=str(self.store_dir), suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, vectors)
+        fd, tmp_index = tempfile.mkstemp(dir=str(self.store_dir), suffix=".json.tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"model": self.model, "dimensions": int(vectors.shape[1]), "entries": entries},
+                      f, ensure_ascii=False)
+
+        os.replace(tmp_vectors, self.vectors_path)
+        os.replace(tmp_index, self.index_path)
+        self._vectors = np.load(self.vectors_path, mmap_mode="r")
+        self._entries = entries
+        self._reindex()
+
+    # Writes
+
+    def contains(self, hash_value: str) -> bool:
+        """Check whether a text hash is stored"""
+        return hash_value in self._rows_by_hash
+
+    def add(self,
+            ids: Sequence[str],
+            texts: Sequence[str],
+            vectors: Sequence[Sequence[float]],
+            metadata: Optional[Sequence[Dict[str, Any]]] = None) -> int:
+        """
+        Store embedded texts; texts already stored (by hash) are skipped
+
+        Args:
+            ids: Entry ids (an existing id is replaced)
+            texts: Embedded texts (only their hashes are stored)
+            vectors: Embeddings, one per text
+            metadata: Optional metadata dictionaries, one per text
+
+        Returns:
+            Number of entries written
+        """
+        if not (len(ids) == len(texts) == len(vectors)):
+            raise ValueError("ids, texts and vectors must have the same length")
+        metadata = metadata or [{} for _ in ids]
+
+        with self._lock:
+            entries = list(self._entries)
+            rows = [] if self._vectors is None else [self._vectors]
+            new_rows = []
+            replaced, added = set(), set()
+            for entry_id, text, vector, meta in zip(ids, texts, vectors, metadata):
+                hash_value = text_hash(text, self.model)
+                if hash_value in self._rows_by_hash or hash_value in added:
+                    continue
+                added.add(hash_value)
+                if entry_id in self._rows_by_id:
+                    replaced.add(self._rows_by_id[entry_id])
+                entries.append({"id": entry_id, "hash": hash_value, "metadata": meta})
+                new_rows.append(vector)
+            if not new_rows:
+                return 0
+
+            matrix = np.concatenate(rows + [np.asarray(new_rows, dtype=np.float32)], axis=0)
+            if replaced:
+                keep = [row for row in range(len(entries)) if row not in replaced]
+                matrix = matrix[keep]
+                entries = [entries[row] for row in keep]
+            self._write(np.ascontiguousarray(matrix, dtype=np.float32), entries)
+        logger.info(f"Stored {len(new_rows)} vectors in {self.store_dir} ({len(self)} total)")
+        return len(new_rows)
+
+    def add_texts(self,
+                  texts: Sequence[str],
+                  ids: Optional[Sequence[str]] = None,
+                  metadata: Optional[Sequence[Dict[str, Any]]] = None,
+                  embed: Optional[Callable[[List[str]], List[List[float]]]] = None) -> int:
+        """
+        Embed and store texts, embedding only those not stored yet
+
+        Args:
+            texts: Texts to store
+            ids: Entry ids (default to the text hashes)
+            metadata: Optional metadata dictionaries, one per text
+            embed: Batch embedding function (defaults to LLMManager.generate_embeddings_batch)
+
+        Returns:
+            Number of texts embedded and stored
+        """
+        hashes = [text_hash(text, self.model) for text in texts]
+        ids = list(ids) if ids is not None else hashes
+        metadata = list(metadata) if metadata is not None else [{} for _ in texts]
+
+        # Skip stored texts and duplicates within this call
+        pending, seen = [], set()
+        for i, hash_value in enumerate(hashes):
+            if not self.contains(hash_value) and hash_value not in seen:
+                seen.add(hash_value)
+                pending.append(i)
+        if not pending:
+            logger.info(f"All {len(texts)} texts already embedded in {self.store_dir}")
+            return 0
+
+        if embed is None:
+            from src.utils.llm_manager import llm_manager
+            embed = llm_manager.generate_embeddings_batch
+        vectors = embed([texts[i] for i in pending])
+        logger.info(f"Embedded {len(pending)} of {len(texts)} texts ({len(texts) - len(pending)} already stored)")
+        return self.add(
+            [ids[i] for i in pending],
+            [texts[i] for i in pending],
+            vectors,
+            [metadata[i] for i in pending]
+        )
+
+    # Reads
+
+    def get(self, entry_id: str) -> Optional[np.ndarray]:
+        """Get the vector stored under an id"""
+        row = self._rows_by_id.get(entry_id)
+        return None if row is None else np.array(self._vectors[row])
+
+    def search(self, query_vector: Sequence[float], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Find the entries most similar to a query vector (cosine similarity)
+
+        Args:
+            query_vector: Query embedding
+            top_k: Number of results
+
+        Returns:
+            List of {"id", "score", "metadata"} dictionaries, best first
+        """
+        if self._vectors is None or not len(self._entries):
+            return []
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(self._vectors, axis=1) * (np.linalg.norm(query) or 1.0)
+        scores = (self._vectors @ query) / np.where(norms == 0, 1.0, norms)
+        top_k = min(top_k, len(scores))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {"id": self._entries[row]["id"], "score": float(scores[row]), "metadata": self._entries[row]["metadata"]}
+            for row in best
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store location, model and size"""
+        return {
+            "store_dir": str(self.store_dir),
+            "model": self.model,
+            "entries": len(self._entries),
+            "dimensions": None if self._vectors is None else int(self._vectors.shape[1])
+        }
+
+
+_stores: Dict[str, VectorStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_vector_store(company_dir: str, model: Optional[str] = None) -> VectorStore:
+    """
+    Get the shared vector store of a company output directory
+
+    Args:
+        company_dir: Company output directory
+        model: Embedding model (defaults to the configured Gemini embedding model)
+
+    Returns:
+        VectorStore instance
+    """
+    if model is None:
+        from src.utils.llm_manager import llm_manager
+        model = llm_manager.gemini_embedding_model
+    store_dir = Path(company_dir) / STORE_DIRNAME
+    key = f"{store_dir.resolve()}|{model}"
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = VectorStore(store_dir, model)
+            _stores[key] = store
+    return store
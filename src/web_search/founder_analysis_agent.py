@@ -1,41 +1,27 @@
-import google.generativeai as genai
 from typing import Dict, List, Any, Optional
 import json
 import os
 from dotenv import load_dotenv
 import re
-import time # Added for retry_with_backoff
-import functools # Added for retry_with_backoff
 
-load_dotenv()
+from config.settings import settings
+from src.utils.token_budget import TokenBudgetPlanner
+from src.utils.llm_telemetry import get_llm_telemetry
+from src.utils.retry_policy import get_retry_policy
+from src.utils.client_registry import get_client_registry
+from src.utils.llm_cache import get_llm_cache
+from src.utils.llm_cassette import get_llm_cassette
 
-# --- Retry Decorator (Copied from test_linkedin.py) ---
-def retry_with_backoff(retries=3, backoff_factor=2.0):
-    """A decorator for retrying a function with exponential backoff."""
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(*args, **kwargs):
-            for attempt in range(retries):
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    print(f"Call to {func.__name__} attempt {attempt + 1}/{retries} failed: {e}")
-                    if attempt < retries - 1:
-                        sleep_time = backoff_factor ** attempt
-                        print(f"Retrying in {sleep_time:.2f} seconds...")
-                        time.sleep(sleep_time)
-                    else:
-                        print(f"Max retries reached for {func.__name__}.")
-                        raise # Re-raise the exception after the last attempt
-            raise RuntimeError(f"Function {func.__name__} failed after {retries} retries")
-        return wrapper
-    return decorator
+load_dotenv()
 
 
 class FounderAnalysisAgent:
     def __init__(self, api_key: str):
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel(os.getenv("GEMINI_MODEL"))
+        clients = get_client_registry()
+        clients.configure_genai(api_key)
+        self.model = clients.generative_model(os.getenv("GEMINI_MODEL"))
+        self.budget_planner = TokenBudgetPlanner(model=os.getenv("GEMINI_MODEL"))
+        self.retry_policy = get_retry_policy("google")
 
     def _extract_json_from_response(self, text: str) -> Optional[str]:
         """Extracts a JSON object from a string, even with markdown fences."""
@@ -47,7 +33,6 @@ class FounderAnalysisAgent:
             return match.group(0)
         return None
 
-    @retry_with_backoff(retries=3, backoff_factor=2.0) # Applied decorator here
     def analyze_search_results(self, search_results: List[Dict], person_name: str, role: str) -> Dict[str, Any]:
         """Use Google ADK to analyze and extract information about a person."""
         print(f"--- FounderAnalysisAgent: Received search_results ---")
@@ -76,13 +61,31 @@ class FounderAnalysisAgent:
         ---
         """
 
+        # Recorded or replayed by the LLM cassette, like the pipeline's other model requests
+        cassette = get_llm_cassette()
+        request_key = get_llm_cache().make_key(self.model.model_name, analysis_prompt,
+                                               params={"source": "founder_analysis"})
+
+        def request() -> str:
+            with get_llm_telemetry().track("founder_analysis", "google", self.model.model_name,
+                                           analysis_prompt, task="founder_analysis") as call:
+                response = self.model.generate_content(
+                    analysis_prompt, request_options=self.retry_policy.request_options()
+                )
+                call.set_response(response)
+            return response.text
+
+        def generate() -> str:
+            return cassette.play(request_key, self.model.model_name, analysis_prompt, request)
+
         try:
-            response = self.model.generate_content(analysis_prompt)
+            # Transient provider errors are retried here; parse failures are not
+            response_text = self.retry_policy.call(generate)
 
             print(f"--- FounderAnalysisAgent: Raw model response ---")
-            print(response.text) # Log raw model response
+            print(response_text) # Log raw model response
 
-            json_str = self._extract_json_from_response(response.text)
+            json_str = self._extract_json_from_response(response_text)
             if not json_str:
                 raise ValueError("No valid JSON object found in the model's response.")
 
@@ -111,4 +114,4 @@ class FounderAnalysisAgent:
                 content += f"Description: {description}\n"
                 content += f"URL: {url}\n\n"
 
-        return content[:15000]
\ No newline at end of file
+        return self.budget_planner.fit(content, settings.TOKEN_BUDGET_FOUNDER_ANALYSIS)
\ No newline at end of file
@@ -4,6 +4,7 @@ from typing import Dict, List
 from src.web_search.brave_search import BraveSearchClient
 from src.web_search.tavily_search import TavilySearchClient
 from src.web_search.serp_search import SerpAPIClient
+from src.utils.llm_cassette import get_llm_cassette
 
 
 class SearchOrchestrator:
@@ -16,7 +17,12 @@ class SearchOrchestrator:
     
     async def search_all_sources(self, company_name: str, 
                                person_name: str, role: str) -> List[Dict]:
-        """Execute searches across all APIs concurrently"""
+        """Execute searches across all APIs concurrently (skipped in cassette replay mode)"""
+        
+        # Search APIs are not recorded; offline replay runs analyze no search results
+        if get_llm_cassette().offline:
+            print("Cassette replay mode: skipping web searches")
+            return []
         
         with ThreadPoolExecutor(max_workers=3) as executor:
             futures = [
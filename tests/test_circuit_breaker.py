@@ -0,0 +1,127 @@
+"""
+Tests for per-provider circuit breakers
+"""
+
+import pytest
+
+from src.utils.circuit_breaker import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitBreakerOpenError, get_circuit_breaker,
+    is_provider_failure
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.circuit_breaker.time.monotonic", lambda: now[0])
+    return now
+
+
+def breaker():
+    return CircuitBreaker("test", failure_threshold=3, window_seconds=10, recovery_timeout=30)
+
+
+class ResourceExhausted(Exception):
+    pass
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__("request failed")
+        self.status_code = status_code
+
+
+def test_opens_after_consecutive_failures_within_the_window(clock):
+    circuit = breaker()
+
+    circuit.record_failure()
+    circuit.record_failure()
+    assert circuit.state == CLOSED
+    circuit.record_failure()
+
+    assert circuit.state == OPEN
+    assert not circuit.allow_request()
+    assert circuit.get_stats()["rejected_calls"] == 1
+
+
+def test_failures_outside_the_window_do_not_open(clock):
+    circuit = breaker()
+
+    circuit.record_failure()
+    circuit.record_failure()
+    clock[0] += 11
+    circuit.record_failure()
+
+    assert circuit.state == CLOSED
+
+
+def test_success_resets_the_failure_count(clock):
+    circuit = breaker()
+
+    circuit.record_failure()
+    circuit.record_failure()
+    circuit.record_success()
+    circuit.record_failure()
+
+    assert circuit.state == CLOSED
+
+
+def test_half_open_probe_closes_or_reopens(clock):
+    circuit = breaker()
+    for _ in range(3):
+        circuit.record_failure()
+    clock[0] += 30
+
+    assert circuit.state == HALF_OPEN
+    assert circuit.allow_request()
+    assert not circuit.allow_request()  # only one probe at a time
+    circuit.record_failure()
+    assert circuit.state == OPEN
+    assert circuit.times_opened == 2
+
+    clock[0] += 30
+    assert circuit.allow_request()
+    circuit.record_success()
+    assert circuit.state == CLOSED
+    assert circuit.allow_request()
+
+
+def test_abandoned_probe_does_not_block_recovery(clock):
+    circuit = breaker()
+    for _ in range(3):
+        circuit.record_failure()
+    clock[0] += 30
+    assert circuit.allow_request()
+
+    clock[0] += 30
+    assert circuit.allow_request()
+
+
+@pytest.mark.parametrize("error", [
+    StatusError(429),
+    StatusError(503),
+    ResourceExhausted("quota"),
+    TimeoutError(),
+    Exception("503 The model is overloaded"),
+    Exception("HTTP 502 Bad Gateway"),
+    Exception("Rate limit reached for requests"),
+    Exception("Connection reset by peer"),
+])
+def test_provider_failures(error):
+    assert is_provider_failure(error)
+
+
+@pytest.mark.parametrize("error", [
+    StatusError(400),
+    ValueError("max_output_tokens must be below 1500"),
+    ValueError("response blocked by safety settings"),
+    ValueError("invalid connection string"),
+    CircuitBreakerOpenError("open"),
+])
+def test_client_errors_are_not_provider_failures(error):
+    assert not is_provider_failure(error)
+
+
+def test_breakers_are_shared_per_provider():
+    assert get_circuit_breaker("Google") is get_circuit_breaker("google")
+    assert get_circuit_breaker("google") is not get_circuit_breaker("groq")
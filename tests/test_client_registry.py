@@ -0,0 +1,85 @@
+"""
+Tests for the shared model client registry
+"""
+
+import threading
+import time
+
+import pytest
+
+from src.utils.client_registry import KIND_GENAI, KIND_LANGCHAIN, ClientRegistry
+
+
+@pytest.fixture
+def configured(monkeypatch):
+    keys = []
+    monkeypatch.setattr("src.utils.client_registry.genai.configure", lambda api_key: keys.append(api_key))
+    return keys
+
+
+def factory():
+    def build():
+        build.calls += 1
+        return object()
+    build.calls = 0
+    return build
+
+
+def test_clients_are_shared_per_model_and_params():
+    registry = ClientRegistry()
+    build = factory()
+
+    first = registry.get_or_create(KIND_GENAI, "google", "flash", build, generation_config={"temperature": 0.1})
+    again = registry.get_or_create(KIND_GENAI, "google", "flash", build, generation_config={"temperature": 0.1})
+    warmer = registry.get_or_create(KIND_GENAI, "google", "flash", build, generation_config={"temperature": 0.7})
+    other_kind = registry.get_or_create(KIND_LANGCHAIN, "google", "flash", build, generation_config={"temperature": 0.1})
+
+    assert first is again
+    assert len({id(first), id(warmer), id(other_kind)}) == 3
+    assert build.calls == 3
+    assert registry.get_stats() == {"clients": 3, "created": 3, "reused": 1}
+
+
+def test_concurrent_first_use_builds_one_client():
+    registry = ClientRegistry()
+    calls = []
+
+    def slow_build():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(registry.get_or_create(KIND_GENAI, "google", "flash", slow_build)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len({id(client) for client in clients}) == 1
+
+
+def test_configuring_the_same_key_again_is_a_no_op(configured):
+    registry = ClientRegistry()
+
+    assert not registry.genai_configured
+    registry.configure_genai("key-a")
+    registry.configure_genai("key-a")
+
+    assert configured == ["key-a"]
+    assert registry.genai_configured
+
+
+def test_a_new_key_drops_only_genai_clients(configured):
+    registry = ClientRegistry()
+    registry.configure_genai("key-a")
+    genai_client = registry.get_or_create(KIND_GENAI, "google", "flash", object)
+    langchain_client = registry.get_or_create(KIND_LANGCHAIN, "google", "flash", object)
+
+    registry.configure_genai("key-b")
+
+    assert configured == ["key-a", "key-b"]
+    assert registry.get_or_create(KIND_GENAI, "google", "flash", object) is not genai_client
+    assert registry.get_or_create(KIND_LANGCHAIN, "google", "flash", object) is langchain_client
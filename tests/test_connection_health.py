@@ -0,0 +1,107 @@
+"""
+Tests for the shared connection health cache
+"""
+
+import threading
+
+import pytest
+
+from src.utils.circuit_breaker import CircuitBreaker
+from src.utils.connection_health import FAILURE_TTL_SECONDS, ConnectionHealthCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.connection_health.time.monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    circuit = CircuitBreaker("test", failure_threshold=1, window_seconds=60, recovery_timeout=60)
+    monkeypatch.setattr("src.utils.connection_health.get_circuit_breaker", lambda provider: circuit)
+    return circuit
+
+
+def probe(*results):
+    queue = list(results)
+    calls = []
+
+    def run():
+        calls.append(1)
+        result = queue.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    run.calls = calls
+    return run
+
+
+def test_healthy_result_is_reused_until_the_ttl_expires(clock, breaker):
+    health = ConnectionHealthCache(ttl_seconds=300)
+    check = probe(True, False)
+
+    assert health.check("google", check)
+    clock[0] += 299
+    assert health.check("google", check)
+    clock[0] += 2
+    assert not health.check("google", check)
+    assert len(check.calls) == 2
+    assert health.get_stats()["cached_answers"] == 1
+
+
+def test_failures_are_reprobed_sooner(clock, breaker):
+    health = ConnectionHealthCache(ttl_seconds=300)
+    check = probe(ConnectionError("unreachable"), True)
+
+    assert not health.check("google", check)
+    clock[0] += FAILURE_TTL_SECONDS - 1
+    assert not health.check("google", check)
+    clock[0] += 2
+    assert health.check("google", check)
+    assert len(check.calls) == 2
+
+
+def test_force_and_invalidate_probe_again(breaker):
+    health = ConnectionHealthCache(ttl_seconds=300)
+    check = probe(True, True, True)
+
+    health.check("google", check)
+    health.check("google", check, force=True)
+    health.invalidate("google")
+    health.check("google", check)
+
+    assert len(check.calls) == 3
+
+
+def test_concurrent_callers_share_one_probe(breaker):
+    health = ConnectionHealthCache(ttl_seconds=300)
+    release = threading.Event()
+    calls = []
+
+    def slow_probe():
+        calls.append(1)
+        assert release.wait(timeout=5)
+        return True
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(health.check("google", slow_probe)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [True] * 5
+    assert len(calls) == 1
+
+
+def test_open_circuit_answers_unhealthy_without_probing(breaker):
+    health = ConnectionHealthCache(ttl_seconds=300)
+    check = probe(True)
+    breaker.record_failure()
+
+    assert not health.check("google", check)
+    assert check.calls == []
@@ -0,0 +1,89 @@
+"""
+Tests for slide-level deck diffing
+"""
+
+from src.utils.deck_diff import diff_decks, page_states
+from src.utils.page_classifier import PageText
+from src.utils.page_dedup import PageFingerprint
+
+
+def states(texts):
+    fingerprints = [PageFingerprint(n, 0x1111 * n, 0x2222 * n, 40.0) for n in range(1, len(texts) + 1)]
+    pages = [PageText(n, text, 0.2, 0.0, True, "") for n, text in enumerate(texts, start=1)]
+    return page_states(fingerprints, pages)
+
+
+PREVIOUS = states([
+    "Acme - payments for merchants",
+    "Problem: merchants lose revenue to failed payments",
+    "Traction: 1,200 customers and $2.4M ARR, growing 3x year over year",
+    "Appendix: detailed financial model",
+])
+
+
+def new_version():
+    # A new market slide is inserted, traction is updated and the appendix is removed
+    texts = [
+        "Acme - payments for merchants",
+        "Market: $40B spent on payment operations",
+        "Problem: merchants lose revenue to failed payments",
+        "Traction: 1,500 customers and $3.1M ARR, growing 3x year over year",
+    ]
+    fingerprints = [PageFingerprint(n, 0x1111 * old, 0x2222 * old, 40.0)
+                    for n, old in enumerate([1, 7, 2, 3], start=1)]
+    pages = [PageText(n, text, 0.2, 0.0, True, "") for n, text in enumerate(texts, start=1)]
+    return page_states(fingerprints, pages)
+
+
+def test_page_states_hash_text_and_hashes():
+    again = states(["Acme - payments  for\nmerchants"])
+
+    assert again[0]["hash"] == PREVIOUS[0]["hash"]
+    assert again[0]["text"] == "Acme - payments for merchants"
+    assert states(["Acme"])[0]["hash"] != PREVIOUS[0]["hash"]
+
+
+def test_diff_pairs_unchanged_changed_added_and_removed_pages():
+    diff = diff_decks(new_version(), PREVIOUS, min_similarity=0.6)
+
+    assert diff.page_map == {1: 1, 3: 2, 4: 3}
+    assert diff.unchanged == [1, 3]
+    assert diff.changed == [4]
+    assert diff.added == [2]
+    assert diff.removed == [4]
+    assert diff.summary() == "2 unchanged, 1 changed, 1 added, 1 removed slides"
+
+
+def test_identical_decks_have_no_changes():
+    diff = diff_decks(PREVIOUS, PREVIOUS, min_similarity=0.6)
+
+    assert diff.unchanged == [1, 2, 3, 4]
+    assert (diff.changed, diff.added, diff.removed) == ([], [], [])
+
+
+def test_remap_toc_follows_moved_pages_and_drops_removed_ones():
+    diff = diff_decks(new_version(), PREVIOUS, min_similarity=0.6)
+
+    assert diff.remap_toc({"Problem": [2], "Traction": [3], "Financials": [4], "note": "n/a"}) == {
+        "Problem": [3], "Traction": [4]
+    }
+
+
+def test_only_topics_with_unchanged_slides_are_reused():
+    diff = diff_decks(new_version(), PREVIOUS, min_similarity=0.6)
+    previous_toc = {"Problem": [2], "Traction": [3], "Solution": [1], "Team": [1]}
+    previous_topics = {
+        "Problem": "problem notes",
+        "Traction": "traction notes",
+        "Solution": "solution notes",
+        "Team": "Error extracting data: timeout",
+    }
+    toc = {
+        "Problem": [3],  # moved, unchanged
+        "Traction": [4],  # changed slide
+        "Solution": [1, 2],  # now also covers an added slide
+        "Team": [1],  # previous extraction failed
+        "Market_Size": [2],  # new topic
+    }
+
+    assert diff.reusable_topics(toc, previous_toc, previous_topics) == {"Problem": "problem notes"}
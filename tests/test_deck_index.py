@@ -0,0 +1,89 @@
+"""
+Tests for the processed deck index
+"""
+
+import json
+import os
+
+import pytest
+
+from src.utils.deck_index import PUBLIC_DATA_FILENAME, DeckIndex
+
+
+@pytest.fixture
+def outputs(tmp_path):
+    company_dir = tmp_path / "outputs" / "acme"
+    company_dir.mkdir(parents=True)
+    files = {
+        "metadata.json": json.dumps({"startup_name": "Acme"}),
+        "pitch_deck.md": "# Acme\n## Problem\n...",
+        PUBLIC_DATA_FILENAME: "# Public data",
+    }
+    for name, content in files.items():
+        (company_dir / name).write_text(content, encoding="utf-8")
+    return company_dir
+
+
+def record(index, outputs, fingerprint="f" * 64, **kwargs):
+    paths = [str(outputs / name) for name in ("metadata.json", "pitch_deck.md", PUBLIC_DATA_FILENAME, "missing.md")]
+    index.record(fingerprint, "Acme", paths, source_name="acme.pdf", **kwargs)
+
+
+def test_unknown_deck_is_a_miss(tmp_path):
+    index = DeckIndex(tmp_path / "index")
+
+    assert index.lookup("f" * 64) is None
+    assert index.restore("f" * 64, str(tmp_path / "restored")) is None
+    assert index.misses == 2
+
+
+def test_restore_copies_the_snapshot_and_public_data_result(tmp_path, outputs):
+    index = DeckIndex(tmp_path / "index")
+    record(index, outputs, public_data_extraction={
+        "status": "success", "results": {"news": "..."}, "output_file": "old/path.md"
+    })
+    # Later changes to the outputs do not change the snapshot
+    (outputs / "pitch_deck.md").write_text("changed", encoding="utf-8")
+
+    restored = DeckIndex(tmp_path / "index").restore("f" * 64, str(tmp_path / "restored"))
+
+    assert restored["company_name"] == "Acme"
+    assert [os.path.basename(path) for path in restored["files_created"]] == \
+        ["metadata.json", "pitch_deck.md", PUBLIC_DATA_FILENAME]
+    assert open(restored["files_created"][1], encoding="utf-8").read().startswith("# Acme")
+    assert restored["public_data_extraction"] == {
+        "status": "success",
+        "output_file": os.path.join(restored["output_dir"], PUBLIC_DATA_FILENAME)
+    }
+
+
+def test_incomplete_snapshot_is_not_restored(tmp_path, outputs):
+    index = DeckIndex(tmp_path / "index")
+    record(index, outputs)
+
+    index.snapshot_file("f" * 64, "pitch_deck.md").unlink()
+
+    assert index.lookup("f" * 64) is None
+
+
+def test_forget_removes_the_snapshot(tmp_path, outputs):
+    index = DeckIndex(tmp_path / "index")
+    record(index, outputs)
+
+    index.forget("f" * 64)
+
+    assert DeckIndex(tmp_path / "index").lookup("f" * 64) is None
+    assert not (tmp_path / "index" / ("f" * 64)).exists()
+
+
+def test_previous_version_needs_enough_shared_pages(tmp_path, outputs):
+    index = DeckIndex(tmp_path / "index")
+    record(index, outputs, "a" * 64, page_hashes=["p1", "p2", "p3", "p4"])
+    record(index, outputs, "b" * 64, page_hashes=["p1", "x2", "x3", "x4"])
+
+    fingerprint, entry = index.find_previous_version(["p1", "p2", "p3", "new"], min_overlap=0.5)
+
+    assert fingerprint == "a" * 64
+    assert entry["source_name"] == "acme.pdf"
+    assert index.find_previous_version(["p1", "n2", "n3", "n4"], min_overlap=0.5) is None
+    assert index.find_previous_version([], min_overlap=0.5) is None
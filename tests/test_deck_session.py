@@ -0,0 +1,181 @@
+"""
+Tests for deck sessions and request resolution
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from src.utils.deck_session import (
+    MODE_INLINE, DeckPage, DeckSession, GeminiDeckSession, _without_pages, open_deck_session, resolve_request
+)
+
+CLIENTS = SimpleNamespace(generative_model=lambda name: f"model:{name}")
+
+
+def deck(pages=3):
+    return [Image.new("RGB", (8, 8), (40 * index, 0, 0)) for index in range(pages)]
+
+
+class CachedSession(DeckSession):
+    """Session whose pages are all in a provider context cache"""
+
+    def is_uploaded(self, page):
+        return True
+
+    def cached_model(self, model_name):
+        return f"cached:{model_name}"
+
+
+def test_pages_skip_numbers_outside_the_deck():
+    session = DeckSession(deck())
+
+    assert [page.page_number for page in session.pages([3, 1, 0, 9, "2"])] == [3, 1]
+    assert len(session.pages()) == 3
+    assert session.get_stats()["page_references"] == 5
+
+
+def test_deck_hash_depends_on_page_pixels():
+    assert DeckSession(deck()).deck_hash == DeckSession(deck()).deck_hash
+    assert DeckSession(deck()).deck_hash != DeckSession(deck(2)).deck_hash
+
+
+def test_inline_session_sends_page_images():
+    images = deck()
+    session = DeckSession(images)
+
+    model, parts = resolve_request(["Prompt", "Page 2:", *session.pages([2])], "model-a", CLIENTS)
+
+    assert model == "model:model-a"
+    assert parts == ["Prompt", "Page 2:", images[1]]
+
+
+def test_cached_session_replaces_pages_and_labels_with_a_note():
+    session = CachedSession(deck())
+    content = ["Prompt", "Page 1:", *session.pages([1]), "Page 3:", *session.pages([3]), "Answer briefly"]
+
+    model, parts = resolve_request(content, "model-a", CLIENTS)
+
+    assert model == "cached:model-a"
+    assert parts == ["Prompt", "Answer briefly",
+                     "Use only these pages of the pitch deck provided above: 1, 3."]
+
+
+def test_without_pages_keeps_labels_that_do_not_precede_their_page():
+    session = DeckSession(deck())
+    [page] = session.pages([2])
+
+    assert _without_pages(["Page 1:", page, "Page 2:"]) == ["Page 1:", "Page 2:"]
+
+
+def test_plain_prompts_are_sent_unchanged():
+    assert resolve_request("Prompt", "model-a", CLIENTS) == ("model:model-a", "Prompt")
+
+
+def test_inline_mode_opens_a_local_session():
+    with open_deck_session(deck(), mode=MODE_INLINE) as session:
+        assert session.mode == MODE_INLINE
+        assert isinstance(session.pages([1])[0], DeckPage)
+    assert session.closed
+
+
+class FakeFileAPI:
+    """Stand-in for the genai File API and context caching, counting calls"""
+
+    def __init__(self, fail_pages=()):
+        self.fail_pages = set(fail_pages)
+        self.uploads = []
+        self.deleted = []
+        self.caches = []
+        self._lock = threading.Lock()
+
+    def upload_file(self, buffer, mime_type, display_name):
+        page_number = int(display_name.rsplit("-", 1)[1])
+        time.sleep(0.01)
+        with self._lock:
+            self.uploads.append(page_number)
+        if page_number in self.fail_pages:
+            raise ConnectionError("upload failed")
+        return SimpleNamespace(name=f"files/page-{page_number}", state=SimpleNamespace(name="ACTIVE"))
+
+    def delete_file(self, name):
+        self.deleted.append(name)
+
+    def create_cache(self, model, display_name, contents, ttl):
+        self.caches.append(contents)
+        return SimpleNamespace(delete=lambda: None)
+
+
+@pytest.fixture
+def file_api(monkeypatch):
+    api = FakeFileAPI()
+    monkeypatch.setattr("src.utils.deck_session.genai.upload_file", api.upload_file)
+    monkeypatch.setattr("src.utils.deck_session.genai.delete_file", api.delete_file)
+    monkeypatch.setattr("src.utils.deck_session.genai.caching.CachedContent.create", api.create_cache)
+    monkeypatch.setattr("src.utils.deck_session.genai.GenerativeModel.from_cached_content",
+                        lambda cached_content: "cached-model")
+    return api
+
+
+def test_pages_are_uploaded_only_when_a_request_is_sent(file_api):
+    session = GeminiDeckSession(deck(4), upload_workers=2, page_numbers=[1, 2, 3])
+    assert file_api.uploads == []
+
+    model, parts = resolve_request(["Prompt", *session.pages([2, 4])], "model-a", CLIENTS)
+
+    assert file_api.uploads == [2]
+    assert parts[1].name == "files/page-2"
+    assert isinstance(parts[2], Image.Image)  # not uploadable, sent inline
+    session.close()
+    assert file_api.deleted == ["files/page-2"]
+
+
+def test_concurrent_requests_share_each_upload(file_api):
+    session = GeminiDeckSession(deck(3), upload_workers=3)
+    requests = [threading.Thread(target=resolve_request, args=(["Prompt", *session.pages([1, 2])], "m", CLIENTS))
+                for _ in range(5)]
+    for request in requests:
+        request.start()
+    for request in requests:
+        request.join(5)
+
+    assert sorted(file_api.uploads) == [1, 2]
+    assert session.get_stats()["files_uploaded"] == 2
+
+
+def test_failed_upload_sends_the_page_inline(file_api):
+    file_api.fail_pages = {1}
+    images = deck(2)
+    session = GeminiDeckSession(images)
+
+    _, parts = resolve_request(["Prompt", *session.pages([1])], "m", CLIENTS)
+    _, parts_again = resolve_request(["Prompt", *session.pages([1])], "m", CLIENTS)
+
+    assert parts[1] is images[0] and parts_again[1] is images[0]
+    assert file_api.uploads == [1]
+
+
+def test_closed_session_uploads_nothing(file_api):
+    session = GeminiDeckSession(deck(2))
+    session.close()
+
+    _, parts = resolve_request(["Prompt", *session.pages([1])], "m", CLIENTS)
+
+    assert file_api.uploads == [] and file_api.deleted == []
+    assert isinstance(parts[1], Image.Image)
+
+
+def test_context_cache_uploads_the_deck_once_per_session(file_api):
+    session = GeminiDeckSession(deck(3), use_context_cache=True, page_numbers=[1, 3])
+
+    first = resolve_request(["Prompt", "Page 1:", *session.pages([1])], "model-a", CLIENTS)
+    second = resolve_request(["Prompt", *session.pages([3])], "model-a", CLIENTS)
+
+    assert first == ("cached-model", ["Prompt", "Use only these pages of the pitch deck provided above: 1."])
+    assert second[0] == "cached-model"
+    assert sorted(file_api.uploads) == [1, 3]
+    assert len(file_api.caches) == 1
+    assert [part for part in file_api.caches[0] if isinstance(part, str)] == ["Page 1:", "Page 3:"]
@@ -0,0 +1,90 @@
+"""
+Tests for the persistent LLM response cache
+"""
+
+from PIL import Image
+
+from src.utils.llm_cache import LLMResponseCache
+
+
+def make_cache(tmp_path, **kwargs):
+    options = {"max_entries": 100, "max_size_mb": 10, "ttl_seconds": 0, "enabled": True}
+    options.update(kwargs)
+    return LLMResponseCache(cache_dir=tmp_path, **options)
+
+
+def test_key_depends_on_model_params_and_content():
+    key = LLMResponseCache.make_key("model-a", ["prompt", "page"], params={"temperature": 0.1})
+
+    assert key == LLMResponseCache.make_key("model-a", ["prompt", "page"], params={"temperature": 0.1})
+    assert key != LLMResponseCache.make_key("model-b", ["prompt", "page"], params={"temperature": 0.1})
+    assert key != LLMResponseCache.make_key("model-a", ["prompt", "page"], params={"temperature": 0.2})
+    assert key != LLMResponseCache.make_key("model-a", ["prompt", "other page"], params={"temperature": 0.1})
+
+
+def test_key_hashes_image_pixels():
+    red = Image.new("RGB", (4, 4), "red")
+
+    assert (LLMResponseCache.make_key("m", ["p", red])
+            == LLMResponseCache.make_key("m", ["p", Image.new("RGB", (4, 4), "red")]))
+    assert (LLMResponseCache.make_key("m", ["p", red])
+            != LLMResponseCache.make_key("m", ["p", Image.new("RGB", (4, 4), "blue")]))
+
+
+def test_get_returns_stored_value_and_counts(tmp_path):
+    cache = make_cache(tmp_path)
+
+    assert cache.get("k") is None
+    cache.set("k", "response")
+
+    assert cache.get("k") == "response"
+    assert (cache.hits, cache.misses, cache.writes) == (1, 1, 1)
+
+
+def test_lru_eviction_keeps_recently_read_entries(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("src.utils.llm_cache.time.time", lambda: next(clock))
+    cache = make_cache(tmp_path, max_entries=2)
+
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "b" is now least recently used
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    assert cache.evictions == 1
+
+
+def test_size_limit_evicts_oldest_entries(tmp_path, monkeypatch):
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr("src.utils.llm_cache.time.time", lambda: next(clock))
+    cache = make_cache(tmp_path, max_size_mb=1)
+
+    cache.set("a", "x" * 600 * 1024)
+    cache.set("b", "y" * 600 * 1024)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+
+def test_ttl_expires_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.llm_cache.time.time", lambda: now[0])
+    cache = make_cache(tmp_path, ttl_seconds=60)
+
+    cache.set("k", "response")
+    now[0] += 59
+    assert cache.get("k") == "response"
+    now[0] += 2
+    assert cache.get("k") is None
+
+
+def test_disabled_cache_stores_nothing(tmp_path):
+    cache = make_cache(tmp_path, enabled=False)
+
+    cache.set("k", "response")
+
+    assert cache.get("k") is None
+    assert not cache.db_path.exists()
@@ -0,0 +1,111 @@
+"""
+Tests for LLM record/replay cassettes
+"""
+
+import asyncio
+
+import pytest
+
+from src.utils.llm_cassette import (
+    STREAM_CHUNK_CHARS, CassetteInjectedError, CassetteMissError, LLMCassette
+)
+
+
+def cassette(tmp_path, mode, **kwargs):
+    options = {"latency_scale": 0.0, "latency_seconds": 0.0, "error_rate": 0.0, "seed": 1}
+    options.update(kwargs)
+    return LLMCassette(mode=mode, cassette_dir=tmp_path, **options)
+
+
+def provider(text="response"):
+    calls = []
+
+    def request():
+        calls.append(1)
+        return text
+    request.calls = calls
+    return request
+
+
+def test_record_then_replay_without_the_provider(tmp_path):
+    request = provider()
+    cassette(tmp_path, "record").play("abc123", "model-a", ["prompt", object()], request)
+
+    replayed = cassette(tmp_path, "replay")
+    assert replayed.play("abc123", "model-a", "prompt", provider("other")) == "response"
+    assert replayed.replayed == 1
+    assert len(request.calls) == 1
+    assert replayed.load("abc123")["prompt_preview"] == "prompt [+1 non-text parts]"
+
+
+def test_replay_miss_is_an_error(tmp_path):
+    replayed = cassette(tmp_path, "replay")
+
+    with pytest.raises(CassetteMissError):
+        replayed.play("missing", "model-a", "prompt", provider())
+    assert replayed.missed == 1
+    assert replayed.offline
+
+
+def test_auto_mode_records_only_missing_entries(tmp_path):
+    auto = cassette(tmp_path, "auto")
+    first, second = provider("first"), provider("second")
+
+    assert auto.play("k", "model-a", "prompt", first) == "first"
+    assert auto.play("k", "model-a", "prompt", second) == "first"
+    assert (len(first.calls), len(second.calls)) == (1, 0)
+    assert auto.records_streams
+
+
+def test_off_mode_always_calls_the_provider(tmp_path):
+    off = cassette(tmp_path, "off")
+    request = provider()
+
+    off.play("k", "model-a", "prompt", request)
+    off.play("k", "model-a", "prompt", request)
+
+    assert len(request.calls) == 2
+    assert off.replay_stream("k") is None
+    assert not list(tmp_path.iterdir())
+
+
+def test_unknown_mode_disables_the_cassette(tmp_path):
+    assert not cassette(tmp_path, "rewind").enabled
+
+
+def test_empty_responses_are_not_recorded(tmp_path):
+    recorder = cassette(tmp_path, "record")
+
+    recorder.play("k", "model-a", "prompt", provider(""))
+
+    assert recorder.load("k") is None
+
+
+def test_injected_errors_are_reproducible(tmp_path):
+    cassette(tmp_path, "record").play("k", "model-a", "prompt", provider())
+    flaky = cassette(tmp_path, "replay", error_rate=1.0)
+
+    with pytest.raises(CassetteInjectedError) as error:
+        flaky.play("k", "model-a", "prompt", provider())
+    assert error.value.status_code == 503
+    assert flaky.injected_errors == 1
+
+
+def test_replay_stream_chunks_the_recorded_text(tmp_path):
+    text = "x" * (STREAM_CHUNK_CHARS * 2 + 10)
+    cassette(tmp_path, "record").save("k", "model-a", "prompt", text, 1.0)
+
+    chunks = list(cassette(tmp_path, "replay").replay_stream("k"))
+
+    assert "".join(chunks) == text
+    assert len(chunks) == 3
+
+
+def test_async_play(tmp_path):
+    async def request():
+        return "async response"
+
+    recorder = cassette(tmp_path, "auto")
+
+    assert asyncio.run(recorder.aplay("k", "model-a", "prompt", request)) == "async response"
+    assert recorder.load("k")["response"] == "async response"
@@ -0,0 +1,310 @@
+"""
+Tests for LLMManager request building and multi-topic extraction
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.circuit_breaker import OPEN, CircuitBreaker, CircuitBreakerOpenError
+from src.utils.llm_cache import LLMResponseCache
+from src.utils.llm_cassette import LLMCassette
+from src.utils.llm_manager import LLMConfigurationError, LLMManager
+from src.utils.model_router import is_json_object
+from src.utils.rate_limiter import RateLimiter
+from src.utils.retry_policy import RetryPolicy
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Text pages of about 100 tokens each
+PAGES = [f"Page {n} (text layer):\n" + "x" * 380 for n in range(1, 11)]
+ANALYSIS = "A detailed analysis of the topic. " * 10
+
+
+@pytest.fixture
+def manager():
+    return LLMManager()
+
+
+@pytest.fixture
+def limits(monkeypatch):
+    def set_limits(topics=8, pages=30, tokens=32000):
+        monkeypatch.setattr("src.utils.llm_manager.settings.TOPIC_BATCH_MAX_TOPICS", topics)
+        monkeypatch.setattr("src.utils.llm_manager.settings.TOPIC_BATCH_MAX_PAGES", pages)
+        monkeypatch.setattr("src.utils.llm_manager.settings.TOPIC_BATCH_MAX_INPUT_TOKENS", tokens)
+    set_limits()
+    return set_limits
+
+
+TOC = {"Problem": [1, 2], "Solution": [3], "Market_Size": [4, 5], "Team": [6]}
+
+
+def test_batches_keep_toc_order_and_skip_topics_without_pages(manager, limits):
+    toc = {"Problem": [1], "Appendix": [], "Ask": [99], "notes": "n/a", "Team": [2, 2]}
+
+    assert manager._topic_batches(toc, PAGES) == [{"Problem": [1], "Team": [2, 2]}]
+
+
+def test_batches_split_at_the_topic_limit(manager, limits):
+    limits(topics=3)
+
+    assert [list(batch) for batch in manager._topic_batches(TOC, PAGES)] == [
+        ["Problem", "Solution", "Market_Size"], ["Team"]
+    ]
+
+
+def test_batches_split_at_the_page_limit(manager, limits):
+    limits(pages=4)
+
+    assert [list(batch) for batch in manager._topic_batches(TOC, PAGES)] == [
+        ["Problem", "Solution"], ["Market_Size", "Team"]
+    ]
+
+
+def test_shared_pages_count_once_towards_the_page_limit(manager, limits):
+    limits(pages=2)
+
+    assert len(manager._topic_batches({"Problem": [1, 2], "Solution": [2, 1]}, PAGES)) == 1
+
+
+def test_batches_split_at_the_token_limit(manager, limits):
+    limits(tokens=250)
+
+    assert [list(batch) for batch in manager._topic_batches(TOC, PAGES)] == [
+        ["Problem"], ["Solution"], ["Market_Size"], ["Team"]
+    ]
+
+
+def test_multi_topic_content_sends_each_page_once(manager):
+    content = manager._multi_topic_content({"Problem": [2, 1], "Solution": [1]}, PAGES)
+
+    assert "- Problem: pages 2, 1" in content[0]
+    assert content[1:] == [PAGES[0], PAGES[1]]
+
+
+def test_results_match_keys_up_to_case_spaces_and_separators(manager):
+    response = json.dumps({"market size": ANALYSIS, "GO-TO-MARKET": ANALYSIS, "Team": ANALYSIS})
+
+    results = manager._match_topic_results({"Market_Size": [1], "Go_To_Market": [2], "Team": [3]}, response)
+
+    assert set(results) == {"Market_Size", "Go_To_Market", "Team"}
+
+
+def test_missing_and_invalid_topics_are_left_out(manager):
+    response = "```json\n" + json.dumps({"Problem": ANALYSIS, "Solution": "too short", "Team": ["not", "text"]}) + "\n```"
+
+    results = manager._match_topic_results({"Problem": [1], "Solution": [2], "Team": [3], "Ask": [4]}, response)
+
+    assert results == {"Problem": ANALYSIS.strip()}
+    assert manager._match_topic_results({"Problem": [1]}, "not json") == {}
+
+
+def test_failed_batches_are_left_for_single_topic_requests(manager, limits, monkeypatch):
+    limits(topics=2)
+    requests = []
+
+    def generate(task, content, use_cache=True, validate=None):
+        requests.append(content[0])
+        if len(requests) == 2:
+            raise RuntimeError("503 Service Unavailable")
+        return json.dumps({"Problem": ANALYSIS, "Solution": "short"})
+
+    monkeypatch.setattr(manager, "_generate_for_task", generate)
+
+    assert manager.extract_topics_batch(PAGES, TOC) == {"Problem": ANALYSIS.strip()}
+    assert len(requests) == 2
+
+
+@pytest.fixture
+def replay(manager, tmp_path, monkeypatch):
+    """Manager replaying a cassette, failing if a request would be rate limited"""
+    cassette = LLMCassette(mode="replay", cassette_dir=tmp_path, latency_scale=0.0, latency_seconds=0.0,
+                           error_rate=0.0)
+    monkeypatch.setattr(manager, "cassette", cassette)
+
+    def rate_limited(*args, **kwargs):
+        raise AssertionError("replayed requests must not be rate limited")
+
+    monkeypatch.setattr("src.utils.llm_manager.get_rate_limiter", rate_limited)
+    monkeypatch.setattr(manager, "_enforce_rate_limit", rate_limited)
+    return cassette
+
+
+def test_replayed_requests_skip_the_rate_limiter(manager, replay):
+    key = manager.cache.make_key(manager.gemini_model, "Summarize the deck")
+    replay.save(key, manager.gemini_model, "Summarize the deck", "Recorded summary", 0.5)
+
+    async def agenerate():
+        return await manager._agenerate_text("Summarize the deck")
+
+    assert manager._generate_text("Summarize the deck") == "Recorded summary"
+    assert asyncio.run(agenerate()) == "Recorded summary"
+
+
+class FakeChatModel:
+    """LangChain chat model stand-in returning (or raising) queued results"""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.prompts = []
+
+    def invoke(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return SimpleNamespace(content=result, usage_metadata=None)
+
+
+class ServiceUnavailable(Exception):
+    status_code = 503
+
+
+@pytest.fixture
+def langchain(manager, monkeypatch):
+    """Install a fake LangChain model with a private breaker and no retries"""
+    def install(*results):
+        chat_model = FakeChatModel(*results)
+        monkeypatch.setattr(manager, "get_default_langchain_llm", lambda: chat_model)
+        monkeypatch.setattr(manager, "_enforce_rate_limit", lambda *args, **kwargs: None)
+        monkeypatch.setattr(manager, "retry_policy", RetryPolicy("test", max_attempts=1, base_delay=0.0))
+        return chat_model
+
+    breaker = CircuitBreaker("google", failure_threshold=1, window_seconds=60, recovery_timeout=60)
+    monkeypatch.setattr("src.utils.llm_manager.get_circuit_breaker", lambda provider: breaker)
+    install.breaker = breaker
+    return install
+
+
+def test_langchain_failures_open_the_gemini_circuit(manager, langchain):
+    chat_model = langchain(ServiceUnavailable("503 overloaded"), "never sent")
+
+    with pytest.raises(ServiceUnavailable):
+        manager.invoke_with_retry("Question", use_langchain=True, use_cache=False)
+    with pytest.raises(CircuitBreakerOpenError):
+        manager.invoke_with_retry("Question", use_langchain=True, use_cache=False)
+
+    assert langchain.breaker.state == OPEN
+    assert chat_model.prompts == ["Question"]
+
+
+def test_invalid_langchain_responses_are_not_cached(manager, langchain, tmp_path, monkeypatch):
+    monkeypatch.setattr(manager, "cache", LLMResponseCache(cache_dir=tmp_path, max_entries=10, max_size_mb=1,
+                                                           ttl_seconds=0, enabled=True))
+    chat_model = langchain("not json", '{"ok": true}', "never sent")
+
+    assert manager.invoke_with_retry("Question", use_langchain=True, validate=is_json_object) == "not json"
+    assert manager.invoke_with_retry("Question", use_langchain=True, validate=is_json_object) == '{"ok": true}'
+    assert manager.invoke_with_retry("Question", use_langchain=True, validate=is_json_object) == '{"ok": true}'
+    assert len(chat_model.prompts) == 2
+
+
+class FakeGenerativeModel:
+    """genai model stand-in recording requests and the peak number of concurrent async calls"""
+
+    def __init__(self):
+        self.requests = []
+        self.in_flight = 0
+        self.peak = 0
+
+    def generate_content(self, parts, request_options=None):
+        self.requests.append(parts)
+        return SimpleNamespace(text=ANALYSIS, usage_metadata=None)
+
+    async def generate_content_async(self, parts, request_options=None):
+        self.requests.append(parts)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return SimpleNamespace(text=ANALYSIS, usage_metadata=None)
+
+
+@pytest.fixture
+def gemini(manager, monkeypatch):
+    """Point the manager's direct API path at a fake model, without limits, retries or cache"""
+    model = FakeGenerativeModel()
+    model.configured = []
+    clients = SimpleNamespace(generative_model=lambda name, **params: model, configure_genai=model.configured.append)
+    breaker = CircuitBreaker("google", failure_threshold=5, window_seconds=60, recovery_timeout=60)
+    monkeypatch.setenv("GOOGLE_API_KEY", "test-key")
+    monkeypatch.setattr(manager, "clients", clients)
+    monkeypatch.setattr(manager, "retry_policy", RetryPolicy("test", max_attempts=1, base_delay=0.0))
+    monkeypatch.setattr(manager, "_enforce_rate_limit", lambda *args, **kwargs: None)
+    monkeypatch.setattr("src.utils.llm_manager.get_rate_limiter", lambda provider, model_name: RateLimiter("test", 0))
+    monkeypatch.setattr("src.utils.llm_manager.get_circuit_breaker", lambda provider: breaker)
+    return model
+
+
+def test_async_requests_are_bounded_by_max_concurrency(manager, gemini):
+    manager.max_concurrency = 2
+
+    async def generate_all():
+        return await asyncio.gather(*(manager._agenerate_text(f"Prompt {n}", use_cache=False) for n in range(6)))
+
+    assert asyncio.run(generate_all()) == [ANALYSIS] * 6
+    assert sorted(gemini.requests) == [f"Prompt {n}" for n in range(6)]
+    assert gemini.peak == 2
+
+
+def test_each_event_loop_gets_its_own_semaphore(manager):
+    async def semaphores():
+        return manager._get_semaphore(), manager._get_semaphore()
+
+    first, same_loop = asyncio.run(semaphores())
+    second, _ = asyncio.run(semaphores())
+
+    assert first is same_loop
+    assert second is not first
+
+
+def test_async_and_sync_paths_send_identical_requests(manager, gemini):
+    pages = ["Page 1 (text layer):\nWe sell analytics to retailers."]
+
+    assert manager.extract_topic_data("Problem", pages, use_cache=False) == ANALYSIS
+    assert asyncio.run(manager.aextract_topic_data("Problem", pages, use_cache=False)) == ANALYSIS
+    assert len(gemini.requests) == 2
+    assert gemini.requests[0] == gemini.requests[1]
+
+
+def test_gemini_is_configured_on_first_request_only(manager, gemini):
+    assert gemini.configured == []
+
+    manager._generate_text("First", use_cache=False)
+    asyncio.run(manager._agenerate_text("Second", use_cache=False))
+
+    assert gemini.configured == ["test-key"]
+
+
+def test_missing_api_key_fails_on_first_use_without_retries(manager, gemini, monkeypatch):
+    monkeypatch.delenv("GOOGLE_API_KEY")
+    monkeypatch.setattr(manager, "retry_policy", RetryPolicy("test", max_attempts=3, base_delay=0.0))
+
+    with pytest.raises(LLMConfigurationError):
+        manager._generate_text("Prompt", use_cache=False)
+
+    assert gemini.requests == []
+    assert not manager._configured
+
+
+def test_importing_the_llm_modules_does_not_configure_clients():
+    code = (
+        "import google.generativeai as genai\n"
+        "def configure(**kwargs):\n"
+        "    raise AssertionError('genai configured at import')\n"
+        "genai.configure = configure\n"
+        "from src.utils.llm_manager import llm_manager\n"
+        "from src.utils.llm_setup import llm_setup\n"
+        "assert not llm_manager._configured and not llm_setup._initialized\n"
+    )
+    env = {key: value for key, value in os.environ.items() if key not in ("GOOGLE_API_KEY", "GROQ_API_KEY")}
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
@@ -0,0 +1,118 @@
+"""
+Tests for per-call LLM telemetry
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.llm_telemetry import (
+    LLMTelemetry, attempt_context, status_class, task_context, usage_from_response
+)
+
+
+def telemetry():
+    return LLMTelemetry(enabled=True, max_records=100)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__("request failed")
+        self.status_code = status_code
+
+
+def test_tracked_call_uses_reported_usage_and_context_labels():
+    registry = telemetry()
+    response = SimpleNamespace(usage_metadata=SimpleNamespace(prompt_token_count=120, candidates_token_count=30))
+
+    with task_context("topic_extraction"), attempt_context(1):
+        with registry.track("llm_manager", "google", "model-a", "prompt") as call:
+            call.set_response(response, "answer")
+
+    [row] = registry.summary()
+    assert row["task"] == "topic_extraction"
+    assert (row["prompt_tokens"], row["output_tokens"]) == (120, 30)
+    assert row["calls_by_status"] == {"2xx": 1}
+    assert row["retried_calls"] == 1
+    assert registry.recent_calls()[0]["tokens_estimated"] is False
+
+
+def test_missing_usage_is_estimated_from_text():
+    registry = telemetry()
+
+    with registry.track("llm_setup", "groq", "model-b", "x" * 400) as call:
+        call.add_output("y" * 80)
+
+    record = registry.recent_calls()[0]
+    assert (record["prompt_tokens"], record["output_tokens"]) == (100, 20)
+    assert record["tokens_estimated"] is True
+    assert record["task"] == "default"
+
+
+def test_failed_calls_are_recorded_and_reraised():
+    registry = telemetry()
+
+    with pytest.raises(StatusError):
+        with registry.track("llm_manager", "google", "model-a"):
+            raise StatusError(503)
+
+    record = registry.recent_calls()[0]
+    assert record["status_class"] == "5xx"
+    assert record["ttft_seconds"] is None
+    assert record["error"].startswith("StatusError")
+
+
+def test_cache_hits_count_separately_from_provider_calls():
+    registry = telemetry()
+
+    registry.record_cache_hit("llm_manager", "google", "model-a", task="final_memo")
+
+    [row] = registry.summary(task="final_memo")
+    assert row["cache_hits"] == 1
+    assert row["calls_by_status"] == {"cached": 1}
+    assert row["avg_latency_seconds"] is None
+
+
+@pytest.mark.parametrize("error, expected", [
+    (None, "2xx"),
+    (StatusError(429), "4xx"),
+    (TimeoutError("timed out"), "timeout"),
+    (ConnectionError("reset"), "network"),
+    (ValueError("bad"), "error"),
+])
+def test_status_class(error, expected):
+    assert status_class(error) == expected
+
+
+def test_usage_from_langchain_messages():
+    assert usage_from_response(SimpleNamespace(usage_metadata={"input_tokens": 5, "output_tokens": 7})) == (5, 7)
+    assert usage_from_response(SimpleNamespace(
+        usage_metadata=None,
+        response_metadata={"token_usage": {"prompt_tokens": 3, "completion_tokens": 4}}
+    )) == (3, 4)
+    assert usage_from_response(object()) == (None, None)
+
+
+def test_exports_json_and_prometheus():
+    registry = telemetry()
+    with registry.track("llm_manager", "google", 'model "a"', "prompt") as call:
+        call.add_output("answer")
+
+    exported = json.loads(registry.to_json())
+    text = registry.to_prometheus()
+
+    assert exported["summary"][0]["calls"] == 1
+    assert len(exported["calls"]) == 1
+    assert 'model="model \\"a\\""' in text
+    assert 'llm_request_latency_seconds_bucket{source="llm_manager"' in text
+    assert text.endswith("\n")
+
+
+def test_disabled_registry_records_nothing():
+    registry = LLMTelemetry(enabled=False)
+
+    with registry.track("llm_manager", "google", "model-a"):
+        pass
+
+    assert registry.summary() == []
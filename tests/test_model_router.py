@@ -0,0 +1,77 @@
+"""
+Tests for task-aware model routing and validated cascades
+"""
+
+import asyncio
+
+from src.utils.model_router import (
+    ModelRouter, TASK_FINAL_MEMO, TASK_TOPIC_EXTRACTION, all_of, has_numbered_answers,
+    has_sections, is_json_object, min_length
+)
+
+
+def router(**kwargs):
+    options = {"fast_model": "fast-model", "strong_model": "strong-model", "routes": "", "cascade_enabled": True}
+    options.update(kwargs)
+    return ModelRouter(**options)
+
+
+def test_routes_resolve_tiers_and_overrides():
+    custom = router(routes="topic_extraction=model-a>strong,final_memo=fast")
+
+    assert router().route(TASK_TOPIC_EXTRACTION) == ["fast-model", "strong-model"]
+    assert router().route(TASK_FINAL_MEMO) == ["strong-model"]
+    assert router().route("unknown_task") == ["fast-model"]
+    assert custom.route(TASK_TOPIC_EXTRACTION) == ["model-a", "strong-model"]
+    assert custom.route(TASK_FINAL_MEMO) == ["fast-model"]
+
+
+def test_disabled_cascade_uses_only_the_first_model():
+    plain = router(cascade_enabled=False)
+
+    assert plain.route(TASK_TOPIC_EXTRACTION) == ["fast-model"]
+    assert plain.escalations_after(TASK_TOPIC_EXTRACTION, "fast-model") == []
+
+
+def test_escalations_after_a_model_outside_the_route_go_to_the_strongest():
+    assert router().escalations_after(TASK_TOPIC_EXTRACTION, "models/fast-model") == ["strong-model"]
+    assert router().escalations_after(TASK_TOPIC_EXTRACTION, "other-model") == ["strong-model"]
+    assert router().escalations_after(TASK_TOPIC_EXTRACTION, "strong-model") == []
+
+
+def test_cascade_escalates_only_on_invalid_responses():
+    cascade = router()
+    responses = {"fast-model": "not json", "strong-model": '{"ok": true}'}
+    called = []
+
+    def call(model):
+        called.append(model)
+        return responses[model]
+
+    assert cascade.run_cascade(TASK_TOPIC_EXTRACTION, call, is_json_object) == '{"ok": true}'
+    assert called == ["fast-model", "strong-model"]
+    assert cascade.escalations == {TASK_TOPIC_EXTRACTION: 1}
+
+    called.clear()
+    assert cascade.run_cascade(TASK_TOPIC_EXTRACTION, call) == "not json"
+    assert called == ["fast-model"]
+
+
+def test_cascade_returns_the_last_response_when_none_is_valid():
+    async def call(model):
+        return f"short answer from {model}"
+
+    result = asyncio.run(router().arun_cascade(TASK_TOPIC_EXTRACTION, call, min_length(1000)))
+
+    assert result == "short answer from strong-model"
+
+
+def test_validators():
+    report = "# Executive Summary\ntext\n## **Information Gaps**\nnone"
+
+    assert is_json_object('```json\n{"a": 1}\n```')
+    assert not is_json_object("[1, 2]")
+    assert has_sections("Executive Summary", "Information Gaps")(report)
+    assert not has_sections("Executive Summary", "Risks")(report)
+    assert has_numbered_answers("Answers:\n1. yes\n2. no")
+    assert not all_of(min_length(5), is_json_object)("{}")
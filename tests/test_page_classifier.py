@@ -0,0 +1,69 @@
+"""
+Tests for text/vision page classification
+"""
+
+import fitz
+
+from src.utils.page_classifier import classify_document, classify_page
+
+BODY = "Our platform helps small retailers manage inventory and payments in one place."
+
+
+def new_page(doc):
+    return doc.new_page(width=800, height=450)
+
+
+def test_text_slide_goes_to_the_text_path():
+    doc = fitz.open()
+    page = new_page(doc)
+    page.insert_text((40, 60), "Problem", fontsize=32)
+    page.insert_text((40, 120), BODY, fontsize=12)
+
+    result = classify_page(page, min_chars=40, max_visual_coverage=0.3)
+
+    assert result.text_dominant
+    assert result.title == "Problem"
+    assert result.text.splitlines() == ["Problem", BODY]
+    assert result.to_part().startswith("Page 1 (text layer):\nProblem")
+
+
+def test_chart_slide_stays_on_the_vision_path():
+    doc = fitz.open()
+    page = new_page(doc)
+    page.insert_text((40, 60), BODY, fontsize=12)
+    page.draw_rect(fitz.Rect(40, 100, 600, 420), color=(0, 0, 1), fill=(0, 0, 1))
+
+    result = classify_page(page, min_chars=40, max_visual_coverage=0.3)
+
+    assert result.visual_coverage > 0.3
+    assert not result.text_dominant
+
+
+def test_full_page_backgrounds_are_ignored():
+    doc = fitz.open()
+    page = new_page(doc)
+    page.draw_rect(page.rect, fill=(0.9, 0.9, 0.9))
+    page.insert_text((40, 60), BODY, fontsize=12)
+
+    result = classify_page(page, min_chars=40, max_visual_coverage=0.3)
+
+    assert result.visual_coverage == 0.0
+    assert result.text_dominant
+
+
+def test_short_text_layer_stays_on_the_vision_path():
+    doc = fitz.open()
+    page = new_page(doc)
+    page.insert_text((40, 60), "Traction", fontsize=32)
+
+    assert not classify_page(page, min_chars=40, max_visual_coverage=0.3).text_dominant
+
+
+def test_classify_document_numbers_pages_in_order():
+    doc = fitz.open()
+    for title in ("Team", "Market"):
+        new_page(doc).insert_text((40, 60), title, fontsize=24)
+
+    pages = classify_document(doc)
+
+    assert [(page.page_number, page.title) for page in pages] == [(1, "Team"), (2, "Market")]
@@ -0,0 +1,111 @@
+"""
+Tests for perceptual page deduplication
+"""
+
+import fitz
+
+from src.utils.page_classifier import PageText
+from src.utils.page_dedup import (
+    PIXEL_RENDER_SIZE, DedupResult, PageFingerprint, find_duplicates, fingerprint_document, hamming
+)
+
+PIXEL_COUNT = PIXEL_RENDER_SIZE[0] * PIXEL_RENDER_SIZE[1]
+
+
+def fingerprint(page_number, ahash=0xF0F0, dhash=0x0F0F, contrast=40.0, pixels=b""):
+    return PageFingerprint(page_number, ahash, dhash, contrast, pixels)
+
+
+def text(page_number, body, title=None, visual_coverage=0.0):
+    return PageText(page_number, body, 0.2, visual_coverage, True, body if title is None else title)
+
+
+def test_hamming():
+    assert hamming(0b1010, 0b0110) == 2
+
+
+def test_close_hashes_with_matching_text_are_duplicates():
+    fingerprints = [fingerprint(1), fingerprint(2, ahash=0xF0F1), fingerprint(3)]
+    texts = [text(1, "Agenda\n1. Problem 2. Solution"), text(2, "Agenda\n1. Problem 2. Solution"),
+             text(3, "Team\nAlice (CEO), Bob (CTO)", title="Team")]
+
+    result = find_duplicates(fingerprints, texts, max_distance=4)
+
+    assert result.canonical == {2: 1}
+    assert result.dividers == []
+
+
+def test_far_hashes_are_never_duplicates():
+    texts = [text(1, "Same text on both pages"), text(2, "Same text on both pages")]
+
+    result = find_duplicates([fingerprint(1), fingerprint(2, ahash=0x0F0F, dhash=0xF0F0)], texts, max_distance=4)
+
+    assert result.canonical == {}
+
+
+def test_textless_pages_need_pixel_confirmation():
+    dark, light = bytes([10]) * PIXEL_COUNT, bytes([200]) * PIXEL_COUNT
+    fingerprints = [fingerprint(1, pixels=dark), fingerprint(2, pixels=dark), fingerprint(3, pixels=light)]
+
+    result = find_duplicates(fingerprints, [], max_distance=4)
+
+    assert result.canonical == {2: 1}
+
+
+def test_textless_pages_without_renders_need_identical_hashes():
+    fingerprints = [fingerprint(1), fingerprint(2, ahash=0xF0F1), fingerprint(3)]
+
+    assert find_duplicates(fingerprints, max_distance=4).canonical == {3: 1}
+
+
+def test_page_with_text_never_duplicates_a_page_without():
+    result = find_duplicates([fingerprint(1), fingerprint(2)], [text(2, "Market")], max_distance=4)
+
+    assert result.canonical == {}
+
+
+def test_blank_pages_are_dropped():
+    result = find_duplicates([fingerprint(1), fingerprint(2, contrast=1.0)], max_distance=4)
+
+    assert result.blank == [2]
+    assert result.kept_pages(2) == [1]
+
+
+def test_only_title_slides_without_figures_are_dividers():
+    fingerprints = [fingerprint(n, ahash=n * 0x1111_1111, dhash=n * 0x2222_2222) for n in range(1, 6)]
+    texts = [
+        text(1, "Acme"),  # the cover is never a divider
+        text(2, "Section Two: Market"),
+        text(3, "$2.4M ARR"),
+        text(4, "Team\nAlice and Bob", title="Team"),
+        text(5, "Product", visual_coverage=0.4),
+    ]
+
+    result = find_duplicates(fingerprints, texts, max_distance=4)
+
+    assert result.dividers == [2]
+    assert result.kept_pages(5) == [1, 2, 3, 4, 5]
+
+
+def test_remap_toc_maps_duplicates_and_drops_dividers():
+    result = DedupResult(canonical={5: 2, 6: 3}, blank=[7], dividers=[4])
+    toc = {"Problem": [2, 5], "Solution": [4, 6, 7, 3], "Market_Size": [4], "note": "n/a"}
+
+    assert result.remap_toc(toc) == {"Problem": [2], "Solution": [3], "Market_Size": [4], "note": "n/a"}
+    assert result.dropped == [4, 5, 6, 7]
+    assert result.to_dict()["duplicates"] == {"5": 2, "6": 3}
+
+
+def test_fingerprints_of_rendered_pages():
+    doc = fitz.open()
+    for title in ("Agenda", "Agenda", None):
+        page = doc.new_page(width=640, height=360)
+        if title:
+            page.insert_text((60, 180), title, fontsize=48)
+
+    first, second, blank = fingerprint_document(doc)
+
+    assert (first.ahash, first.dhash, first.pixels) == (second.ahash, second.dhash, second.pixels)
+    assert len(first.pixels) == PIXEL_COUNT
+    assert blank.contrast == 0.0
+    assert find_duplicates([first, second, blank], max_distance=4).canonical == {2: 1}
@@ -0,0 +1,97 @@
+"""
+Tests for the lazy page image provider
+"""
+
+import os
+
+import fitz
+import pytest
+
+from src.utils.page_provider import PageProvider, prune_render_cache
+from src.utils.pdf_rasterizer import RenderPolicy
+
+POLICY = RenderPolicy(dpi=36)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "deck.pdf"
+    doc = fitz.open()
+    for number in range(1, 4):
+        page = doc.new_page(width=400, height=300)
+        page.insert_text((50, 100), f"Slide {number}", fontsize=24)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def provider(pdf_path, tmp_path, **kwargs):
+    options = {"cache_dir": tmp_path / "renders", "memory_pages": 2, "disk_cache": True}
+    options.update(kwargs)
+    return PageProvider(pdf_path, **options)
+
+
+def test_lazy_pages_render_on_access(pdf_path, tmp_path):
+    with provider(pdf_path, tmp_path) as pages_provider:
+        pages = pages_provider.pages(POLICY)
+
+        assert len(pages) == 3
+        assert pages_provider.renders == 0
+        assert pages[-1].data == pages[2].data
+        assert pages_provider.get_stats()["renders"] == 1
+        assert pages_provider.memory_hits == 1
+        with pytest.raises(IndexError):
+            pages[3]
+
+
+def test_memory_lru_is_bounded(pdf_path, tmp_path):
+    with provider(pdf_path, tmp_path, disk_cache=False) as pages_provider:
+        pages = pages_provider.pages(POLICY)
+        list(pages)
+        pages[0]
+
+        assert pages_provider.get_stats()["memory_pages"] == 2
+        assert pages_provider.renders == 4  # page 1 was evicted and rendered again
+
+
+def test_disk_cache_is_shared_between_providers(pdf_path, tmp_path):
+    with provider(pdf_path, tmp_path) as first:
+        rendered = list(first.pages(POLICY))
+
+    with provider(pdf_path, tmp_path) as second:
+        assert [page.data for page in second.pages(POLICY)] == [page.data for page in rendered]
+        assert (second.renders, second.disk_hits) == (0, 3)
+
+
+def test_prefetch_fills_the_disk_cache(pdf_path, tmp_path):
+    with provider(pdf_path, tmp_path) as pages_provider:
+        pages_provider.pages(POLICY).prefetch([1, 3, 7])
+
+        assert pages_provider.renders == 2
+        pages_provider.get(3, POLICY)
+        assert pages_provider.disk_hits == 1
+
+
+def test_content_hash_depends_on_pdf_and_policy(pdf_path, tmp_path):
+    with provider(pdf_path, tmp_path) as pages_provider:
+        assert (pages_provider.pages(POLICY).content_hash
+                != pages_provider.pages(RenderPolicy(dpi=72)).content_hash)
+
+
+def test_delete_on_close_removes_the_pdf(pdf_path, tmp_path):
+    provider(pdf_path, tmp_path, delete_on_close=True).close()
+
+    assert not os.path.exists(pdf_path)
+
+
+def test_prune_removes_least_recently_written_decks(tmp_path):
+    for index, name in enumerate(["old", "new"]):
+        deck_dir = tmp_path / "ab" / name
+        deck_dir.mkdir(parents=True)
+        render = deck_dir / "p0001.png"
+        render.write_bytes(b"x" * 700 * 1024)
+        os.utime(render, (1000 + index, 1000 + index))
+
+    assert prune_render_cache(tmp_path, max_size_mb=1) == 1
+    assert not (tmp_path / "ab" / "old").exists()
+    assert (tmp_path / "ab" / "new").exists()
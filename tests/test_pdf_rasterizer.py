@@ -0,0 +1,119 @@
+"""
+Tests for the parallel PDF rasterizer
+"""
+
+import fitz
+import pytest
+from PIL import Image
+
+from src.utils.pdf_rasterizer import (
+    STAGE_METADATA, STAGE_TOPIC, RenderPolicy, _shards, encode_image, rasterize_pdf, render_pages,
+    stage_policy, trim_margins
+)
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    path = tmp_path / "deck.pdf"
+    doc = fitz.open()
+    for number in range(1, 5):
+        page = doc.new_page(width=400, height=300)
+        page.insert_text((50, 100 + 20 * number), f"Slide {number}", fontsize=24)
+    doc.save(str(path))
+    doc.close()
+    return str(path)
+
+
+def test_shards_are_contiguous_and_balanced():
+    assert _shards(list(range(7)), 3) == [[0, 1, 2], [3, 4], [5, 6]]
+    assert _shards([4, 9], 8) == [[4], [9]]
+
+
+def test_serial_render_respects_max_side(pdf_path):
+    pages = render_pages(pdf_path, RenderPolicy(dpi=144, max_side=200), workers=1)
+
+    assert len(pages) == 4
+    assert all(max(page.size) == 200 for page in pages)
+    assert pages[0].mime_type == "image/png"
+    assert pages[0].to_image().size == pages[0].size
+
+
+def test_selected_pages_are_returned_in_request_order(pdf_path):
+    policy = RenderPolicy(dpi=36)
+    everything = render_pages(pdf_path, policy, workers=1)
+
+    selected = render_pages(pdf_path, policy, workers=1, page_indices=[3, 0])
+
+    assert [page.data for page in selected] == [everything[3].data, everything[0].data]
+
+
+def test_parallel_render_matches_serial(pdf_path, monkeypatch):
+    monkeypatch.setattr("src.utils.pdf_rasterizer.settings.PDF_RASTER_PARALLEL_MIN_PAGES", 1)
+    policy = RenderPolicy(dpi=36)
+
+    parallel = render_pages(pdf_path, policy, workers=2)
+
+    assert [page.data for page in parallel] == [page.data for page in render_pages(pdf_path, policy, workers=1)]
+
+
+def test_rasterize_pdf_returns_pil_images(pdf_path):
+    images = rasterize_pdf(pdf_path, dpi=72, workers=1)
+
+    assert [image.size for image in images] == [(400, 300)] * 4
+
+
+def test_trim_margins_crops_to_content_with_padding():
+    image = Image.new("RGB", (100, 80), "white")
+    image.paste(Image.new("RGB", (20, 10), "black"), (40, 30))
+
+    assert trim_margins(image).size == (36, 26)
+    assert trim_margins(Image.new("RGB", (10, 10), "white")).size == (10, 10)
+
+
+def test_encode_image_applies_format_and_size_cap():
+    image = Image.new("RGB", (400, 200), "red")
+
+    encoded = encode_image(image, RenderPolicy(max_side=100, image_format="jpeg", quality=60))
+
+    assert encoded.mime_type == "image/jpeg"
+    assert encoded.size == (100, 50)
+    assert encoded.to_part()["data"] == encoded.data
+
+
+def test_stage_policies_come_from_settings(monkeypatch):
+    for name, value in {"METADATA_DPI": 72, "METADATA_MAX_SIDE": 1024, "TOPIC_DPI": 150, "TOPIC_MAX_SIDE": 1536}.items():
+        monkeypatch.setattr(f"src.utils.pdf_rasterizer.settings.PAGE_IMAGE_{name}", value)
+    monkeypatch.setattr("src.utils.pdf_rasterizer.settings.PAGE_IMAGE_FORMAT", "WEBP")
+    monkeypatch.setattr("src.utils.pdf_rasterizer.settings.PAGE_IMAGE_QUALITY", 70)
+    monkeypatch.setattr("src.utils.pdf_rasterizer.settings.PAGE_IMAGE_TRIM_MARGINS", True)
+
+    metadata, topic = stage_policy(STAGE_METADATA), stage_policy(STAGE_TOPIC)
+
+    assert (metadata.dpi, metadata.max_side) == (72, 1024)
+    assert (topic.dpi, topic.max_side) == (150, 1536)
+    assert {metadata.image_format, topic.image_format} == {"webp"}
+    assert metadata.quality == 70 and metadata.trim_margins
+    assert metadata.cache_key != topic.cache_key
+
+
+def test_jpeg_pages_are_rendered_at_the_capped_size(pdf_path):
+    pages = render_pages(pdf_path, RenderPolicy(dpi=300, max_side=200, image_format="jpeg"), workers=1)
+
+    assert all(page.size == (200, 150) for page in pages)
+    assert all(page.mime_type == "image/jpeg" and page.data[:2] == b"\xff\xd8" for page in pages)
+
+
+def test_trimmed_webp_pages_drop_their_margins(pdf_path):
+    pages = render_pages(pdf_path, RenderPolicy(dpi=72, image_format="webp", trim_margins=True), workers=1)
+
+    assert pages[0].mime_type == "image/webp"
+    assert pages[0].data[:4] == b"RIFF" and pages[0].data[8:12] == b"WEBP"
+    assert pages[0].width < 400 and pages[0].height < 300
+    assert pages[0].to_image().size == pages[0].size
+
+
+def test_unknown_formats_fall_back_to_png():
+    encoded = encode_image(Image.new("RGB", (20, 10), "blue"), RenderPolicy(image_format="gif"))
+
+    assert encoded.mime_type == "image/png"
+    assert encoded.data[:8] == b"\x89PNG\r\n\x1a\n"
@@ -0,0 +1,86 @@
+"""
+Tests for concurrent topic extraction in the pitch deck processor
+"""
+
+import threading
+
+import pytest
+from PIL import Image
+
+from src.processors import pitch_deck_processor
+from src.processors.pitch_deck_processor import TOPIC_ERROR_PREFIX, PitchDeckProcessor
+from src.utils.deck_session import DeckSession
+
+TOC = {"Team": [1], "Market": [2], "Product": [3], "Traction": [3, 4]}
+
+
+class StubLLMManager:
+    """Extracts topics from page numbers; "Market" fails while the others are still running"""
+
+    def __init__(self):
+        self.calls = []
+        self.market_failed = threading.Event()
+        self._lock = threading.Lock()
+
+    def extract_topic_data(self, topic, pages):
+        with self._lock:
+            self.calls.append(topic)
+        if topic == "Market":
+            self.market_failed.set()
+            raise RuntimeError("quota exceeded")
+        # The other topics finish only after the failure, so a cancellation would drop them
+        assert self.market_failed.wait(timeout=5)
+        return f"{topic}: pages {[page.page_number for page in pages]}"
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    stub = StubLLMManager()
+    monkeypatch.setattr(pitch_deck_processor, "llm_manager", stub)
+    monkeypatch.setattr(pitch_deck_processor.settings, "TOPIC_EXTRACTION_MODE", "per_topic")
+    monkeypatch.setattr(pitch_deck_processor.settings, "TOPIC_EXTRACTION_WORKERS", 4)
+    return stub
+
+
+def session():
+    return DeckSession([Image.new("RGB", (8, 8), (40 * index, 0, 0)) for index in range(4)])
+
+
+def test_a_failed_topic_does_not_cancel_the_others(stub_llm):
+    progress = []
+    processor = PitchDeckProcessor(on_topic_progress=lambda *args: progress.append(args))
+
+    extracted = processor._extract_topics(session(), TOC)
+
+    assert sorted(stub_llm.calls) == sorted(TOC)
+    assert list(extracted) == list(TOC)
+    assert extracted["Team"] == "Team: pages [1]"
+    assert extracted["Traction"] == "Traction: pages [3, 4]"
+    assert extracted["Market"] == f"{TOPIC_ERROR_PREFIX}quota exceeded"
+    assert [(completed, total) for completed, total, _ in progress] == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    assert sorted(topic for _, _, topic in progress) == sorted(TOC)
+    # The failed topic keeps the deck out of the restore index
+    assert processor._failed_topics(TOC, extracted) == ["Market"]
+
+
+def test_reused_and_skipped_topics_are_counted(stub_llm):
+    progress = []
+    processor = PitchDeckProcessor(on_topic_progress=lambda *args: progress.append(args))
+    toc = {"Team": [1], "Market": [2], "Appendix": []}
+
+    extracted = processor._extract_topics(session(), toc, reused={"Team": "previous team"})
+
+    assert stub_llm.calls == ["Market"]
+    assert extracted == {"Team": "previous team", "Market": f"{TOPIC_ERROR_PREFIX}quota exceeded"}
+    assert [(completed, topic) for completed, _, topic in progress] == [(1, "Team"), (2, "Market")]
+    assert processor._failed_topics(toc, extracted) == ["Market", "Appendix"]
+
+
+def test_progress_callback_errors_do_not_fail_extraction(stub_llm):
+    def broken_callback(completed, total, topic):
+        raise ValueError("widget gone")
+
+    stub_llm.market_failed.set()
+    extracted = PitchDeckProcessor(on_topic_progress=broken_callback)._extract_topics(session(), {"Team": [1]})
+
+    assert extracted == {"Team": "Team: pages [1]"}
@@ -0,0 +1,88 @@
+"""
+Tests for the shared token-bucket rate limiter
+"""
+
+import asyncio
+
+import pytest
+from PIL import Image
+
+from src.utils.rate_limiter import (
+    RateLimiter, TokenBucket, TOKENS_PER_IMAGE, estimate_prompt_tokens, get_rate_limiter
+)
+
+
+def test_bucket_grants_capacity_then_waits_for_refill():
+    bucket = TokenBucket(capacity=2, refill_per_second=1.0)
+    start = bucket.last_refill
+
+    assert bucket.reserve(1, start) == 0.0
+    assert bucket.reserve(1, start) == 0.0
+    # Third reservation goes into debt and waits one refill period
+    assert bucket.reserve(1, start) == pytest.approx(1.0)
+    # Waiters queue up behind the debt
+    assert bucket.reserve(1, start) == pytest.approx(2.0)
+
+
+def test_bucket_refills_over_time_up_to_capacity():
+    bucket = TokenBucket(capacity=2, refill_per_second=0.5)
+    start = bucket.last_refill
+    bucket.reserve(2, start)
+
+    assert bucket.reserve(1, start + 2.0) == 0.0
+    # A long pause refills no more than the capacity
+    bucket.reserve(0, start + 100.0)
+    assert bucket.tokens == pytest.approx(2.0)
+
+
+def test_limiter_waits_for_the_tighter_budget(monkeypatch):
+    monkeypatch.setattr("src.utils.rate_limiter.time.monotonic", lambda: 0.0)
+    limiter = RateLimiter("test", requests_per_minute=60, tokens_per_minute=600)
+
+    # 600 tokens/min refill at 10 tokens/s; the second 600-token request waits a full minute
+    assert limiter._reserve(600) == 0.0
+    assert limiter._reserve(600) == pytest.approx(60.0)
+    assert limiter.total_requests == 2
+    assert limiter.total_tokens == 1200
+
+
+def test_oversized_request_is_capped_at_the_budget(monkeypatch):
+    monkeypatch.setattr("src.utils.rate_limiter.time.monotonic", lambda: 0.0)
+    limiter = RateLimiter("test", requests_per_minute=0, tokens_per_minute=100)
+
+    limiter._reserve(100)
+    assert limiter._reserve(10_000) == pytest.approx(60.0)
+
+
+def test_disabled_limits_never_wait():
+    limiter = RateLimiter("test", requests_per_minute=0, tokens_per_minute=None)
+
+    assert all(limiter.acquire(1000) == 0.0 for _ in range(100))
+
+
+def test_acquire_async_sleeps_without_blocking(monkeypatch):
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr("src.utils.rate_limiter.asyncio.sleep", fake_sleep)
+    limiter = RateLimiter("test", requests_per_minute=1)
+
+    asyncio.run(limiter.acquire_async())
+    asyncio.run(limiter.acquire_async())
+
+    assert len(slept) == 1 and slept[0] > 0
+
+
+def test_estimate_prompt_tokens_counts_text_and_images():
+    image = Image.new("RGB", (2, 2))
+
+    assert estimate_prompt_tokens(None) == 0
+    assert estimate_prompt_tokens("x" * 400) == 100
+    assert estimate_prompt_tokens(["x" * 40, image, image]) == 10 + 2 * TOKENS_PER_IMAGE
+
+
+def test_limiters_are_shared_per_provider_and_model():
+    assert get_rate_limiter("google", "model-x") is get_rate_limiter("GOOGLE", "model-x")
+    assert get_rate_limiter("google", "model-x") is not get_rate_limiter("google", "model-y")
@@ -0,0 +1,193 @@
+"""
+Tests for the classified retry and deadline engine
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils.circuit_breaker import CircuitBreakerOpenError
+from src.utils.retry_policy import (
+    RetryBudget, RetryPolicy, is_retryable, remaining_time, retry_after_seconds
+)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, message="request failed"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class BlockedPromptException(Exception):
+    pass
+
+
+@pytest.fixture
+def slept(monkeypatch):
+    delays = []
+    monkeypatch.setattr("src.utils.retry_policy.time.sleep", delays.append)
+    return delays
+
+
+def policy(max_attempts=3, deadline_seconds=60.0, budget=None):
+    return RetryPolicy("test", max_attempts=max_attempts, base_delay=0.0, max_delay=1.0,
+                       deadline_seconds=deadline_seconds, attempt_timeout=30.0,
+                       budget=budget or RetryBudget(ratio=1.0, min_retries_per_window=100))
+
+
+def failing(errors, result="ok"):
+    calls = []
+
+    def func():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return result
+    func.calls = calls
+    return func
+
+
+@pytest.mark.parametrize("error", [
+    StatusError(429), StatusError(503), StatusError(408), TimeoutError("timed out"),
+    ConnectionError("Connection reset by peer"), StatusError(503, "Connection blocked by proxy"),
+    Exception("Request blocked: quota exceeded"),
+])
+def test_transient_errors_are_retryable(error):
+    assert is_retryable(error)
+
+
+@pytest.mark.parametrize("error", [
+    StatusError(400), StatusError(403), BlockedPromptException("prompt"),
+    ValueError("Response blocked: finish_reason: SAFETY"),
+    ValueError("prompt_feedback { block_reason: SAFETY }"),
+    CircuitBreakerOpenError("open"), ValueError("could not parse JSON"),
+])
+def test_client_errors_are_not_retryable(error):
+    assert not is_retryable(error)
+
+
+def test_wrapped_errors_are_classified_by_their_cause():
+    try:
+        try:
+            raise StatusError(503)
+        except StatusError as e:
+            raise RuntimeError("LLM call failed") from e
+    except RuntimeError as e:
+        assert is_retryable(e)
+
+
+def test_retry_after_sources():
+    headers = SimpleNamespace(headers={"retry-after": "7"})
+
+    assert retry_after_seconds(SimpleNamespace(retry_after=3)) == 3.0
+    assert retry_after_seconds(type("E", (Exception,), {"response": headers})()) == 7.0
+    assert retry_after_seconds(Exception("Quota exceeded. Please retry in 17.2s.")) == 17.2
+    assert retry_after_seconds(Exception("retry_delay {\n  seconds: 12\n}")) == 12.0
+    assert retry_after_seconds(Exception("no hint")) is None
+
+
+def test_retries_transient_errors_until_success(slept):
+    func = failing([StatusError(503), StatusError(429)])
+    retry = policy()
+
+    assert retry.call(func) == "ok"
+    assert len(func.calls) == 3
+    assert retry.retries == 2
+
+
+def test_client_errors_fail_immediately(slept):
+    func = failing([StatusError(400)])
+
+    with pytest.raises(StatusError):
+        policy().call(func)
+    assert len(func.calls) == 1
+    assert slept == []
+
+
+def test_gives_up_after_max_attempts(slept):
+    func = failing([StatusError(503)] * 5)
+    retry = policy(max_attempts=2)
+
+    with pytest.raises(StatusError):
+        retry.call(func)
+    assert len(func.calls) == 2
+    assert retry.gave_up == 1
+
+
+def test_backoff_honors_retry_after(slept):
+    policy().call(failing([StatusError(429, "Please retry in 5s")]))
+
+    assert slept == [5.0]
+
+
+def test_backoff_past_the_deadline_is_not_attempted(slept):
+    func = failing([StatusError(429, "Please retry in 30s")])
+
+    with pytest.raises(StatusError):
+        policy(deadline_seconds=10.0).call(func)
+    assert len(func.calls) == 1
+
+
+def test_exhausted_budget_stops_retries(slept):
+    budget = RetryBudget(ratio=0.0, min_retries_per_window=1)
+    retry = policy(max_attempts=5, budget=budget)
+
+    with pytest.raises(StatusError):
+        retry.call(failing([StatusError(503)] * 5))
+    assert budget.get_stats()["retries_in_window"] == 1
+    assert budget.denied == 1
+
+
+def test_nested_policies_do_not_multiply_retries(slept):
+    inner = failing([StatusError(503)] * 2)
+    inner_policy = policy()
+
+    def outer():
+        assert remaining_time() is not None
+        return inner_policy.call(inner)
+
+    assert policy().call(outer) == "ok"
+    assert len(inner.calls) == 3
+    assert inner_policy.retries == 0
+    assert remaining_time() is None
+
+
+def test_async_calls_retry(monkeypatch):
+    async def no_sleep(seconds):
+        pass
+
+    monkeypatch.setattr("src.utils.retry_policy.asyncio.sleep", no_sleep)
+    errors = [StatusError(503)]
+
+    @policy()
+    async def request():
+        if errors:
+            raise errors.pop(0)
+        return "ok"
+
+    assert asyncio.run(request()) == "ok"
+
+
+def test_stream_retries_only_before_the_first_item(slept):
+    opened = []
+
+    def flaky_open():
+        opened.append(1)
+        if len(opened) == 1:
+            raise StatusError(503)
+        yield "a"
+        yield "b"
+
+    assert list(policy().stream(flaky_open)) == ["a", "b"]
+    assert len(opened) == 2
+
+    def broken_midway():
+        opened.append(1)
+        yield "a"
+        raise StatusError(503)
+
+    opened.clear()
+    with pytest.raises(StatusError):
+        list(policy().stream(broken_midway))
+    assert len(opened) == 1
@@ -0,0 +1,138 @@
+"""
+Tests for single-flight request coalescing
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils.single_flight import SingleFlight
+
+
+def wait_until(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def request():
+        calls.append(1)
+        release.wait(5)
+        return "response"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", request))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flight.shared_calls == 4)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ["response"] * 5
+    assert len(calls) == 1
+    assert flight.in_flight() == 0
+
+
+def test_leader_error_is_shared_with_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def request():
+        release.wait(5)
+        raise ValueError("provider failed")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("key", request)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    wait_until(lambda: flight.shared_calls == 2)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert len({id(e) for e in errors}) == 1
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    assert flight.leader_calls == 2
+
+
+def test_async_waiters_share_the_leader_result():
+    flight = SingleFlight()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def main():
+        return await asyncio.gather(*(flight.do_async("key", request) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["response"] * 4
+    assert len(calls) == 1
+
+
+def test_cancelled_leader_hands_the_call_to_a_waiter():
+    flight = SingleFlight()
+    calls = []
+
+    async def request():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return len(calls)
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("key", request))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(flight.do_async("key", request)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    # The waiters are not cancelled; one of them re-ran the call for all
+    assert asyncio.run(main()) == [2, 2, 2]
+    assert len(calls) == 2
+    assert flight.in_flight() == 0
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight()
+
+    async def request():
+        await asyncio.sleep(0.05)
+        return "response"
+
+    async def main():
+        leader = asyncio.create_task(flight.do_async("key", request))
+        await asyncio.sleep(0.01)
+        cancelled = asyncio.create_task(flight.do_async("key", request))
+        other = asyncio.create_task(flight.do_async("key", request))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        return await leader, await other
+
+    assert asyncio.run(main()) == ("response", "response")
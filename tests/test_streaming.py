@@ -0,0 +1,167 @@
+"""
+Tests for streamed LLM responses, from the provider stream to the written reports
+"""
+
+import pytest
+
+from src.agents.base_agent import AnalysisError
+from src.agents.business_agent import BusinessAnalysisAgent
+from src.processors.analysis_pipeline import AnalysisPipeline
+from src.utils import llm_setup as llm_setup_module
+from src.utils.llm_setup import MockLLM, llm_setup
+from src.utils.retry_policy import RetryBudget, RetryPolicy
+
+REPORT = "# Executive Summary\nStrong team.\n## Information Gaps\nNo churn data.\n"
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FlakyLLM(MockLLM):
+    """Mock LLM whose first streams fail before producing output"""
+
+    def __init__(self, responses, failures=1):
+        super().__init__(responses)
+        self.failures = failures
+        self.opened = 0
+
+    def stream(self, prompt, **kwargs):
+        self.opened += 1
+        if self.opened <= self.failures:
+            raise StatusError(503)
+        yield from super().stream(prompt, **kwargs)
+
+
+class BrokenLLM(MockLLM):
+    """Mock LLM whose stream fails after its first chunk"""
+
+    def __init__(self, responses):
+        super().__init__(responses)
+        self.opened = 0
+
+    def stream(self, prompt, **kwargs):
+        self.opened += 1
+        chunks = super().stream(prompt, **kwargs)
+        yield next(chunks)
+        raise ConnectionError("Connection reset by peer")
+
+
+@pytest.fixture(autouse=True)
+def streaming(monkeypatch):
+    policy = RetryPolicy("test", max_attempts=3, base_delay=0.0, max_delay=0.0,
+                         budget=RetryBudget(ratio=1.0, min_retries_per_window=100))
+    monkeypatch.setattr(llm_setup_module, "get_retry_policy", lambda provider="google": policy)
+    monkeypatch.setattr(llm_setup, "_enforce_rate_limit", lambda llm, prompt: None)
+
+
+def agent(llm):
+    return BusinessAnalysisAgent(llm=llm)
+
+
+def test_mock_stream_yields_the_response_line_by_line():
+    assert list(llm_setup.stream_with_retry(MockLLM([REPORT]), "prompt")) == REPORT.splitlines(keepends=True)
+
+
+def test_stream_is_retried_before_the_first_chunk():
+    llm = FlakyLLM([REPORT])
+
+    assert "".join(llm_setup.stream_with_retry(llm, "prompt")) == REPORT
+    assert llm.opened == 2
+
+
+def test_stream_failing_after_output_is_not_restarted():
+    llm = BrokenLLM([REPORT])
+    received = []
+
+    with pytest.raises(ConnectionError):
+        for chunk in llm_setup.stream_with_retry(llm, "prompt"):
+            received.append(chunk)
+
+    assert received == ["# Executive Summary\n"]
+    assert llm.opened == 1
+
+
+def test_chunks_are_written_before_they_are_forwarded(tmp_path):
+    report_file = tmp_path / "report.md"
+    report_file.write_text("HEADER\n", encoding="utf-8")
+    written = []
+
+    def on_chunk(chunk):
+        written.append(report_file.read_text(encoding="utf-8"))
+
+    result = agent(MockLLM([REPORT])).analyze_combined_documents("deck", "public", on_chunk=on_chunk,
+                                                                output_file=str(report_file))
+
+    assert result == REPORT.strip()
+    assert written == ["HEADER\n" + "".join(REPORT.splitlines(keepends=True)[:count])
+                       for count in range(1, 5)]
+    assert report_file.read_text(encoding="utf-8") == "HEADER\n" + REPORT
+
+
+def test_invalid_streamed_report_is_replaced_by_the_regenerated_one(tmp_path):
+    report_file = tmp_path / "report.md"
+    report_file.write_text("HEADER\n", encoding="utf-8")
+    chunks = []
+
+    result = agent(MockLLM(["Partial\nreport\n", REPORT])).analyze_combined_documents(
+        "deck", "public", on_chunk=chunks.append, output_file=str(report_file)
+    )
+
+    assert result == REPORT.strip()
+    assert report_file.read_text(encoding="utf-8") == "HEADER\n" + REPORT.strip()
+    assert chunks[:2] == ["Partial\n", "report\n"]
+    assert "Regenerated with a stronger model" in chunks[-1]
+
+
+def test_stream_failing_partway_keeps_the_partial_report(tmp_path):
+    report_file = tmp_path / "report.md"
+    broken = agent(BrokenLLM([REPORT]))
+
+    with pytest.raises(AnalysisError):
+        broken.analyze_combined_documents("deck", "public", output_file=str(report_file))
+
+    assert report_file.read_text(encoding="utf-8") == "# Executive Summary\n"
+    assert broken.error_count == 1
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    (tmp_path / "pitch_deck.md").write_text("# Deck\nWe sell analytics.\n", encoding="utf-8")
+    chunks = []
+    instance = AnalysisPipeline(str(tmp_path), use_real_llm=False,
+                                on_chunk=lambda name, chunk: chunks.append((name, chunk)))
+    instance.chunks = chunks
+    return instance
+
+
+def test_pipeline_streams_reports_and_does_not_rewrite_them(pipeline):
+    pipeline.agents = {"business": agent(MockLLM([REPORT]))}
+
+    results = pipeline.run_all_agents_analysis()
+    report_file = pipeline.analysis_dir / "business_analysis.md"
+    streamed = report_file.read_text(encoding="utf-8")
+    pipeline.generate_agent_specific_reports(results)
+
+    assert results["business"]["report_file"] == str(report_file)
+    assert [chunk for _, chunk in pipeline.chunks] == REPORT.splitlines(keepends=True)
+    assert {name for name, _ in pipeline.chunks} == {"business"}
+    assert streamed.startswith("# Business Analysis Report")
+    assert REPORT in streamed and "**Processing Time:**" in streamed
+    assert report_file.read_text(encoding="utf-8") == streamed
+    assert (pipeline.analysis_dir / "analysis_summary.md").exists()
+
+
+def test_pipeline_marks_a_stream_that_failed_partway(pipeline):
+    pipeline.agents = {"business": agent(BrokenLLM([REPORT]))}
+
+    results = pipeline.run_all_agents_analysis()
+    report = (pipeline.analysis_dir / "business_analysis.md").read_text(encoding="utf-8")
+    pipeline.generate_agent_specific_reports(results)
+
+    assert results["business"]["status"] == "failed"
+    assert "# Executive Summary\n" in report
+    assert "**Analysis failed before completion:**" in report
+    assert (pipeline.analysis_dir / "business_analysis.md").read_text(encoding="utf-8") == report
@@ -0,0 +1,73 @@
+"""
+Tests for the local table of contents builder
+"""
+
+from src.utils.page_classifier import PageText
+from src.utils.toc_builder import (
+    build_local_metadata, classify_sector, extract_startup_name, extract_website, local_metadata_or_none
+)
+
+
+def page(number, title, body=""):
+    text = f"{title}\n{body}".strip()
+    return PageText(number, text, 0.3, 0.0, True, title)
+
+
+DECK = [
+    page(1, "PayLoop", "Payments infrastructure for small merchants\nwww.payloop.io"),
+    page(2, "The Problem", "Merchants lose 3% of revenue to failed payments and manual reconciliation"),
+    page(3, "Our Solution", "A payments platform that retries, reconciles and reports automatically"),
+    page(4, "Market Size", "TAM $40B, SAM $6B, growing at 18% CAGR"),
+    page(5, "Business Model", "SaaS subscription pricing plus a small fee on payments"),
+    page(6, "Traction", "1,200 customers, $2.4M ARR, 140% net retention"),
+    page(7, "Meet the Team", "Founders: ex-Stripe CEO and CTO"),
+    page(8, "The Ask", "Raising $5M seed round\nUse of funds: hiring and expansion\npayloop.io"),
+]
+
+
+def test_build_local_metadata_maps_pages_to_topics():
+    metadata = build_local_metadata(DECK)
+
+    assert metadata.table_of_contents == {
+        "Problem": [2], "Solution": [3], "Market_Size": [4], "Business_Model": [5],
+        "Team": [7], "Traction": [6], "Ask": [8]
+    }
+    assert metadata.confidence == 1.0
+    assert metadata.startup_name == "PayLoop"
+    assert metadata.website == "https://payloop.io"
+    assert (metadata.sector, metadata.sub_sector) == ("Financial Services", "Fintech")
+    assert metadata.to_metadata()["metadata_source"] == "local"
+
+
+def test_ambiguous_pages_are_left_unassigned():
+    deck = [page(1, "Acme"), page(2, "Overview", "Team and traction and market")]
+
+    metadata = build_local_metadata(deck)
+
+    assert metadata.table_of_contents == {}
+    assert metadata.confidence == 0.0
+
+
+def test_website_prefers_the_most_frequent_domain_and_ignores_emails():
+    pages = [page(1, "Acme", "acme.ai"), page(2, "Contact", "founder@gmail.com partner.com"), page(3, "End", "acme.ai")]
+
+    assert extract_website(pages) == "https://acme.ai"
+    assert extract_website([page(1, "No links")]) is None
+
+
+def test_startup_name_needs_confirmation():
+    assert extract_startup_name([page(1, "Pitch Deck"), page(2, "Acme Robotics")], "https://acmerobotics.com") \
+        == "Acme Robotics"
+    assert extract_startup_name([page(1, "Welcome"), page(2, "Vision")], None) is None
+    assert extract_startup_name([page(1, "Helio", "© 2024 Helio Technologies")], None) == "Helio"
+
+
+def test_sector_needs_repeated_mentions():
+    assert classify_sector([page(1, "Farm", "farmers crop yields on every farm")]) == ("Food & Agriculture", "AgriTech")
+    assert classify_sector([page(1, "Other", "one mention of solar")]) == (None, None)
+
+
+def test_low_confidence_falls_back_to_the_llm():
+    assert local_metadata_or_none(DECK)["startup_name"] == "PayLoop"
+    assert local_metadata_or_none([page(1, "Untitled")]) is None
+    assert local_metadata_or_none([]) is None
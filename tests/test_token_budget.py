@@ -0,0 +1,70 @@
+"""
+Tests for the token budget planner
+"""
+
+from src.utils.token_budget import (
+    DEFAULT_CONTEXT_WINDOW, TokenBudgetPlanner, context_window_for, count_tokens,
+    split_blocks, split_markdown_sections
+)
+
+TABLE = "| Metric | Value |\n|---|---|\n| ARR | $2.4M |\n| Growth | 3x |"
+
+
+def planner():
+    return TokenBudgetPlanner(model="gemini-2.5-flash", reserved_output_tokens=1000)
+
+
+def test_context_window_matches_longest_prefix():
+    assert context_window_for("gemini-1.5-pro-002") == 2_097_152
+    assert context_window_for("models/gemini-2.5-flash") == 1_048_576
+    assert context_window_for("unknown-model") == DEFAULT_CONTEXT_WINDOW
+    assert context_window_for(None) == DEFAULT_CONTEXT_WINDOW
+
+
+def test_small_context_models_reserve_at_most_half_for_output():
+    small = TokenBudgetPlanner(model="llama3-8b-8192", reserved_output_tokens=8000)
+
+    assert small.max_prompt_tokens == 4096
+
+
+def test_sections_split_at_headings_outside_code_fences():
+    text = "# A\nintro\n```\n# not a heading\n```\n## B\nbody"
+
+    assert split_markdown_sections(text) == ["# A\nintro\n```\n# not a heading\n```", "## B\nbody"]
+
+
+def test_tables_and_code_blocks_are_single_blocks():
+    section = f"Intro paragraph\n{TABLE}\nafter\n\n```\ncode\n\nmore code\n```"
+
+    assert split_blocks(section) == ["Intro paragraph", TABLE, "after", "```\ncode\n\nmore code\n```"]
+
+
+def test_allocate_returns_inputs_unchanged_within_budget():
+    inputs = {"deck": "# Deck\nshort", "public": "# Public\nshort"}
+
+    assert planner().allocate(inputs, 10_000) == inputs
+
+
+def test_allocate_trims_the_lowest_priority_input_first():
+    filler = " ".join(["word"] * 200)
+    deck = f"# Deck\n{filler}\n\n## Team\n{filler}"
+    public = f"# Public\n{filler}\n\n## News\n{filler}"
+    budget = count_tokens(deck) + count_tokens(public) // 2 + 60
+
+    result = planner().allocate({"deck": (deck, 2.0), "public": (public, 1.0)}, budget)
+
+    assert result["deck"] == deck
+    assert "## News" not in result["public"]
+    assert result["public"].startswith("# Public")
+    assert "Trimmed to fit the token budget" in result["public"]
+
+
+def test_fit_never_cuts_a_table_in_half():
+    filler = " ".join(["word"] * 100)
+    text = f"# Report\n{filler}\n\n{TABLE}"
+
+    result = planner().fit(text, count_tokens(text) - 5)
+
+    assert TABLE not in result
+    assert "| ARR" not in result
+    assert result.startswith("# Report")
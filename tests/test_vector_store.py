@@ -0,0 +1,69 @@
+"""
+Tests for the persistent NumPy vector store
+"""
+
+import numpy as np
+import pytest
+
+from src.utils.vector_store import VectorStore, text_hash
+
+
+def fake_embed(calls):
+    def embed(texts):
+        calls.append(list(texts))
+        return [[float(len(text)), 1.0, 0.0] for text in texts]
+    return embed
+
+
+def test_add_texts_embeds_only_new_texts(tmp_path):
+    store = VectorStore(tmp_path, "embed-model")
+    calls = []
+
+    assert store.add_texts(["alpha", "beta", "alpha"], embed=fake_embed(calls)) == 2
+    assert store.add_texts(["alpha", "gamma"], embed=fake_embed(calls)) == 1
+
+    assert calls == [["alpha", "beta"], ["gamma"]]
+    assert len(store) == 3
+
+
+def test_store_is_reloaded_from_disk(tmp_path):
+    VectorStore(tmp_path, "embed-model").add(["a"], ["alpha"], [[1.0, 2.0]], [{"page": 1}])
+
+    reopened = VectorStore(tmp_path, "embed-model")
+
+    assert len(reopened) == 1
+    assert reopened.contains(text_hash("alpha", "embed-model"))
+    np.testing.assert_array_equal(reopened.get("a"), np.array([1.0, 2.0], dtype=np.float32))
+
+
+def test_store_from_another_model_is_ignored(tmp_path):
+    VectorStore(tmp_path, "embed-model").add(["a"], ["alpha"], [[1.0, 2.0]])
+
+    assert len(VectorStore(tmp_path, "other-model")) == 0
+
+
+def test_existing_id_is_replaced(tmp_path):
+    store = VectorStore(tmp_path, "embed-model")
+    store.add(["a"], ["old text"], [[1.0, 0.0]])
+
+    store.add(["a"], ["new text"], [[0.0, 1.0]])
+
+    assert len(store) == 1
+    np.testing.assert_array_equal(store.get("a"), np.array([0.0, 1.0], dtype=np.float32))
+
+
+def test_search_ranks_by_cosine_similarity(tmp_path):
+    store = VectorStore(tmp_path, "embed-model")
+    store.add(["x", "y", "xy"], ["x", "y", "xy"], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+              [{"axis": "x"}, {"axis": "y"}, {"axis": "xy"}])
+
+    results = store.search([2.0, 0.1], top_k=2)
+
+    assert [result["id"] for result in results] == ["x", "xy"]
+    assert results[0]["metadata"] == {"axis": "x"}
+    assert VectorStore(tmp_path / "empty", "embed-model").search([1.0, 0.0]) == []
+
+
+def test_mismatched_inputs_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        VectorStore(tmp_path, "embed-model").add(["a", "b"], ["alpha"], [[1.0]])